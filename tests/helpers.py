@@ -0,0 +1,99 @@
+import asyncio
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from unittest import mock
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from bs4 import BeautifulSoup
+
+from uniulm_mensaparser import studierendenwerk_scraper
+
+"""
+Shared fixtures for tests that fetch plans from a local stand-in for MaxManager.
+"""
+
+FIXTURE_DIR = Path(__file__).parent / "new-html"
+
+
+def load_fixtures() -> Dict[str, str]:
+    return {f.name: f.read_text() for f in sorted(FIXTURE_DIR.glob("*.html"))}
+
+
+def repeated_day_page(source: str, times: int) -> str:
+    """
+    Returns a day page with the categories of source repeated the given number
+    of times.
+    """
+    container = BeautifulSoup(source, "html.parser").div
+    body = "".join(str(child) for child in container.children)
+    return "<div class='container-fluid'>" + body * times + "</div>"
+
+
+class StandInServer:
+    """
+    Local HTTP server that answers MaxManager requests. While it is running,
+    the scraper sends its requests to this server.
+    Args:
+        page_for: Returns the page for a request form. By default, one of the
+            fixtures is chosen by the canteen and the requested date.
+        latency: Delay of every response in seconds
+        status: Status of every response
+    While the release event is cleared, responses are held back until it is
+    set again.
+    """
+
+    def __init__(
+        self,
+        page_for: Optional[Callable[[Dict[str, str]], str]] = None,
+        latency: float = 0,
+        status: int = 200,
+    ):
+        if page_for is None:
+            pages = list(load_fixtures().values())
+
+            def page_for(form: Dict[str, str]) -> str:
+                day = date.fromisoformat(form["date"]).toordinal()
+                return pages[(day + int(form["locId"])) % len(pages)]
+
+        self.page_for = page_for
+        self.latency = latency
+        self.status = status
+        self.release = asyncio.Event()
+        self.release.set()
+        self.requests: List[Dict[str, str]] = []
+
+        app = web.Application()
+        app.router.add_post("/", self._handle)
+        self.server = TestServer(app)
+        self._url_patch: Optional[mock._patch] = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        form = {k: str(v) for k, v in (await request.post()).items()}
+        self.requests.append(form)
+        await self.release.wait()
+        await asyncio.sleep(self.latency)
+        return web.Response(
+            text=self.page_for(form), status=self.status, content_type="text/html"
+        )
+
+    async def start(self) -> "StandInServer":
+        await self.server.start_server()
+        self._url_patch = mock.patch.object(
+            studierendenwerk_scraper, "MAXMANAGER_URL", str(self.server.make_url("/"))
+        )
+        self._url_patch.start()
+        return self
+
+    async def close(self) -> None:
+        if self._url_patch is not None:
+            self._url_patch.stop()
+            self._url_patch = None
+        await self.server.close()
+
+    async def __aenter__(self) -> "StandInServer":
+        return await self.start()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
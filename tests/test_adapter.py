@@ -0,0 +1,51 @@
+import json
+from datetime import date, datetime
+from pathlib import Path
+from unittest import TestCase, mock
+
+from uniulm_mensaparser import adapter
+from uniulm_mensaparser.adapter import JsonAdapter, SimpleAdapter2
+from uniulm_mensaparser.cache import SerializedDayCache
+from uniulm_mensaparser.html_parser import HtmlMensaParser
+from uniulm_mensaparser.models import Canteen, Meal
+
+
+class TestJsonAdapter(TestCase):
+    def setUp(self):
+        source = (Path(__file__).parent / "new-html" / "nutrition.html").read_text()
+        meals = HtmlMensaParser().parse_plan(
+            source, datetime(2024, 5, 21), Canteen.UL_UNI_Sued
+        )
+        self.plan = {
+            Canteen.UL_UNI_Sued: {date(2024, 5, 21): meals, date(2024, 5, 22): []},
+            Canteen.UL_UNI_West: {date(2024, 5, 21): meals[:2]},
+        }
+        # allergy sets are unordered, compare both outputs after one encoding
+        self.expected = json.loads(
+            json.dumps(SimpleAdapter2().convert_plans(self.plan))
+        )
+
+    def test_same_output_as_simple_adapter(self):
+        self.assertEqual(
+            json.loads(JsonAdapter().convert_plans(self.plan)), self.expected
+        )
+
+    def test_same_output_without_orjson(self):
+        with mock.patch.object(adapter, "ORJSON_AVAILABLE", False):
+            encoded = JsonAdapter().convert_plans(self.plan)
+        self.assertEqual(json.loads(encoded), self.expected)
+
+    def test_unchanged_days_are_cached(self):
+        cache = SerializedDayCache()
+        json_adapter = JsonAdapter(cache)
+        first = json_adapter.convert_plans(self.plan)
+        self.assertEqual(cache.stats.misses, 3)
+
+        self.assertEqual(json_adapter.convert_plans(self.plan), first)
+        self.assertEqual(cache.stats.hits, 3)
+
+        # a day with other meal objects is encoded again
+        self.plan[Canteen.UL_UNI_West][date(2024, 5, 21)] = [Meal(name="Pizza")]
+        changed = json.loads(json_adapter.convert_plans(self.plan))
+        self.assertEqual(changed["ul_uni_west"]["2024-05-21"][0]["name"], "Pizza")
+        self.assertEqual(cache.stats.hits, 5)
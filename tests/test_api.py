@@ -0,0 +1,62 @@
+import json
+import unittest
+
+from uniulm_mensaparser import api
+from uniulm_mensaparser.adapter import JsonAdapter
+from uniulm_mensaparser.models import Canteen
+from uniulm_mensaparser.scheduler import create_session
+
+from .helpers import StandInServer
+
+
+class TestAsyncApi(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = await StandInServer().start()
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def test_unformatted_plan_in_running_loop(self):
+        plan = await api.async_get_unformatted_plan({Canteen.UL_UNI_Sued})
+
+        self.assertSetEqual(set(plan.keys()), {Canteen.UL_UNI_Sued})
+        self.assertEqual(len(plan[Canteen.UL_UNI_Sued]), 10)
+
+    async def test_external_session_is_reused(self):
+        async with create_session() as session:
+            first = await api.async_get_plan(session=session)
+            second = await api.async_get_plan_by_language("en", session=session)
+            self.assertFalse(session.closed)
+
+        self.assertSetEqual(set(first.keys()), {"ul_uni_sued", "ul_uni_west"})
+        self.assertSetEqual(set(second.keys()), set(first.keys()))
+
+    async def test_json_adapter(self):
+        async with create_session() as session:
+            plan = await api.async_get_plan(session=session)
+            body = await api.async_get_plan(session=session, adapter_class=JsonAdapter)
+
+        self.assertIsInstance(body, bytes)
+        self.assertDictEqual(json.loads(body), plan)
+
+    async def test_plan_by_languages(self):
+        plans = await api.async_get_plan_by_languages(["de", "en"])
+
+        self.assertSetEqual(set(plans.keys()), {"de", "en"})
+        for plan in plans.values():
+            self.assertSetEqual(set(plan.keys()), {"ul_uni_sued", "ul_uni_west"})
+
+    async def test_iter_unformatted_plan_yields_every_day(self):
+        days = [
+            (canteen, plan_date)
+            async for canteen, plan_date, _ in api.async_iter_unformatted_plan()
+        ]
+
+        self.assertEqual(len(days), 20)
+        self.assertEqual(len(set(days)), 20)
+
+    async def test_iter_plan_formats_days(self):
+        async for day in api.async_iter_plan({Canteen.UL_UNI_West}):
+            self.assertListEqual(list(day.keys()), ["ul_uni_west"])
+            self.assertEqual(len(day["ul_uni_west"]), 1)
+            break
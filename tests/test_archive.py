@@ -0,0 +1,71 @@
+from datetime import date, datetime
+from pathlib import Path
+from unittest import TestCase
+
+from uniulm_mensaparser.archive import PlanArchive
+from uniulm_mensaparser.html_parser import HtmlMensaParser
+from uniulm_mensaparser.models import Canteen, MealType
+
+
+class TestPlanArchive(TestCase):
+    def setUp(self):
+        test_data_dir = Path(__file__).parent / "new-html"
+        parser = HtmlMensaParser()
+        self.plan = {
+            Canteen.UL_UNI_Sued: {
+                datetime(2023, 12, 19): parser.parse_plan(
+                    (test_data_dir / "double.html").read_text(),
+                    datetime(2023, 12, 19),
+                    Canteen.UL_UNI_Sued,
+                ),
+                datetime(2023, 12, 21): parser.parse_plan(
+                    (test_data_dir / "wiener.html").read_text(),
+                    datetime(2023, 12, 21),
+                    Canteen.UL_UNI_Sued,
+                ),
+            }
+        }
+        self.archive = PlanArchive(":memory:")
+        self.archive.store_plan(self.plan)
+
+    def tearDown(self):
+        self.archive.close()
+
+    def test_round_trip(self):
+        archived = self.archive.query(date(2023, 12, 1), date(2023, 12, 31))
+        days = archived[Canteen.UL_UNI_Sued]
+
+        self.assertListEqual(
+            list(days.keys()), [date(2023, 12, 19), date(2023, 12, 21)]
+        )
+        self.assertListEqual(
+            days[date(2023, 12, 19)],
+            self.plan[Canteen.UL_UNI_Sued][datetime(2023, 12, 19)],
+        )
+
+    def test_storing_twice_replaces_day(self):
+        self.archive.store_plan(self.plan)
+        archived = self.archive.query(date(2023, 12, 19), date(2023, 12, 19))
+        self.assertEqual(
+            len(archived[Canteen.UL_UNI_Sued][date(2023, 12, 19)]),
+            len(self.plan[Canteen.UL_UNI_Sued][datetime(2023, 12, 19)]),
+        )
+
+    def test_filters(self):
+        archived = self.archive.query(
+            date(2023, 12, 1), date(2023, 12, 31), meal_type=MealType.FISH
+        )
+        meals = [m for day in archived[Canteen.UL_UNI_Sued].values() for m in day]
+        self.assertTrue(meals)
+        self.assertTrue(all(MealType.FISH in m.types for m in meals))
+
+        archived = self.archive.query(
+            date(2023, 12, 1), date(2023, 12, 31), canteens={Canteen.UL_UNI_West}
+        )
+        self.assertDictEqual(archived, {})
+
+    def test_count_served(self):
+        self.assertEqual(self.archive.count_served("1 Wienerle"), 1)
+        self.assertEqual(
+            self.archive.count_served("1 Wienerle", end=date(2023, 12, 20)), 0
+        )
@@ -0,0 +1,78 @@
+import asyncio
+import json
+import tempfile
+from datetime import date
+from pathlib import Path
+from unittest import TestCase, mock
+
+from uniulm_mensaparser import bench
+from uniulm_mensaparser.html_parser import HtmlMensaParser
+from uniulm_mensaparser.models import Canteen
+
+from .helpers import FIXTURE_DIR, load_fixtures
+
+
+class TestBench(TestCase):
+    def setUp(self):
+        self.fixtures = {"bio.html": load_fixtures()["bio.html"]}
+
+    def test_measure(self):
+        result = bench.measure("noop", lambda: None, 3)
+        self.assertEqual(result.name, "noop")
+        self.assertEqual(result.iterations, 3)
+        self.assertLessEqual(result.min_ms, result.max_ms)
+
+    def test_parse_benchmarks(self):
+        names = [r.name for r in bench.bench_parse_plan(self.fixtures, 1)]
+        names += [
+            r.name for r in bench.bench_parse_scaling(self.fixtures, 1, sizes=(1, 4))
+        ]
+        self.assertListEqual(
+            names,
+            [
+                "parse_plan[bs4:bio.html]",
+                "parse_plan[bs4:1 meals]",
+                "parse_plan[bs4:4 meals]",
+            ],
+        )
+
+    def test_synthetic_day_page(self):
+        page = bench.synthetic_day_page(self.fixtures, 10)
+        meals = HtmlMensaParser().parse_plan(
+            page, date(2024, 5, 21), Canteen.UL_UNI_Sued
+        )
+        self.assertGreaterEqual(len(meals), 10)
+
+    def test_format_benchmarks(self):
+        results = [bench.bench_convert_plans(self.fixtures, 1, weeks=1)]
+        results += bench.bench_serialize_plans(self.fixtures, 1, weeks=1)
+        self.assertTrue(all(r.iterations == 1 for r in results))
+
+    def test_memory_benchmarks(self):
+        memory = {
+            m["name"]: m["bytes_per_meal"]
+            for m in bench.bench_meal_memory(self.fixtures, copies=1)
+            + bench.bench_parse_memory(self.fixtures, copies=1)
+        }
+        self.assertLess(memory["CompactMeal"], memory["Meal"])
+        self.assertIn("parse_many", memory)
+
+    def test_end_to_end(self):
+        result = asyncio.run(bench.bench_end_to_end(self.fixtures, 1, latency=0))
+        self.assertTrue(result.name.startswith("get_meals_for_canteens[bs4"))
+
+    def test_main_requires_fixtures(self):
+        with mock.patch("sys.stderr"), self.assertRaises(SystemExit):
+            bench.main([])
+
+    def test_main_writes_json(self):
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(
+            bench, "run_benchmarks", return_value={"results": []}
+        ) as run_benchmarks:
+            output = Path(tmp) / "bench.json"
+            args = ["--fixtures", str(FIXTURE_DIR), "--latency", "0"]
+            bench.main([*args, "--output", str(output)])
+            report = json.loads(output.read_text())
+
+        self.assertIn("results", report)
+        run_benchmarks.assert_called_once_with(FIXTURE_DIR, 20, 8, 0.0, "bs4")
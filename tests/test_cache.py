@@ -0,0 +1,225 @@
+import tempfile
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+from unittest import TestCase, mock
+
+from uniulm_mensaparser.cache import (
+    MemoryCacheBackend,
+    ParseCache,
+    ResponseCache,
+    SqliteCacheBackend,
+    TtlPolicy,
+)
+from uniulm_mensaparser.html_parser import HtmlMensaParser
+from uniulm_mensaparser.mensaparser import create_parse_executor, get_meals_for_date
+from uniulm_mensaparser.models import Canteen
+from uniulm_mensaparser.studierendenwerk_scraper import get_maxmanager_website
+
+
+class FakeResponse:
+    def __init__(self, text: str, status: int = 200):
+        self._text = text
+        self.status = status
+
+    async def text(self) -> str:
+        return self._text
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class FakeSession:
+    def __init__(self, text: str = "<div></div>"):
+        self.text = text
+        self.requests = []
+
+    def post(self, url, data=None):
+        self.requests.append(data)
+        return FakeResponse(self.text)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+REQUEST = {"func": "make_spl", "locId": "1", "date": "2024-05-21", "lang": "de"}
+
+
+class TestTtlPolicy(TestCase):
+    def test_ttl_by_date(self):
+        policy = TtlPolicy(past=None, today=10, future=100)
+        today = date(2024, 5, 21)
+        self.assertIsNone(policy.ttl_for(today - timedelta(days=1), today))
+        self.assertEqual(policy.ttl_for(today, today), 10)
+        self.assertEqual(policy.ttl_for(today + timedelta(days=1), today), 100)
+
+
+class TestResponseCache(TestCase):
+    def test_lru_eviction(self):
+        backend = MemoryCacheBackend(max_entries=2)
+        backend.set("a", "1", None)
+        backend.set("b", "2", None)
+        backend.get("a")
+        backend.set("c", "3", None)
+        self.assertIsNotNone(backend.get("a"))
+        self.assertIsNone(backend.get("b"))
+
+    def test_expiry_and_stats(self):
+        clock = FakeClock()
+        cache = ResponseCache(policy=TtlPolicy(future=60), clock=clock)
+        tomorrow = date.today() + timedelta(days=1)
+
+        self.assertIsNone(cache.get(REQUEST))
+        cache.set(REQUEST, tomorrow, "html")
+        self.assertEqual(cache.get(REQUEST), "html")
+
+        clock.now += 61
+        self.assertIsNone(cache.get(REQUEST))
+        self.assertEqual(cache.stats.hits, 1)
+        self.assertEqual(cache.stats.misses, 2)
+
+    def test_key_is_independent_of_order(self):
+        reordered = dict(reversed(list(REQUEST.items())))
+        self.assertEqual(
+            ResponseCache.key_for(REQUEST), ResponseCache.key_for(reordered)
+        )
+
+    def test_key_ignores_week_of_request(self):
+        next_week = {**REQUEST, "startThisWeek": "2024-05-27"}
+        self.assertEqual(
+            ResponseCache.key_for({**REQUEST, "startThisWeek": "2024-05-20"}),
+            ResponseCache.key_for(next_week),
+        )
+
+    def test_sqlite_is_bounded(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            disk = SqliteCacheBackend(Path(tmp) / "cache.sqlite", max_entries=3)
+            for i in range(5):
+                disk.set(str(i), "value", None)
+            disk.set("3", "replaced", None)
+
+            self.assertIsNone(disk.get("1"))
+            self.assertIsNotNone(disk.get("2"))
+            self.assertEqual(disk.get("3"), ("replaced", None))
+            self.assertIsNotNone(disk.get("4"))
+
+            # deleted rows leave gaps in the rowids
+            disk.delete("3")
+            disk.set("5", "value", None)
+            self.assertIsNotNone(disk.get("2"))
+            disk.set("6", "value", None)
+            self.assertIsNone(disk.get("2"))
+            self.assertIsNotNone(disk.get("4"))
+            disk.close()
+
+    def test_sqlite_tier_promotes_to_memory(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / "cache.sqlite"
+            disk = SqliteCacheBackend(db_path)
+            ResponseCache([disk]).set(REQUEST, date(2000, 1, 1), "persisted")
+            disk.close()
+
+            memory = MemoryCacheBackend()
+            disk = SqliteCacheBackend(db_path)
+            cache = ResponseCache([memory, disk])
+            self.assertEqual(cache.get(REQUEST), "persisted")
+            self.assertEqual(len(memory), 1)
+            disk.close()
+
+
+class TestCachedFetch(unittest.IsolatedAsyncioTestCase):
+    async def test_second_fetch_is_served_from_cache(self):
+        session = FakeSession("<div>plan</div>")
+        cache = ResponseCache()
+        plan_date = date.today()
+
+        first = await get_maxmanager_website(session, 1, plan_date, "de", cache=cache)
+        second = await get_maxmanager_website(session, 1, plan_date, "de", cache=cache)
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(session.requests), 1)
+        self.assertEqual(cache.stats.hits, 1)
+
+
+class TestParseCache(unittest.IsolatedAsyncioTestCase):
+    async def test_unchanged_source_is_not_parsed_again(self):
+        source = (Path(__file__).parent / "new-html" / "nutrition.html").read_text()
+        session = FakeSession(source)
+        parse_cache = ParseCache()
+        plan_date = date(2024, 5, 21)
+
+        first = await get_meals_for_date(
+            session, plan_date, Canteen.UL_UNI_Sued, "de", parse_cache=parse_cache
+        )
+        with mock.patch.object(HtmlMensaParser, "parse_plan") as parse_plan:
+            second = await get_meals_for_date(
+                session, plan_date, Canteen.UL_UNI_Sued, "de", parse_cache=parse_cache
+            )
+            parse_plan.assert_not_called()
+
+        self.assertListEqual(first, second)
+        self.assertEqual(parse_cache.stats.hits, 1)
+
+    async def test_changed_source_is_parsed(self):
+        session = FakeSession('<div class="nodata"></div>')
+        parse_cache = ParseCache()
+        plan_date = date(2024, 5, 21)
+
+        await get_meals_for_date(
+            session, plan_date, Canteen.UL_UNI_Sued, "de", parse_cache=parse_cache
+        )
+        session.text = (Path(__file__).parent / "new-html" / "bio.html").read_text()
+        meals = await get_meals_for_date(
+            session, plan_date, Canteen.UL_UNI_Sued, "de", parse_cache=parse_cache
+        )
+
+        self.assertNotEqual(meals, [])
+        self.assertEqual(parse_cache.stats.misses, 2)
+
+    async def test_parser_options_are_part_of_key(self):
+        source = (Path(__file__).parent / "new-html" / "nutrition.html").read_text()
+        session = FakeSession(source)
+        parse_cache = ParseCache()
+        plan_date = date(2024, 5, 21)
+
+        plain = await get_meals_for_date(
+            session, plan_date, Canteen.UL_UNI_Sued, "de", parse_cache=parse_cache
+        )
+        numeric = await get_meals_for_date(
+            session,
+            plan_date,
+            Canteen.UL_UNI_Sued,
+            "de",
+            parse_cache=parse_cache,
+            parser=HtmlMensaParser(numeric_values=True),
+        )
+
+        self.assertIsNone(plain[0].values)
+        self.assertIsNotNone(numeric[0].values)
+        self.assertEqual(parse_cache.stats.misses, 2)
+
+
+class TestExecutorParsing(unittest.IsolatedAsyncioTestCase):
+    async def test_parse_in_process_pool(self):
+        source = (Path(__file__).parent / "new-html" / "double.html").read_text()
+        plan_date = date(2023, 12, 19)
+        expected = HtmlMensaParser().parse_plan(source, plan_date, Canteen.UL_UNI_Sued)
+
+        with create_parse_executor(max_workers=1) as executor:
+            meals = await get_meals_for_date(
+                FakeSession(source),
+                plan_date,
+                Canteen.UL_UNI_Sued,
+                "de",
+                executor=executor,
+            )
+
+        self.assertListEqual(meals, expected)
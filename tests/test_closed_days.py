@@ -0,0 +1,173 @@
+import unittest
+from datetime import date, datetime
+from unittest import mock
+
+import aiohttp
+
+from uniulm_mensaparser.api import async_get_unformatted_plan
+from uniulm_mensaparser.cache import ClosedDays, TtlPolicy
+from uniulm_mensaparser.html_parser import HtmlMensaParser, is_closed_day
+from uniulm_mensaparser.mensaparser import get_meals_for_date_range
+from uniulm_mensaparser.models import Canteen
+from uniulm_mensaparser.scheduler import FetchScheduler
+from uniulm_mensaparser.transport import HttpTransport
+
+from .helpers import StandInServer, load_fixtures
+
+NODATA = '<div class="nodata">Keine Daten vorhanden</div>'
+
+# Christmas holidays
+HOLIDAYS = {date(2024, 12, 23), date(2024, 12, 24), date(2024, 12, 25)}
+
+# Requests for this day fail with a connection error
+FAILING_DAY = date(2024, 12, 18)
+
+
+class FailingTransport(HttpTransport):
+    async def post(self, session, url, data, timeout):
+        if date.fromisoformat(data["date"]) == FAILING_DAY:
+            raise aiohttp.ClientConnectionError("connection reset")
+        return await super().post(session, url, data, timeout)
+
+
+class TestClosedDays(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.closed_days = ClosedDays(
+            TtlPolicy(past=None, today=60, future=600),
+            clock=lambda: self.now,
+            today=lambda: date(2024, 12, 20),
+        )
+
+    def test_expiry(self):
+        canteen = Canteen.UL_UNI_Sued
+        for d in [date(2024, 12, 19), date(2024, 12, 20), date(2024, 12, 23)]:
+            self.closed_days.mark_closed(canteen, d)
+
+        self.now = 100
+        self.assertTrue(self.closed_days.is_closed(canteen, date(2024, 12, 19)))
+        self.assertFalse(self.closed_days.is_closed(canteen, date(2024, 12, 20)))
+        self.assertTrue(self.closed_days.is_closed(canteen, datetime(2024, 12, 23, 8)))
+        self.assertFalse(
+            self.closed_days.is_closed(Canteen.UL_UNI_West, date(2024, 12, 19))
+        )
+
+        self.now = 1000
+        self.assertFalse(self.closed_days.is_closed(canteen, date(2024, 12, 23)))
+        self.assertTrue(self.closed_days.is_closed(canteen, date(2024, 12, 19)))
+        self.assertListEqual(
+            self.closed_days.closed_dates(canteen), [date(2024, 12, 19)]
+        )
+
+    def test_mark_open(self):
+        self.closed_days.mark_closed(Canteen.UL_UNI_Sued, date(2024, 12, 19))
+        self.closed_days.mark_open(Canteen.UL_UNI_Sued, date(2024, 12, 19))
+        self.assertEqual(len(self.closed_days), 0)
+
+    def test_detect_closed_day(self):
+        fixtures = load_fixtures()
+        self.assertTrue(is_closed_day(NODATA))
+        self.assertTrue(is_closed_day("<div class='row nodata'></div>"))
+        self.assertFalse(any(is_closed_day(source) for source in fixtures.values()))
+        self.assertListEqual(
+            HtmlMensaParser().parse_plan(
+                NODATA, date(2024, 12, 23), Canteen.UL_UNI_Sued
+            ),
+            [],
+        )
+
+
+class TestDateRange(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        page = load_fixtures()["nutrition.html"]
+
+        def page_for(form):
+            if date.fromisoformat(form["date"]) in HOLIDAYS:
+                return NODATA
+            return page
+
+        self.server = await StandInServer(page_for).start()
+        self.requested = self.server.requests
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def test_closed_days_are_not_requested_again(self):
+        canteens = {Canteen.UL_UNI_Sued, Canteen.UL_UNI_West}
+        closed_days = ClosedDays(today=lambda: date(2025, 1, 10))
+        start, end = date(2024, 12, 16), date(2024, 12, 29)
+
+        plan = await get_meals_for_date_range(
+            canteens, start, end, closed_days=closed_days
+        )
+
+        self.assertEqual(len(self.requested), 20)
+        for canteen in canteens:
+            self.assertEqual(len(plan[canteen]), 10)
+            self.assertListEqual(
+                sorted(d for d, meals in plan[canteen].items() if not meals),
+                sorted(HOLIDAYS),
+            )
+            self.assertListEqual(closed_days.closed_dates(canteen), sorted(HOLIDAYS))
+
+        self.requested.clear()
+        again = await get_meals_for_date_range(
+            canteens, start, end, closed_days=closed_days
+        )
+
+        self.assertEqual(len(self.requested), 14)
+        self.assertFalse(
+            any(date.fromisoformat(r["date"]) in HOLIDAYS for r in self.requested)
+        )
+        self.assertDictEqual(again, plan)
+
+    async def test_failed_days_are_reported(self):
+        failed_days = []
+        plan = await get_meals_for_date_range(
+            {Canteen.UL_UNI_Sued},
+            date(2024, 12, 16),
+            date(2024, 12, 20),
+            scheduler=FetchScheduler(retries=0, transport=FailingTransport()),
+            failed_days=failed_days,
+        )
+
+        self.assertListEqual(failed_days, [(Canteen.UL_UNI_Sued, FAILING_DAY)])
+        self.assertNotIn(FAILING_DAY, plan[Canteen.UL_UNI_Sued])
+        self.assertEqual(len(plan[Canteen.UL_UNI_Sued]), 4)
+
+    async def test_other_errors_are_raised(self):
+        parser = HtmlMensaParser()
+        parser.parse_plan = mock.Mock(side_effect=AttributeError)
+        failed_days = []
+        with self.assertRaises(AttributeError):
+            await get_meals_for_date_range(
+                {Canteen.UL_UNI_Sued},
+                date(2024, 12, 16),
+                date(2024, 12, 20),
+                parser=parser,
+                failed_days=failed_days,
+            )
+        self.assertListEqual(failed_days, [])
+
+    async def test_plan_skips_closed_days(self):
+        canteen = Canteen.UL_UNI_Sued
+        await async_get_unformatted_plan({canteen})
+        days = sorted({date.fromisoformat(r["date"]) for r in self.requested})
+
+        closed_days = ClosedDays()
+        closed_days.mark_closed(canteen, days[0])
+        self.requested.clear()
+        await async_get_unformatted_plan({canteen}, closed_days=closed_days)
+
+        requested = sorted({date.fromisoformat(r["date"]) for r in self.requested})
+        self.assertListEqual(requested, days[1:])
+
+    async def test_invalid_range(self):
+        with self.assertRaises(ValueError):
+            await get_meals_for_date_range(
+                {Canteen.UL_UNI_Sued}, date(2024, 12, 20), date(2024, 12, 19)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import copy
+import unittest
+from datetime import date, datetime
+from pathlib import Path
+from unittest import TestCase
+
+from uniulm_mensaparser.diff import (
+    ADDED,
+    CHANGED,
+    REMOVED,
+    PlanChangeNotifier,
+    diff_plans,
+    meal_keys,
+)
+from uniulm_mensaparser.html_parser import HtmlMensaParser
+from uniulm_mensaparser.mensaparser import get_meals_for_canteens
+from uniulm_mensaparser.models import Canteen, Meal
+
+from .helpers import StandInServer
+
+
+class TestDiffPlans(TestCase):
+    def setUp(self):
+        source = (Path(__file__).parent / "new-html" / "nutrition.html").read_text()
+        self.day = date(2024, 5, 21)
+        meals = HtmlMensaParser().parse_plan(
+            source, datetime(2024, 5, 21), Canteen.UL_UNI_Sued
+        )
+        self.old = {Canteen.UL_UNI_Sued: {self.day: meals}}
+        self.new = copy.deepcopy(self.old)
+
+    def test_equal_plans(self):
+        diff = diff_plans(self.old, self.new)
+        self.assertFalse(diff)
+        self.assertListEqual(diff.dropped_days, [])
+
+    def test_field_changes(self):
+        meal = self.new[Canteen.UL_UNI_Sued][self.day][0]
+        old_price = meal.price_students
+        meal.price_students = "9,99 €"
+        meal.allergy_ids = meal.allergy_ids | {"99"}
+        meal.nutrition.salt = "1g"
+
+        diff = diff_plans(self.old, self.new)
+
+        self.assertEqual(len(diff.changes), 1)
+        change = diff.changed[0]
+        self.assertEqual(change.key, (meal.category, meal.name, 0))
+        self.assertEqual(change.fields["price_students"], (old_price, "9,99 €"))
+        self.assertIn("allergy_ids", change.fields)
+        self.assertEqual(change.fields["nutrition.salt"][1], "1g")
+
+    def test_added_and_removed(self):
+        meals = self.new[Canteen.UL_UNI_Sued][self.day]
+        removed = meals.pop(0)
+        meals.append(Meal(name="Neues Gericht", category="Aktion"))
+
+        diff = diff_plans(self.old, self.new)
+
+        self.assertListEqual([c.kind for c in diff.changes], [ADDED, REMOVED])
+        self.assertEqual(diff.removed[0].old, removed)
+        self.assertEqual(diff.added[0].new.name, "Neues Gericht")
+
+    def test_new_and_dropped_days(self):
+        next_day = date(2024, 5, 22)
+        self.new[Canteen.UL_UNI_Sued] = {
+            next_day: self.new[Canteen.UL_UNI_Sued][self.day]
+        }
+
+        diff = diff_plans(self.old, self.new)
+
+        self.assertTrue(all(c.kind == ADDED for c in diff.changes))
+        self.assertEqual(
+            len(diff.changes), len(self.old[Canteen.UL_UNI_Sued][self.day])
+        )
+        self.assertListEqual(diff.dropped_days, [(Canteen.UL_UNI_Sued, self.day)])
+
+    def test_duplicate_names_keep_distinct_keys(self):
+        meals = [Meal(name="Salat", category="Salat")] * 2
+        self.assertListEqual(
+            list(meal_keys(meals)), [("Salat", "Salat", 0), ("Salat", "Salat", 1)]
+        )
+
+
+class TestDiffFetchedPlans(unittest.IsolatedAsyncioTestCase):
+    async def test_refetched_plan_is_unchanged(self):
+        canteens = {Canteen.UL_UNI_Sued}
+        async with StandInServer():
+            old = await get_meals_for_canteens(canteens, "de")
+            new = await get_meals_for_canteens(canteens, "de")
+
+        # the keys contain the time of the call
+        self.assertNotEqual(
+            set(old[Canteen.UL_UNI_Sued]), set(new[Canteen.UL_UNI_Sued])
+        )
+        diff = diff_plans(old, new)
+        self.assertFalse(diff)
+        self.assertListEqual(diff.dropped_days, [])
+
+
+class TestPlanChangeNotifier(TestCase):
+    def test_notifies_only_on_changes(self):
+        day = date(2024, 5, 21)
+        received = []
+        notifier = PlanChangeNotifier()
+        notifier.subscribe(received.append)
+
+        plan = {Canteen.UL_UNI_West: {day: [Meal(name="Pizza", price_students="3")]}}
+        notifier.update(plan)
+        notifier.update(copy.deepcopy(plan))
+        changed = copy.deepcopy(plan)
+        changed[Canteen.UL_UNI_West][day][0].price_students = "4"
+        notifier.update(changed)
+
+        self.assertEqual(len(received), 2)
+        self.assertEqual(received[0].changes[0].kind, ADDED)
+        self.assertEqual(received[1].changes[0].kind, CHANGED)
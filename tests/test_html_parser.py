@@ -1,9 +1,17 @@
 from datetime import datetime
 from pathlib import Path
-from unittest import TestCase
+from unittest import TestCase, mock, skipUnless
 
 from uniulm_mensaparser.html_parser import HtmlMensaParser
-from uniulm_mensaparser.models import Canteen, Meal, MealType
+from uniulm_mensaparser.lxml_parser import LXML_AVAILABLE
+from uniulm_mensaparser.models import (
+    Canteen,
+    Meal,
+    MealInterner,
+    MealType,
+)
+
+from .helpers import repeated_day_page
 
 
 class TestHtmlParser(TestCase):
@@ -31,3 +39,104 @@ class TestHtmlParser(TestCase):
             )
             meal: Meal = next(filter(lambda p: p.category == "Extra", plan))
             self.assertEqual(meal.name, "1 Wienerle")
+
+    def test_large_page(self):
+        source = (self.test_data_dir / "nutrition.html").read_text()
+        parser = HtmlMensaParser()
+        small = parser.parse_plan(source, datetime(2024, 5, 21), Canteen.UL_UNI_Sued)
+        large = parser.parse_plan(
+            repeated_day_page(source, 20), datetime(2024, 5, 21), Canteen.UL_UNI_Sued
+        )
+
+        self.assertEqual(len(large), 20 * len(small))
+        self.assertListEqual(large[: len(small)], small)
+
+    def test_meal_before_category(self):
+        source = "<div><div class='row splMeal'></div></div>"
+        with self.assertRaisesRegex(Exception, "invalid input"):
+            HtmlMensaParser().parse_plan(
+                source, datetime(2024, 5, 21), Canteen.UL_UNI_Sued
+            )
+
+
+class TestLxmlBackend(TestCase):
+    def setUp(self):
+        self.test_data_dir = Path(__file__).parent / "new-html"
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            HtmlMensaParser(backend="html5lib")
+
+    def test_fallback_without_lxml(self):
+        with mock.patch("uniulm_mensaparser.lxml_parser.LXML_AVAILABLE", False):
+            self.assertEqual(HtmlMensaParser(backend="lxml").backend, "bs4")
+
+    @skipUnless(LXML_AVAILABLE, "lxml is not installed")
+    def test_equivalent_to_bs4(self):
+        bs4_parser = HtmlMensaParser(backend="bs4")
+        lxml_parser = HtmlMensaParser(backend="lxml")
+        self.assertEqual(lxml_parser.backend, "lxml")
+
+        for fixture in sorted(self.test_data_dir.glob("*.html")):
+            with self.subTest(fixture=fixture.name):
+                source = fixture.read_text()
+                expected = bs4_parser.parse_plan(
+                    source, datetime(2024, 5, 21), Canteen.UL_UNI_Sued
+                )
+                actual = lxml_parser.parse_plan(
+                    source, datetime(2024, 5, 21), Canteen.UL_UNI_Sued
+                )
+                self.assertNotEqual(expected, [])
+                self.assertListEqual(actual, expected)
+
+    @skipUnless(LXML_AVAILABLE, "lxml is not installed")
+    def test_no_data(self):
+        parser = HtmlMensaParser(backend="lxml")
+        for source in ["", '<div class="nodata">Keine Daten</div>']:
+            self.assertListEqual(
+                parser.parse_plan(source, datetime(2024, 5, 21), Canteen.UL_UNI_Sued),
+                [],
+            )
+
+
+class TestParseMany(TestCase):
+    def setUp(self):
+        test_data_dir = Path(__file__).parent / "new-html"
+        self.sources = [f.read_text() for f in sorted(test_data_dir.glob("*.html"))]
+
+    def test_equal_to_parse_plan(self):
+        parser = HtmlMensaParser(numeric_values=True)
+        pages = [
+            (source, datetime(2024, 5, 20 + i), Canteen.UL_UNI_Sued)
+            for i, source in enumerate(self.sources)
+        ]
+
+        self.assertListEqual(
+            parser.parse_many(pages), [parser.parse_plan(*page) for page in pages]
+        )
+
+    def test_values_are_shared(self):
+        source = self.sources[0]
+        pages = [
+            (source, datetime(2024, 5, 21), Canteen.UL_UNI_Sued),
+            (source, datetime(2024, 5, 22), Canteen.UL_UNI_West),
+        ]
+        first, second = HtmlMensaParser().parse_many(pages)
+
+        for a, b in zip(first, second):
+            self.assertIs(a.category, b.category)
+            self.assertIs(a.price_students, b.price_students)
+            self.assertIs(a.allergy_ids, b.allergy_ids)
+            self.assertIs(a.nutrition, b.nutrition)
+            self.assertIs(a.types, b.types)
+        self.assertIsNot(first[0].date, second[0].date)
+
+    def test_parser_interner(self):
+        interner = MealInterner()
+        parser = HtmlMensaParser(interner=interner)
+        plan_date = datetime(2024, 5, 21)
+        first = parser.parse_plan(self.sources[0], plan_date, Canteen.UL_UNI_Sued)
+        second = parser.parse_many([(self.sources[0], plan_date, Canteen.UL_UNI_Sued)])
+
+        self.assertIs(first[0].nutrition, second[0][0].nutrition)
+        self.assertGreater(len(interner), 0)
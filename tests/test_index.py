@@ -0,0 +1,95 @@
+from datetime import date, datetime
+from pathlib import Path
+from unittest import TestCase
+
+from uniulm_mensaparser.html_parser import HtmlMensaParser
+from uniulm_mensaparser.index import (
+    PlanIndex,
+    allergen,
+    between,
+    canteen,
+    category,
+    meal_type,
+    on,
+    where,
+)
+from uniulm_mensaparser.models import Canteen, Meal, MealType
+
+
+class TestPlanIndex(TestCase):
+    def setUp(self):
+        parser = HtmlMensaParser()
+        fixtures = Path(__file__).parent / "new-html"
+        self.monday = date(2024, 5, 20)
+        self.tuesday = date(2024, 5, 21)
+        self.plan = {}
+        for c, fixture in [
+            (Canteen.UL_UNI_Sued, "bio.html"),
+            (Canteen.UL_UNI_West, "double.html"),
+        ]:
+            source = (fixtures / fixture).read_text()
+            self.plan[c] = {
+                d: parser.parse_plan(source, d, c) for d in (self.monday, self.tuesday)
+            }
+        self.index = PlanIndex(self.plan)
+
+    def all_meals(self):
+        return [
+            m for days in self.plan.values() for meals in days.values() for m in meals
+        ]
+
+    def test_query_matches_scan(self):
+        meal_filter = (
+            meal_type(MealType.VEGAN, MealType.VEGETARIAN)
+            & canteen(Canteen.UL_UNI_Sued)
+            & ~allergen("26")
+            & on(self.tuesday)
+        )
+        expected = [
+            m
+            for m in self.plan[Canteen.UL_UNI_Sued][self.tuesday]
+            if {MealType.VEGAN, MealType.VEGETARIAN} & set(m.types)
+            and "26" not in m.allergy_ids
+        ]
+
+        self.assertTrue(expected)
+        self.assertListEqual(self.index.query(meal_filter), expected)
+
+    def test_or_and_between(self):
+        first_category = self.plan[Canteen.UL_UNI_West][self.monday][0].category
+        meals = self.index.query(
+            (category(first_category) | meal_type(MealType.BIO))
+            & between(datetime(2024, 5, 19), datetime(2024, 5, 20))
+        )
+        self.assertTrue(meals)
+        self.assertTrue(all(m.date == "2024-05-20" for m in meals))
+        self.assertTrue(
+            all(m.category == first_category or MealType.BIO in m.types for m in meals)
+        )
+
+    def test_where_and_query_plan(self):
+        plan = self.index.query_plan(
+            canteen(Canteen.UL_UNI_West) & where(lambda m: m.co2 != "")
+        )
+        self.assertListEqual(list(plan), [Canteen.UL_UNI_West])
+        self.assertListEqual(
+            list(plan[Canteen.UL_UNI_West]), [self.monday, self.tuesday]
+        )
+
+    def test_incremental_update(self):
+        self.assertEqual(self.index.update(self.plan), 0)
+
+        self.plan[Canteen.UL_UNI_Sued][self.tuesday] = [
+            Meal(name="Tofu", category="Aktion", types=[MealType.VEGAN])
+        ]
+        del self.plan[Canteen.UL_UNI_West][self.monday]
+
+        self.assertEqual(self.index.update(self.plan), 2)
+        self.assertEqual(len(self.index), len(self.all_meals()))
+        vegan_tuesday = self.index.query(
+            meal_type(MealType.VEGAN) & canteen(Canteen.UL_UNI_Sued) & on(self.tuesday)
+        )
+        self.assertListEqual([m.name for m in vegan_tuesday], ["Tofu"])
+        self.assertListEqual(
+            self.index.query(on(self.monday) & canteen(Canteen.UL_UNI_West)), []
+        )
@@ -0,0 +1,85 @@
+import unittest
+
+from uniulm_mensaparser import api
+from uniulm_mensaparser.cache import ParseCache, ResponseCache
+from uniulm_mensaparser.html_parser import HtmlMensaParser
+from uniulm_mensaparser.instrumentation import (
+    FETCH,
+    FORMAT,
+    PARSE,
+    PARSE_CATEGORIES,
+    PARSE_DOCUMENT,
+    CallbackTracer,
+    RecordingTracer,
+    get_tracer,
+    use_tracer,
+)
+from uniulm_mensaparser.models import Canteen
+
+from .helpers import StandInServer
+
+
+class TestInstrumentation(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = await StandInServer().start()
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def test_records_stages(self):
+        tracer = RecordingTracer()
+        with use_tracer(tracer):
+            await api.async_get_plan({Canteen.UL_UNI_Sued})
+
+        summary = tracer.summary()
+        self.assertEqual(summary[FETCH].count, 10)
+        self.assertGreater(summary[FETCH].totals["bytes"], 0)
+        self.assertEqual(summary[PARSE].count, 10)
+        self.assertEqual(summary[PARSE_DOCUMENT].count, 10)
+        self.assertEqual(summary[PARSE_CATEGORIES].count, 10)
+        self.assertEqual(summary[FORMAT].count, 1)
+        self.assertEqual(
+            summary[FORMAT].totals["meals"], summary[PARSE].totals["meals"]
+        )
+
+        fetch = next(e for e in tracer.events if e.stage == FETCH)
+        self.assertEqual(fetch.attributes["canteen"], "UL_UNI_Sued")
+        self.assertEqual(fetch.attributes["language"], "de")
+        self.assertEqual(fetch.attributes["status"], 200)
+        self.assertIn("date", fetch.attributes)
+
+    async def test_cache_hits(self):
+        cache = ResponseCache()
+        parse_cache = ParseCache()
+        parser = HtmlMensaParser(backend="lxml")
+        await api.async_get_unformatted_plan(
+            {Canteen.UL_UNI_West},
+            "de",
+            cache=cache,
+            parse_cache=parse_cache,
+            parser=parser,
+        )
+
+        events = []
+        with use_tracer(CallbackTracer(events.append)):
+            await api.async_get_unformatted_plan(
+                {Canteen.UL_UNI_West},
+                "de",
+                cache=cache,
+                parse_cache=parse_cache,
+                parser=parser,
+            )
+
+        fetches = [e for e in events if e.stage == FETCH]
+        self.assertEqual(len(fetches), 10)
+        self.assertTrue(all(e.attributes["cache_hit"] for e in fetches))
+        self.assertTrue(all(e.attributes["bytes"] == 0 for e in fetches))
+        parses = [e for e in events if e.stage == PARSE]
+        self.assertTrue(all(e.attributes["cache_hit"] for e in parses))
+
+    async def test_noop_by_default(self):
+        self.assertFalse(get_tracer().enabled)
+        tracer = RecordingTracer()
+        with use_tracer(tracer):
+            self.assertIs(get_tracer(), tracer)
+        self.assertFalse(get_tracer().enabled)
@@ -0,0 +1,63 @@
+import pickle
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+from unittest import TestCase
+
+from uniulm_mensaparser.html_parser import HtmlMensaParser
+from uniulm_mensaparser.models import (
+    Canteen,
+    CompactMeal,
+    FrozenCompactMeal,
+    MealType,
+    compact_plan,
+    meal_types_from_flags,
+    meal_types_to_flags,
+)
+
+
+class TestCompactMeal(TestCase):
+    def setUp(self):
+        source = (Path(__file__).parent / "new-html" / "nutrition.html").read_text()
+        self.meals = HtmlMensaParser().parse_plan(
+            source, datetime(2024, 5, 21), Canteen.UL_UNI_Sued
+        )
+
+    def test_round_trip(self):
+        for meal in self.meals:
+            compact = CompactMeal.from_meal(meal)
+            self.assertEqual(compact.name, meal.name)
+            self.assertEqual(compact.nutrition.calories, meal.nutrition.calories)
+            # meal types are returned in the order of MealType
+            canonical_types = meal_types_from_flags(meal_types_to_flags(meal.types))
+            self.assertEqual(compact.to_meal(), replace(meal, types=canonical_types))
+
+    def test_no_instance_dict(self):
+        self.assertFalse(hasattr(CompactMeal.from_meal(self.meals[0]), "__dict__"))
+
+    def test_type_flags(self):
+        types = [MealType.VEGAN, MealType.BIO]
+        self.assertListEqual(meal_types_from_flags(meal_types_to_flags(types)), types)
+
+        compact = CompactMeal(types=[MealType.FISH, MealType.POULTRY])
+        self.assertListEqual(compact.types, [MealType.POULTRY, MealType.FISH])
+        compact.types = [MealType.PORK]
+        self.assertListEqual(compact.types, [MealType.PORK])
+
+    def test_allergy_ids_are_shared(self):
+        first = CompactMeal(allergy_ids={"26", "34W"})
+        second = CompactMeal(allergy_ids=["34W", "26"])
+        self.assertIs(first.allergy_ids, second.allergy_ids)
+
+    def test_frozen(self):
+        frozen = FrozenCompactMeal.from_meal(self.meals[0])
+        with self.assertRaises(AttributeError):
+            frozen.name = "changed"
+        self.assertEqual(hash(frozen), hash(FrozenCompactMeal.from_meal(self.meals[0])))
+        self.assertEqual(pickle.loads(pickle.dumps(frozen)), frozen)
+
+    def test_compact_plan(self):
+        plan = {Canteen.UL_UNI_Sued: {datetime(2024, 5, 21): self.meals}}
+        compacted = compact_plan(plan, frozen=True)
+        meals = compacted[Canteen.UL_UNI_Sued][datetime(2024, 5, 21)]
+        self.assertTrue(all(isinstance(m, FrozenCompactMeal) for m in meals))
@@ -0,0 +1,116 @@
+import unittest
+from datetime import date
+from unittest import mock
+
+from uniulm_mensaparser.models import Canteen, Meal
+from uniulm_mensaparser.refresh import RefreshPlanner, RefreshPolicy
+from uniulm_mensaparser.scheduler import FetchScheduler
+
+from .helpers import StandInServer
+
+WEDNESDAY = date(2024, 5, 22)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestRefreshPlanner(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.planner = RefreshPlanner(
+            [Canteen.UL_UNI_Sued],
+            policy=RefreshPolicy(near_days=2, near_interval=60, far_interval=600),
+            clock=self.clock,
+            today=lambda: WEDNESDAY,
+        )
+        self.fetched = []
+
+        async def fake_get_meals_for_date(session, plan_date, canteen, *args, **kwargs):
+            self.fetched.append(plan_date)
+            return [Meal(name=f"meal {plan_date}", canteen=canteen)]
+
+        patcher = mock.patch(
+            "uniulm_mensaparser.refresh.get_meals_for_date", fake_get_meals_for_date
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_first_refresh_fetches_all_days_by_priority(self):
+        plan = await self.planner.refresh(session=mock.Mock())
+
+        self.assertEqual(len(plan[Canteen.UL_UNI_Sued]), 10)
+        self.assertListEqual(self.fetched[:2], [WEDNESDAY, date(2024, 5, 23)])
+        self.assertListEqual(self.fetched[-2:], [date(2024, 5, 20), date(2024, 5, 21)])
+
+    async def test_only_due_days_are_fetched_again(self):
+        await self.planner.refresh(session=mock.Mock())
+
+        self.fetched.clear()
+        self.clock.now += 61
+        await self.planner.refresh(session=mock.Mock())
+        self.assertListEqual(self.fetched, [WEDNESDAY, date(2024, 5, 23)])
+
+        self.fetched.clear()
+        self.clock.now += 600
+        await self.planner.refresh(session=mock.Mock())
+        self.assertNotIn(date(2024, 5, 20), self.fetched)
+        self.assertIn(date(2024, 5, 31), self.fetched)
+
+    async def test_failed_days_keep_previous_meals(self):
+        await self.planner.refresh(session=mock.Mock())
+        previous = self.planner.plan[Canteen.UL_UNI_Sued][WEDNESDAY]
+
+        async def failing(*args, **kwargs):
+            raise TimeoutError()
+
+        self.clock.now += 61
+        with mock.patch("uniulm_mensaparser.refresh.get_meals_for_date", failing):
+            plan = await self.planner.refresh(session=mock.Mock())
+
+        self.assertIs(plan[Canteen.UL_UNI_Sued][WEDNESDAY], previous)
+        self.assertIn((Canteen.UL_UNI_Sued, WEDNESDAY), self.planner.failed_days)
+
+
+class TestRefreshUpstreamErrors(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.clock = FakeClock()
+        self.planner = RefreshPlanner(
+            [Canteen.UL_UNI_Sued],
+            policy=RefreshPolicy(near_days=2, near_interval=60, far_interval=600),
+            clock=self.clock,
+            today=lambda: WEDNESDAY,
+        )
+        self.server = await StandInServer().start()
+        await self.planner.refresh()
+        self.previous = dict(self.planner.plan[Canteen.UL_UNI_Sued])
+        self.clock.now += 61
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    def assert_near_days_failed(self, plan):
+        near_days = [WEDNESDAY, date(2024, 5, 23)]
+        self.assertListEqual(
+            self.planner.failed_days,
+            [(Canteen.UL_UNI_Sued, d) for d in near_days],
+        )
+        for d in near_days:
+            self.assertTrue(self.previous[d])
+            self.assertIs(plan[Canteen.UL_UNI_Sued][d], self.previous[d])
+
+    async def test_error_response_keeps_previous_meals(self):
+        self.server.status = 503
+        plan = await self.planner.refresh(scheduler=FetchScheduler(retries=0))
+        self.assert_near_days_failed(plan)
+
+    async def test_timeout_keeps_previous_meals(self):
+        self.server.latency = 0.5
+        plan = await self.planner.refresh(
+            scheduler=FetchScheduler(timeout=0.05, retries=0)
+        )
+        self.assert_near_days_failed(plan)
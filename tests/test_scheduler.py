@@ -0,0 +1,91 @@
+import asyncio
+import unittest
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from uniulm_mensaparser.scheduler import FetchScheduler, create_session
+
+
+class TestFetchScheduler(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.statuses = []
+        self.delay = 0.0
+        self.in_flight = 0
+        self.max_seen_in_flight = 0
+
+        async def handle(request: web.Request) -> web.Response:
+            self.in_flight += 1
+            self.max_seen_in_flight = max(self.max_seen_in_flight, self.in_flight)
+            try:
+                await asyncio.sleep(self.delay)
+                status = self.statuses.pop(0) if self.statuses else 200
+                return web.Response(text=f"status {status}", status=status)
+            finally:
+                self.in_flight -= 1
+
+        app = web.Application()
+        app.router.add_post("/", handle)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.url = str(self.server.make_url("/"))
+        self.session = create_session()
+
+    async def asyncTearDown(self):
+        await self.session.close()
+        await self.server.close()
+
+    async def test_retries_server_errors(self):
+        self.statuses = [503, 500]
+        scheduler = FetchScheduler(retries=3, backoff=0)
+
+        status, text = await scheduler.post(self.session, self.url, {})
+
+        self.assertEqual(status, 200)
+        self.assertEqual(text, "status 200")
+
+    async def test_raises_last_error_after_retries(self):
+        self.statuses = [503, 503, 503]
+        scheduler = FetchScheduler(retries=2, backoff=0)
+
+        with self.assertRaises(aiohttp.ClientResponseError) as cm:
+            await scheduler.post(self.session, self.url, {})
+
+        self.assertEqual(cm.exception.status, 503)
+        self.assertListEqual(self.statuses, [])
+
+    async def test_timeout_is_raised_after_retries(self):
+        self.delay = 0.5
+        scheduler = FetchScheduler(timeout=0.05, retries=1, backoff=0)
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await scheduler.post(self.session, self.url, {})
+
+    async def test_limits_requests_in_flight(self):
+        self.delay = 0.02
+        scheduler = FetchScheduler(max_in_flight=3)
+
+        await asyncio.gather(
+            *[scheduler.post(self.session, self.url, {}) for _ in range(12)]
+        )
+
+        self.assertEqual(self.max_seen_in_flight, 3)
+
+    def test_retry_delay_is_capped(self):
+        scheduler = FetchScheduler(backoff=1, max_backoff=5)
+        self.assertListEqual(
+            [scheduler.retry_delay(i) for i in range(5)], [1, 2, 4, 5, 5]
+        )
+
+    def test_invalid_limit(self):
+        with self.assertRaises(ValueError):
+            FetchScheduler(max_in_flight=0)
+
+
+class TestCreateSession(unittest.IsolatedAsyncioTestCase):
+    async def test_connector_limits(self):
+        async with create_session(limit=4, limit_per_host=2) as session:
+            self.assertIsInstance(session.connector, aiohttp.TCPConnector)
+            self.assertEqual(session.connector.limit, 4)
+            self.assertEqual(session.connector.limit_per_host, 2)
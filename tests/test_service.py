@@ -0,0 +1,108 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from uniulm_mensaparser.__main__ import main
+from uniulm_mensaparser.models import Canteen
+from uniulm_mensaparser.refresh import RefreshPolicy
+from uniulm_mensaparser.service import PlanService, create_app
+
+from .helpers import StandInServer
+
+
+class TestPlanService(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = await StandInServer().start()
+        # today and the next day are due on every refresh
+        self.service = PlanService(
+            {Canteen.UL_UNI_Sued},
+            languages=["de"],
+            interval=3600,
+            policy=RefreshPolicy(near_interval=0),
+        )
+        self.client = TestClient(TestServer(create_app(self.service)))
+        await self.client.start_server()
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.server.close()
+
+    async def test_serves_stale_plan_while_refreshing(self):
+        response = await self.client.get("/plan")
+        self.assertEqual(response.status, 503)
+
+        await self.service.refresh()
+        response = await self.client.get("/plan")
+        self.assertEqual(response.status, 200)
+        first = await response.json()
+        self.assertListEqual(list(first), ["ul_uni_sued"])
+        self.assertEqual(len(first["ul_uni_sued"]), 10)
+
+        # hold back the upstream responses of the next refresh
+        self.server.release.clear()
+        requests = len(self.server.requests)
+        refresh = asyncio.create_task(self.service.refresh())
+        while len(self.server.requests) == requests:
+            await asyncio.sleep(0.01)
+
+        response = await self.client.get("/plan/ul_uni_sued")
+        self.assertEqual(await response.json(), first)
+        status = await (await self.client.get("/status")).json()
+        self.assertTrue(status["refreshing"])
+        self.assertFalse(refresh.done())
+
+        self.server.release.set()
+        await refresh
+
+        self.assertFalse(self.service.refreshing)
+
+    async def test_etag_and_unknown_routes(self):
+        await self.service.refresh()
+        response = await self.client.get("/plan?language=de")
+        etag = response.headers["ETag"]
+
+        response = await self.client.get("/plan", headers={"If-None-Match": etag})
+        self.assertEqual(response.status, 304)
+        self.assertEqual((await self.client.get("/plan?language=fr")).status, 404)
+        self.assertEqual((await self.client.get("/plan/ul_uni_west")).status, 404)
+
+        status = await (await self.client.get("/status")).json()
+        self.assertListEqual(list(status["languages"]), ["de"])
+        self.assertListEqual(status["languages"]["de"]["failed_days"], [])
+
+
+class TestPlanServiceLanguages(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = await StandInServer().start()
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def test_languages_do_not_evict_encoded_days(self):
+        service = PlanService(
+            {Canteen.UL_UNI_Sued},
+            languages=["de", "en"],
+            policy=RefreshPolicy(near_interval=0),
+        )
+        for _ in range(3):
+            await service.refresh()
+        await service.stop()
+
+        for lang in ["de", "en"]:
+            # only the first refresh encodes the days, every later body and
+            # the body of the canteen reuse them
+            stats = service.status()["languages"][lang]["encoded_days"]
+            self.assertDictEqual(stats, {"hits": 50, "misses": 10})
+
+
+class TestMain(unittest.TestCase):
+    def test_serve_arguments(self):
+        with mock.patch("uniulm_mensaparser.__main__.serve") as serve:
+            main(["serve", "--port", "9000", "--canteen", "UL_UNI_West"])
+
+        service, host, port = serve.call_args.args
+        self.assertEqual(port, 9000)
+        self.assertListEqual(service.canteens, [Canteen.UL_UNI_West])
+        self.assertListEqual(service.languages, ["de", "en"])
@@ -0,0 +1,114 @@
+import asyncio
+import unittest
+
+from uniulm_mensaparser import api
+from uniulm_mensaparser.models import Canteen
+from uniulm_mensaparser.scheduler import SingleFlight, create_session
+from uniulm_mensaparser.studierendenwerk_scraper import get_maxmanager_website
+
+from .helpers import StandInServer, load_fixtures
+
+
+class TestSingleFlight(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_calls_share_result(self):
+        single_flight = SingleFlight()
+        calls = 0
+
+        async def call():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return calls
+
+        results = await asyncio.gather(
+            *[single_flight.do("key", call) for _ in range(5)]
+        )
+
+        self.assertListEqual(results, [1] * 5)
+        self.assertEqual(len(single_flight), 0)
+        self.assertEqual(await single_flight.do("key", call), 2)
+
+    async def test_cancelled_caller_does_not_cancel_call(self):
+        single_flight = SingleFlight()
+
+        async def call():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        first = asyncio.create_task(single_flight.do("key", call))
+        second = asyncio.create_task(single_flight.do("key", call))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        self.assertEqual(await second, "done")
+
+    async def test_call_is_cancelled_with_last_caller(self):
+        single_flight = SingleFlight()
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def call():
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        callers = [asyncio.create_task(single_flight.do("key", call)) for _ in range(2)]
+        await started.wait()
+        callers[0].cancel()
+        await asyncio.sleep(0)
+        self.assertFalse(cancelled.is_set())
+
+        callers[1].cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.wait_for(cancelled.wait(), 1)
+        self.assertEqual(len(single_flight), 0)
+
+
+class TestCoalescedFetch(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        page = load_fixtures()["bio.html"]
+        self.server = await StandInServer(lambda form: page, latency=0.05).start()
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def test_concurrent_plans_share_requests(self):
+        async with create_session() as session:
+            plans = await asyncio.gather(
+                *[
+                    api.async_get_unformatted_plan(
+                        {Canteen.UL_UNI_Sued}, session=session
+                    )
+                    for _ in range(3)
+                ]
+            )
+
+        self.assertEqual(len(self.server.requests), 10)
+        # plan dates contain the time of the call, compare the meals only
+        days = [list(plan[Canteen.UL_UNI_Sued].values()) for plan in plans]
+        self.assertEqual(days[0], days[2])
+
+    async def test_coalescing_can_be_disabled(self):
+        async with create_session() as session:
+            await asyncio.gather(
+                *[get_maxmanager_website(session, coalesce=False) for _ in range(3)]
+            )
+        self.assertEqual(len(self.server.requests), 3)
+
+    async def test_cancelled_caller_with_own_session(self):
+        async def fetch():
+            async with create_session() as session:
+                return await get_maxmanager_website(session)
+
+        first = asyncio.create_task(fetch())
+        second = asyncio.create_task(fetch())
+        while not self.server.requests:
+            await asyncio.sleep(0.01)
+        # closes the session of the first caller
+        first.cancel()
+
+        self.assertIn("splMeal", await second)
+        self.assertEqual(len(self.server.requests), 2)
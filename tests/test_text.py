@@ -0,0 +1,57 @@
+import random
+import re
+from unittest import TestCase
+
+from uniulm_mensaparser.text import (
+    build_meal_name,
+    extract_co2,
+    normalize_meal_name,
+    pretty_print_category,
+)
+
+
+def reference_meal_name(meal_name: str) -> str:
+    # the step by step normalization the single pass version has to match
+    meal_name = re.sub(r"\(.*?\)", "", meal_name)
+    meal_name = re.sub(r"\s+", r" ", meal_name)
+    meal_name = re.sub(r"- ([A-Z])", r"-\g<1>", meal_name)
+    meal_name = re.sub(r"- ([a-z])", r"\g<1>", meal_name)
+    meal_name = re.sub(r" ,", r",", meal_name)
+    meal_name = re.sub(r"(?<=,)(?=\S)", " ", meal_name)
+    meal_name = re.sub(r" , ", r" ", meal_name)
+    return meal_name.strip()
+
+
+class TestText(TestCase):
+    def test_build_meal_name(self):
+        lines = [
+            "Griechische Pfanne mit veganem Hack, Kritharaki, Hirtenkäse und",
+            "                    Joghurtdip ",
+            "(23,24,34W,34G)",
+            " Kartoffel- salat , mit Zwiebel- Lauch-Gemüse",
+        ]
+        self.assertEqual(
+            build_meal_name(lines),
+            "Griechische Pfanne mit veganem Hack, Kritharaki, Hirtenkäse und "
+            "Joghurtdip Kartoffelsalat, mit Zwiebel-Lauch-Gemüse",
+        )
+
+    def test_matches_reference(self):
+        alphabet = [" ", "  ", ",", "-", "a", "B", "ä", "(", ")", "\n", "\xa0", "1"]
+        rng = random.Random(0)
+        for _ in range(20000):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 14)))
+            self.assertEqual(
+                normalize_meal_name.__wrapped__(text), reference_meal_name(text), text
+            )
+
+    def test_pretty_print_category(self):
+        self.assertEqual(
+            pretty_print_category(" FLEISCH + fisch "), "Fleisch und Fisch"
+        )
+        self.assertEqual(pretty_print_category("pizza ii"), "Pizza II")
+
+    def test_extract_co2(self):
+        self.assertEqual(extract_co2("CO2 pro Portion 1.234 g"), "1.234 g")
+        self.assertEqual(extract_co2("12 g und 345 g"), "345 g")
+        self.assertEqual(extract_co2("keine Angabe"), "")
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import aiohttp
+
+from uniulm_mensaparser import studierendenwerk_scraper
+from uniulm_mensaparser.mensaparser import get_meals_for_canteens
+from uniulm_mensaparser.models import Canteen
+from uniulm_mensaparser.scheduler import FetchScheduler, create_session
+from uniulm_mensaparser.transport import (
+    MISSING_CYCLE,
+    RecordingTransport,
+    ReplayTransport,
+)
+
+from .helpers import StandInServer
+
+CANTEENS = {Canteen.UL_UNI_Sued, Canteen.UL_UNI_West}
+
+
+def write_recording(path: Path, records) -> None:
+    with path.open("w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+def recorded(loc_id: str, day: str, body: str, status: int = 200) -> dict:
+    return {
+        "request": {"locId": loc_id, "lang": "de", "date": day},
+        "status": status,
+        "body": body,
+        "latency": 0.0,
+    }
+
+
+class TestRecordReplay(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "recording.jsonl"
+
+    async def asyncTearDown(self):
+        self.tmp.cleanup()
+
+    async def test_replay_returns_recorded_plan(self):
+        async with StandInServer():
+            scheduler = FetchScheduler(transport=RecordingTransport(self.path))
+            live = await get_meals_for_canteens(CANTEENS, "de", scheduler=scheduler)
+
+        transport = ReplayTransport(self.path)
+        with mock.patch.object(
+            studierendenwerk_scraper, "MAXMANAGER_URL", "http://127.0.0.1:9/"
+        ):
+            replayed = await get_meals_for_canteens(
+                CANTEENS, "de", scheduler=FetchScheduler(transport=transport)
+            )
+
+        self.assertEqual(transport.requests, 20)
+        for canteen in CANTEENS:
+            self.assertListEqual(
+                list(replayed[canteen].values()), list(live[canteen].values())
+            )
+
+    async def test_missing_request(self):
+        write_recording(self.path, [recorded("1", "2024-05-20", "a")])
+        request = {"locId": "1", "lang": "de", "date": "2024-05-21"}
+
+        with self.assertRaises(KeyError):
+            ReplayTransport(self.path).find(request)
+        cycled = ReplayTransport(self.path, on_missing=MISSING_CYCLE)
+        self.assertEqual(cycled.find(request)["body"], "a")
+        with self.assertRaises(KeyError):
+            cycled.find({**request, "locId": "2"})
+
+    async def test_injected_errors_are_retried(self):
+        write_recording(self.path, [recorded("1", "2024-05-20", "a")])
+        request = {"locId": "1", "lang": "de", "date": "2024-05-20"}
+        transport = ReplayTransport(self.path, error_rate=0.5, seed=1)
+        scheduler = FetchScheduler(retries=10, backoff=0, transport=transport)
+
+        async with create_session() as session:
+            results = [await scheduler.post(session, "", request) for _ in range(10)]
+
+        self.assertListEqual(results, [(200, "a")] * 10)
+        self.assertGreater(transport.requests, 10)
+
+    async def test_latency_and_timeouts(self):
+        write_recording(self.path, [recorded("1", "2024-05-20", "a")])
+        request = {"locId": "1", "lang": "de", "date": "2024-05-20"}
+
+        async with create_session() as session:
+            slow = ReplayTransport(self.path, latency=0.05)
+            scheduler = FetchScheduler(max_in_flight=2, transport=slow)
+            start = asyncio.get_running_loop().time()
+            await asyncio.gather(
+                *[scheduler.post(session, "", request) for _ in range(4)]
+            )
+            # two rounds of two concurrent requests
+            self.assertGreaterEqual(asyncio.get_running_loop().time() - start, 0.1)
+
+            timing_out = ReplayTransport(self.path, timeout_rate=1.0)
+            scheduler = FetchScheduler(
+                timeout=0.01, retries=1, backoff=0, transport=timing_out
+            )
+            with self.assertRaises(asyncio.TimeoutError):
+                await scheduler.post(session, "", request)
+            self.assertEqual(timing_out.requests, 2)
+
+            # without a scheduler timeout, the request fails immediately
+            no_timeout = aiohttp.ClientTimeout(total=None)
+            start = asyncio.get_running_loop().time()
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    timing_out.post(session, "", request, no_timeout), 1
+                )
+            self.assertLess(asyncio.get_running_loop().time() - start, 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
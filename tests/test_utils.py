@@ -1,7 +1,10 @@
-from datetime import datetime
+from datetime import date, datetime
 from unittest import TestCase
 
-from uniulm_mensaparser.utils import get_weekdates_this_and_next_week
+from uniulm_mensaparser.utils import (
+    get_dates_in_range,
+    get_weekdates_this_and_next_week,
+)
 
 
 class TestUtils(TestCase):
@@ -24,3 +27,12 @@ class TestUtils(TestCase):
                 datetime(year=2024, month=12, day=27),
             ],
         )
+
+    def test_dates_in_range(self):
+        self.assertListEqual(
+            get_dates_in_range(datetime(2024, 12, 20, 12), date(2024, 12, 24)),
+            [date(2024, 12, 20), date(2024, 12, 23), date(2024, 12, 24)],
+        )
+        self.assertEqual(
+            len(get_dates_in_range(date(2024, 12, 20), date(2024, 12, 24), False)), 5
+        )
@@ -0,0 +1,63 @@
+from datetime import datetime
+from pathlib import Path
+from unittest import TestCase
+
+from uniulm_mensaparser.html_parser import PARSER_BACKENDS, HtmlMensaParser
+from uniulm_mensaparser.models import Canteen, CompactMeal
+from uniulm_mensaparser.values import parse_number, parse_price_cents
+
+
+class TestValues(TestCase):
+    def test_parse_price_cents(self):
+        self.assertEqual(parse_price_cents("3,50 €"), 350)
+        self.assertEqual(parse_price_cents("12,05 €"), 1205)
+        self.assertEqual(parse_price_cents("4 €"), 400)
+        self.assertIsNone(parse_price_cents("n/a"))
+        self.assertIsNone(parse_price_cents(""))
+
+    def test_parse_number(self):
+        self.assertEqual(parse_number("\xa0565,0 kcal"), 565.0)
+        self.assertEqual(parse_number("1.429 g"), 1429.0)
+        self.assertEqual(parse_number("1.234,5 g"), 1234.5)
+        self.assertEqual(parse_number("2.5 g"), 2.5)
+        self.assertEqual(parse_number(" 744 g"), 744.0)
+        self.assertIsNone(parse_number(""))
+
+    def test_parse_plan_with_numeric_values(self):
+        source = (Path(__file__).parent / "new-html" / "nutrition.html").read_text()
+        plan_date = datetime(2024, 5, 21)
+        meals = HtmlMensaParser(numeric_values=True).parse_plan(
+            source, plan_date, Canteen.UL_UNI_Sued
+        )
+
+        values = meals[0].values
+        self.assertEqual(values.price_students_cents, 360)
+        self.assertEqual(values.co2_grams, 744.0)
+        self.assertEqual(values.calories_kcal, 565.0)
+        self.assertEqual(values.fat_grams, 18.6)
+        self.assertEqual(values.saturated_fat_grams, 8.5)
+        self.assertEqual(values.carbohydrates_grams, 76.1)
+        self.assertEqual(values.sugar_grams, 12.0)
+        self.assertEqual(meals[0].nutrition.saturated_fat, "8,5 g")
+        self.assertEqual(meals[0].nutrition.sugar, "12,0 g")
+        self.assertEqual(values.salt_grams, 2.5)
+        self.assertEqual(CompactMeal.from_meal(meals[0]).values, values)
+
+        cheap = [
+            m
+            for m in meals
+            if m.values.price_students_cents < 400 and m.values.calories_kcal < 800
+        ]
+        self.assertIn(meals[0], cheap)
+
+        dot_decimals = source.replace("gesättigt 8,5 g", "gesättigt 8.5 g")
+        for backend in PARSER_BACKENDS:
+            dot_meals = HtmlMensaParser(backend=backend).parse_plan(
+                dot_decimals, plan_date, Canteen.UL_UNI_Sued
+            )
+            self.assertEqual(dot_meals[0].nutrition.saturated_fat, "8.5 g")
+
+        without_values = HtmlMensaParser().parse_plan(
+            source, plan_date, Canteen.UL_UNI_Sued
+        )
+        self.assertIsNone(without_values[0].values)
@@ -1,12 +1,41 @@
 # import for better usability of library
+from .adapter import JsonAdapter as JsonAdapter
 from .adapter import SimpleAdapter2 as SimpleAdapter2
+from .api import (
+    async_get_plan as async_get_plan,
+)
+from .api import (
+    async_get_plan_by_language as async_get_plan_by_language,
+)
+from .api import (
+    async_get_plan_by_languages as async_get_plan_by_languages,
+)
+from .api import (
+    async_get_plan_for_range as async_get_plan_for_range,
+)
+from .api import (
+    async_get_unformatted_plan as async_get_unformatted_plan,
+)
+from .api import (
+    async_iter_plan as async_iter_plan,
+)
 from .api import (
     get_plan as get_plan,
 )
 from .api import (
     get_plan_by_language as get_plan_by_language,
 )
+from .api import (
+    get_plan_by_languages as get_plan_by_languages,
+)
+from .api import (
+    get_plan_for_range as get_plan_for_range,
+)
 from .api import (
     get_unformatted_plan as get_unformatted_plan,
 )
+from .cache import ClosedDays as ClosedDays
+from .cache import ParseCache as ParseCache
+from .cache import ResponseCache as ResponseCache
 from .models import Canteen as Canteen
+from .scheduler import FetchScheduler as FetchScheduler
@@ -0,0 +1,89 @@
+import argparse
+import logging
+from pathlib import Path
+from typing import List, Optional
+
+from .html_parser import HtmlMensaParser
+from .models import Canteen
+from .refresh import RefreshPolicy
+from .scheduler import FetchScheduler
+from .service import PlanService, serve
+from .transport import MISSING_CYCLE, RecordingTransport, ReplayTransport
+
+"""
+Command line interface: python -m uniulm_mensaparser serve
+"""
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    arg_parser = argparse.ArgumentParser(prog="python -m uniulm_mensaparser")
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser(
+        "serve", help="keep the plan up to date and serve it over HTTP"
+    )
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8080)
+    serve_parser.add_argument(
+        "--canteen",
+        action="append",
+        choices=[c.name for c in Canteen if c != Canteen.NONE],
+        help="canteen of the plan, can be repeated. Defaults to Süd and West",
+    )
+    serve_parser.add_argument(
+        "--language",
+        action="append",
+        choices=["de", "en"],
+        help="language of the plan, can be repeated. Defaults to de and en",
+    )
+    serve_parser.add_argument(
+        "--interval", type=float, default=60, help="seconds between refreshes"
+    )
+    serve_parser.add_argument(
+        "--near-interval",
+        type=float,
+        default=15 * 60,
+        help="seconds after which today and the next day are fetched again",
+    )
+    serve_parser.add_argument(
+        "--far-interval",
+        type=float,
+        default=6 * 60 * 60,
+        help="seconds after which later days are fetched again",
+    )
+    serve_parser.add_argument("--backend", choices=["bs4", "lxml"], default="bs4")
+    transport_group = serve_parser.add_mutually_exclusive_group()
+    transport_group.add_argument(
+        "--record", type=Path, help="append all MaxManager responses to this file"
+    )
+    transport_group.add_argument(
+        "--replay",
+        type=Path,
+        help="answer requests from a recording instead of MaxManager",
+    )
+    args = arg_parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    canteens = None
+    if args.canteen:
+        canteens = {Canteen[name] for name in args.canteen}
+    transport = None
+    if args.record is not None:
+        transport = RecordingTransport(args.record)
+    elif args.replay is not None:
+        transport = ReplayTransport(args.replay, on_missing=MISSING_CYCLE)
+    service = PlanService(
+        canteens=canteens,
+        languages=args.language or ["de", "en"],
+        interval=args.interval,
+        policy=RefreshPolicy(
+            near_interval=args.near_interval, far_interval=args.far_interval
+        ),
+        parser=HtmlMensaParser(backend=args.backend),
+        scheduler=FetchScheduler(transport=transport),
+    )
+    serve(service, args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
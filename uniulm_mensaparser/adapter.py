@@ -1,8 +1,28 @@
+import json
 from abc import abstractmethod
+from datetime import date
+from typing import Any, List, Optional
 
-from .models import Meal, MultiCanteenPlan
+from .cache import SerializedDayCache
+from .models import Canteen, Meal, MultiCanteenPlan
 from .utils import date_format_iso
 
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:  # pragma: no cover - depends on installed packages
+    ORJSON_AVAILABLE = False
+
+
+def dumps(value: Any) -> bytes:
+    """
+    Encodes value as compact UTF-8 JSON, with orjson if it is installed.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
 
 # Strategy Pattern
 class PlanAdapter:
@@ -11,9 +31,20 @@ class PlanAdapter:
     """
 
     @abstractmethod
-    def convert_plans(self, plan: MultiCanteenPlan) -> dict:
+    def convert_plans(self, plan: MultiCanteenPlan) -> Any:
+        """
+        Returns the formatted plan, e.g. a dict for SimpleAdapter2 or JSON
+        bytes for JsonAdapter.
+        """
         pass
 
+    def convert_day(self, canteen: Canteen, meals_date: date, meals: List[Meal]) -> Any:
+        """
+        Converts the meals of a single day, used for streamed plans. By
+        default, the day is converted as a plan that only contains this day.
+        """
+        return self.convert_plans({canteen: {meals_date: meals}})
+
 
 class SimpleAdapter2(PlanAdapter):
     def convert_plans(self, plan: MultiCanteenPlan) -> dict:
@@ -34,27 +65,78 @@ class SimpleAdapter2(PlanAdapter):
 
     @staticmethod
     def _add_meal(result: dict, canteen_name: str, date: str, meal: Meal):
-        result[canteen_name][date].append(
-            {
-                "name": meal.name,
-                "category": meal.category,
-                "prices": {
-                    "students": meal.price_students,
-                    "employees": meal.price_employees,
-                    "others": meal.price_others,
-                },
-                "price_note": meal.price_note,
-                "types": meal.types,
-                "allergy": list(meal.allergy_ids),
-                "co2": meal.co2,
-                "nutrition": {
-                    "calories": meal.nutrition.calories,
-                    "protein": meal.nutrition.protein,
-                    "carbohydrates": meal.nutrition.carbohydrates,
-                    "sugar": meal.nutrition.sugar,
-                    "fat": meal.nutrition.fat,
-                    "saturated_fat": meal.nutrition.saturated_fat,
-                    "salt": meal.nutrition.salt,
-                },
-            }
-        )
+        result[canteen_name][date].append(SimpleAdapter2.meal_dict(meal))
+
+    @staticmethod
+    def meal_dict(meal: Meal) -> dict:
+        return {
+            "name": meal.name,
+            "category": meal.category,
+            "prices": {
+                "students": meal.price_students,
+                "employees": meal.price_employees,
+                "others": meal.price_others,
+            },
+            "price_note": meal.price_note,
+            "types": meal.types,
+            "allergy": list(meal.allergy_ids),
+            "co2": meal.co2,
+            "nutrition": {
+                "calories": meal.nutrition.calories,
+                "protein": meal.nutrition.protein,
+                "carbohydrates": meal.nutrition.carbohydrates,
+                "sugar": meal.nutrition.sugar,
+                "fat": meal.nutrition.fat,
+                "saturated_fat": meal.nutrition.saturated_fat,
+                "salt": meal.nutrition.salt,
+            },
+        }
+
+
+class JsonAdapter(PlanAdapter):
+    """
+    Serializes the plan in the format of SimpleAdapter2 directly to UTF-8
+    encoded JSON. Each day is encoded once from per-meal fragments, without
+    building the nested dict of the whole plan first. orjson is used if it is
+    installed.
+    Args:
+        cache: Optional cache for the encoded days, so unchanged days are not
+            encoded again. Days are cached by canteen and date, so plans of
+            different languages need separate caches.
+    """
+
+    def __init__(self, cache: Optional[SerializedDayCache] = None):
+        self.cache = cache
+
+    def convert_plans(self, plan: MultiCanteenPlan) -> bytes:
+        canteens = []
+        for canteen, daily_meal_dict in plan.items():
+            days = [
+                dumps(date_format_iso(meals_date))
+                + b":"
+                + self._encode_day(canteen, meals_date, meals)
+                for meals_date, meals in daily_meal_dict.items()
+            ]
+            canteens.append(
+                dumps(canteen.name.lower()) + b":{" + b",".join(days) + b"}"
+            )
+        return b"{" + b",".join(canteens) + b"}"
+
+    def _encode_day(self, canteen: Canteen, meals_date: date, meals: List[Meal]):
+        if self.cache is None:
+            return self.encode_meals(meals)
+
+        key = (canteen, date_format_iso(meals_date))
+        encoded = self.cache.get(key, meals)
+        if encoded is None:
+            encoded = self.encode_meals(meals)
+            self.cache.set(key, meals, encoded)
+        return encoded
+
+    @staticmethod
+    def encode_meals(meals: List[Meal]) -> bytes:
+        return b"[" + b",".join(JsonAdapter.encode_meal(m) for m in meals) + b"]"
+
+    @staticmethod
+    def encode_meal(meal: Meal) -> bytes:
+        return dumps(SimpleAdapter2.meal_dict(meal))
@@ -1,36 +1,96 @@
 import asyncio
-from typing import Optional, Set, Type
+from concurrent.futures import Executor
+from datetime import date
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+)
+
+import aiohttp
 
 from .adapter import PlanAdapter, SimpleAdapter2
-from .mensaparser import format_meals, get_meals_for_canteens
-from .models import Canteen, MultiCanteenPlan
+from .cache import ClosedDays, ParseCache, ResponseCache
+from .html_parser import HtmlMensaParser
+from .mensaparser import (
+    format_meal_stream,
+    format_meals,
+    get_meals_for_canteens,
+    get_meals_for_date_range,
+    get_meals_for_languages,
+    iter_meals_for_canteens,
+)
+from .models import Canteen, DayMeals, MultiCanteenPlan, MultiLanguagePlan
+from .scheduler import FetchScheduler
 
 """
 Library API
+
+The async functions can be awaited inside an already running event loop (e.g.
+in an aiohttp or FastAPI server) and accept an externally owned session. The
+sync functions run them in a new event loop.
 """
 
 
 def get_plan(
     canteens: Optional[Set[Canteen]] = None,
     adapter_class: Optional[Type[PlanAdapter]] = None,
-) -> dict:
+    *,
+    cache: Optional[ResponseCache] = None,
+    parse_cache: Optional[ParseCache] = None,
+    parser: Optional[HtmlMensaParser] = None,
+    scheduler: Optional[FetchScheduler] = None,
+    executor: Optional[Executor] = None,
+    closed_days: Optional[ClosedDays] = None,
+) -> Any:
     """
     Returns the Ulm University canteen plan for this and next week.
     Args:
         canteens: Selected canteens
         adapter_class: Formatter for plan output
+        cache: Optional cache for MaxManager responses
+        parse_cache: Optional cache for parsed meals of unchanged pages
+        parser: HTML parser, e.g. HtmlMensaParser(backend="lxml")
+        scheduler: Concurrency limit, timeouts and retries for requests
+        executor: Optional executor for parsing, e.g. create_parse_executor()
+        closed_days: Remembers days without a plan, so they are not requested
+            again by later calls
 
     Returns: Formatted canteen plan
 
     """
-    return get_plan_by_language("de", canteens, adapter_class)
+    return asyncio.run(
+        async_get_plan(
+            canteens,
+            adapter_class,
+            cache=cache,
+            parse_cache=parse_cache,
+            parser=parser,
+            scheduler=scheduler,
+            executor=executor,
+            closed_days=closed_days,
+        )
+    )
 
 
 def get_plan_by_language(
     language: str = "de",
     canteens: Optional[Set[Canteen]] = None,
     adapter_class: Optional[Type[PlanAdapter]] = None,
-) -> dict:
+    *,
+    cache: Optional[ResponseCache] = None,
+    parse_cache: Optional[ParseCache] = None,
+    parser: Optional[HtmlMensaParser] = None,
+    scheduler: Optional[FetchScheduler] = None,
+    executor: Optional[Executor] = None,
+    closed_days: Optional[ClosedDays] = None,
+) -> Any:
     """
     Returns the Ulm University canteen plan for this and next week in the
     given language.
@@ -38,14 +98,219 @@ def get_plan_by_language(
         language: Language of canteen plan, possible values: "de" | "en"
         canteens: Selected canteens
         adapter_class: Formatter for plan output
+        cache: Optional cache for MaxManager responses
+        parse_cache: Optional cache for parsed meals of unchanged pages
+        parser: HTML parser, e.g. HtmlMensaParser(backend="lxml")
+        scheduler: Concurrency limit, timeouts and retries for requests
+        executor: Optional executor for parsing, e.g. create_parse_executor()
+        closed_days: Remembers days without a plan, so they are not requested
+            again by later calls
 
     Returns: Formatted canteen plan in given langauge
 
     """
-    if canteens is None:
-        canteens = {Canteen.UL_UNI_Sued, Canteen.UL_UNI_West}
+    return asyncio.run(
+        async_get_plan_by_language(
+            language,
+            canteens,
+            adapter_class,
+            cache=cache,
+            parse_cache=parse_cache,
+            parser=parser,
+            scheduler=scheduler,
+            executor=executor,
+            closed_days=closed_days,
+        )
+    )
+
+
+def get_plan_by_languages(
+    languages: Optional[Iterable[str]] = None,
+    canteens: Optional[Set[Canteen]] = None,
+    adapter_class: Optional[Type[PlanAdapter]] = None,
+    *,
+    cache: Optional[ResponseCache] = None,
+    parse_cache: Optional[ParseCache] = None,
+    parser: Optional[HtmlMensaParser] = None,
+    scheduler: Optional[FetchScheduler] = None,
+    executor: Optional[Executor] = None,
+    closed_days: Optional[ClosedDays] = None,
+) -> Dict[str, Any]:
+    """
+    Returns the Ulm University canteen plan for this and next week in all
+    given languages. All plans are fetched concurrently through one session.
+    Args:
+        languages: Languages of canteen plan. Defaults to "de" and "en"
+        canteens: Selected canteens
+        adapter_class: Formatter for plan output
+        cache: Optional cache for MaxManager responses
+        parse_cache: Optional cache for parsed meals of unchanged pages
+        parser: HTML parser, e.g. HtmlMensaParser(backend="lxml")
+        scheduler: Concurrency limit, timeouts and retries for requests
+        executor: Optional executor for parsing, e.g. create_parse_executor()
+        closed_days: Remembers days without a plan, so they are not requested
+            again by later calls
+
+    Returns: Formatted canteen plan for each language
+
+    """
+    return asyncio.run(
+        async_get_plan_by_languages(
+            languages,
+            canteens,
+            adapter_class,
+            cache=cache,
+            parse_cache=parse_cache,
+            parser=parser,
+            scheduler=scheduler,
+            executor=executor,
+            closed_days=closed_days,
+        )
+    )
+
 
-    multi_canteen_plan = get_unformatted_plan(canteens, language)
+def get_plan_for_range(
+    start: date,
+    end: date,
+    canteens: Optional[Set[Canteen]] = None,
+    language: str = "de",
+    adapter_class: Optional[Type[PlanAdapter]] = None,
+    *,
+    cache: Optional[ResponseCache] = None,
+    parse_cache: Optional[ParseCache] = None,
+    parser: Optional[HtmlMensaParser] = None,
+    scheduler: Optional[FetchScheduler] = None,
+    executor: Optional[Executor] = None,
+    closed_days: Optional[ClosedDays] = None,
+    failed_days: Optional[List[Tuple[Canteen, date]]] = None,
+) -> Any:
+    """
+    Returns the canteen plan for all weekdays from start to end (inclusive).
+    Args:
+        start: First day
+        end: Last day
+        canteens: Selected canteens
+        language: Language of canteen plan, possible values: "de" | "en"
+        adapter_class: Formatter for plan output
+        closed_days: Remembers days without a plan, so they are not requested
+            again by later calls
+        failed_days: If set, the days that failed to load are appended to
+            this list. They are left out of the plan.
+
+    Returns: Formatted canteen plan
+
+    """
+    return asyncio.run(
+        async_get_plan_for_range(
+            start,
+            end,
+            canteens,
+            language,
+            adapter_class,
+            cache=cache,
+            parse_cache=parse_cache,
+            parser=parser,
+            scheduler=scheduler,
+            executor=executor,
+            closed_days=closed_days,
+            failed_days=failed_days,
+        )
+    )
+
+
+def get_unformatted_plan(
+    canteens: Optional[Set[Canteen]] = None,
+    language: str = "de",
+    *,
+    cache: Optional[ResponseCache] = None,
+    parse_cache: Optional[ParseCache] = None,
+    parser: Optional[HtmlMensaParser] = None,
+    scheduler: Optional[FetchScheduler] = None,
+    executor: Optional[Executor] = None,
+    closed_days: Optional[ClosedDays] = None,
+) -> MultiCanteenPlan:
+    return asyncio.run(
+        async_get_unformatted_plan(
+            canteens,
+            language,
+            cache=cache,
+            parse_cache=parse_cache,
+            parser=parser,
+            scheduler=scheduler,
+            executor=executor,
+            closed_days=closed_days,
+        )
+    )
+
+
+async def async_get_plan(
+    canteens: Optional[Set[Canteen]] = None,
+    adapter_class: Optional[Type[PlanAdapter]] = None,
+    *,
+    cache: Optional[ResponseCache] = None,
+    parse_cache: Optional[ParseCache] = None,
+    parser: Optional[HtmlMensaParser] = None,
+    scheduler: Optional[FetchScheduler] = None,
+    session: Optional[aiohttp.ClientSession] = None,
+    executor: Optional[Executor] = None,
+    closed_days: Optional[ClosedDays] = None,
+) -> Any:
+    """
+    Async version of get_plan.
+    Args:
+        session: Externally owned session that is reused and not closed. If
+            None, a new session is created for this call.
+
+    Returns: Formatted canteen plan
+
+    """
+    return await async_get_plan_by_language(
+        "de",
+        canteens,
+        adapter_class,
+        cache=cache,
+        parse_cache=parse_cache,
+        parser=parser,
+        scheduler=scheduler,
+        session=session,
+        executor=executor,
+        closed_days=closed_days,
+    )
+
+
+async def async_get_plan_by_language(
+    language: str = "de",
+    canteens: Optional[Set[Canteen]] = None,
+    adapter_class: Optional[Type[PlanAdapter]] = None,
+    *,
+    cache: Optional[ResponseCache] = None,
+    parse_cache: Optional[ParseCache] = None,
+    parser: Optional[HtmlMensaParser] = None,
+    scheduler: Optional[FetchScheduler] = None,
+    session: Optional[aiohttp.ClientSession] = None,
+    executor: Optional[Executor] = None,
+    closed_days: Optional[ClosedDays] = None,
+) -> Any:
+    """
+    Async version of get_plan_by_language.
+    Args:
+        session: Externally owned session that is reused and not closed. If
+            None, a new session is created for this call.
+
+    Returns: Formatted canteen plan in given language
+
+    """
+    multi_canteen_plan = await async_get_unformatted_plan(
+        canteens,
+        language,
+        cache=cache,
+        parse_cache=parse_cache,
+        parser=parser,
+        scheduler=scheduler,
+        session=session,
+        executor=executor,
+        closed_days=closed_days,
+    )
 
     if adapter_class is None:
         adapter_class = SimpleAdapter2
@@ -53,10 +318,243 @@ def get_plan_by_language(
     return format_meals(multi_canteen_plan, adapter_class)
 
 
-def get_unformatted_plan(
-    canteens: Optional[Set[Canteen]] = None, language: str = "de"
+async def async_get_plan_by_languages(
+    languages: Optional[Iterable[str]] = None,
+    canteens: Optional[Set[Canteen]] = None,
+    adapter_class: Optional[Type[PlanAdapter]] = None,
+    *,
+    cache: Optional[ResponseCache] = None,
+    parse_cache: Optional[ParseCache] = None,
+    parser: Optional[HtmlMensaParser] = None,
+    scheduler: Optional[FetchScheduler] = None,
+    session: Optional[aiohttp.ClientSession] = None,
+    executor: Optional[Executor] = None,
+    closed_days: Optional[ClosedDays] = None,
+) -> Dict[str, Any]:
+    """
+    Async version of get_plan_by_languages.
+    Args:
+        session: Externally owned session that is reused and not closed. If
+            None, a new session is created for this call.
+
+    Returns: Formatted canteen plan for each language
+
+    """
+    plans = await async_get_unformatted_plan_by_languages(
+        languages,
+        canteens,
+        cache=cache,
+        parse_cache=parse_cache,
+        parser=parser,
+        scheduler=scheduler,
+        session=session,
+        executor=executor,
+        closed_days=closed_days,
+    )
+
+    if adapter_class is None:
+        adapter_class = SimpleAdapter2
+
+    return {
+        language: format_meals(plan, adapter_class) for language, plan in plans.items()
+    }
+
+
+async def async_get_unformatted_plan_by_languages(
+    languages: Optional[Iterable[str]] = None,
+    canteens: Optional[Set[Canteen]] = None,
+    *,
+    cache: Optional[ResponseCache] = None,
+    parse_cache: Optional[ParseCache] = None,
+    parser: Optional[HtmlMensaParser] = None,
+    scheduler: Optional[FetchScheduler] = None,
+    session: Optional[aiohttp.ClientSession] = None,
+    executor: Optional[Executor] = None,
+    closed_days: Optional[ClosedDays] = None,
+) -> MultiLanguagePlan:
+    """
+    Returns the unformatted canteen plan for each of the given languages.
+    Args:
+        languages: Languages of canteen plan. Defaults to "de" and "en"
+        session: Externally owned session that is reused and not closed. If
+            None, a new session is created for this call.
+
+    Returns: Unformatted canteen plan for each language
+
+    """
+    if languages is None:
+        languages = ["de", "en"]
+    if canteens is None:
+        canteens = {Canteen.UL_UNI_Sued, Canteen.UL_UNI_West}
+
+    return await get_meals_for_languages(
+        canteens,
+        languages,
+        cache=cache,
+        parse_cache=parse_cache,
+        parser=parser,
+        scheduler=scheduler,
+        session=session,
+        executor=executor,
+        closed_days=closed_days,
+    )
+
+
+async def async_get_unformatted_plan(
+    canteens: Optional[Set[Canteen]] = None,
+    language: str = "de",
+    *,
+    cache: Optional[ResponseCache] = None,
+    parse_cache: Optional[ParseCache] = None,
+    parser: Optional[HtmlMensaParser] = None,
+    scheduler: Optional[FetchScheduler] = None,
+    session: Optional[aiohttp.ClientSession] = None,
+    executor: Optional[Executor] = None,
+    closed_days: Optional[ClosedDays] = None,
 ) -> MultiCanteenPlan:
+    """
+    Async version of get_unformatted_plan.
+    Args:
+        session: Externally owned session that is reused and not closed. If
+            None, a new session is created for this call.
+
+    Returns: Unformatted canteen plan
+
+    """
+    if canteens is None:
+        canteens = {Canteen.UL_UNI_Sued, Canteen.UL_UNI_West}
+
+    return await get_meals_for_canteens(
+        canteens,
+        language,
+        cache=cache,
+        parse_cache=parse_cache,
+        parser=parser,
+        scheduler=scheduler,
+        session=session,
+        executor=executor,
+        closed_days=closed_days,
+    )
+
+
+async def async_get_plan_for_range(
+    start: date,
+    end: date,
+    canteens: Optional[Set[Canteen]] = None,
+    language: str = "de",
+    adapter_class: Optional[Type[PlanAdapter]] = None,
+    *,
+    cache: Optional[ResponseCache] = None,
+    parse_cache: Optional[ParseCache] = None,
+    parser: Optional[HtmlMensaParser] = None,
+    scheduler: Optional[FetchScheduler] = None,
+    session: Optional[aiohttp.ClientSession] = None,
+    executor: Optional[Executor] = None,
+    closed_days: Optional[ClosedDays] = None,
+    failed_days: Optional[List[Tuple[Canteen, date]]] = None,
+) -> Any:
+    """
+    Async version of get_plan_for_range.
+    Args:
+        session: Externally owned session that is reused and not closed. If
+            None, a new session is created for this call.
+
+    Returns: Formatted canteen plan
+
+    """
+    if canteens is None:
+        canteens = {Canteen.UL_UNI_Sued, Canteen.UL_UNI_West}
+    if adapter_class is None:
+        adapter_class = SimpleAdapter2
+
+    plan = await get_meals_for_date_range(
+        canteens,
+        start,
+        end,
+        language,
+        cache=cache,
+        parse_cache=parse_cache,
+        parser=parser,
+        scheduler=scheduler,
+        session=session,
+        executor=executor,
+        closed_days=closed_days,
+        failed_days=failed_days,
+    )
+    return format_meals(plan, adapter_class)
+
+
+async def async_iter_plan(
+    canteens: Optional[Set[Canteen]] = None,
+    language: str = "de",
+    adapter_class: Optional[Type[PlanAdapter]] = None,
+    *,
+    cache: Optional[ResponseCache] = None,
+    parse_cache: Optional[ParseCache] = None,
+    parser: Optional[HtmlMensaParser] = None,
+    scheduler: Optional[FetchScheduler] = None,
+    session: Optional[aiohttp.ClientSession] = None,
+    executor: Optional[Executor] = None,
+    closed_days: Optional[ClosedDays] = None,
+) -> AsyncIterator[Any]:
+    """
+    Yields the formatted plan of each day as soon as it is fetched, so a
+    single slow day does not delay the other days.
+    Args:
+        adapter_class: Formatter for plan output, each day is converted with
+            PlanAdapter.convert_day
+
+    Returns: Async iterator of formatted days
+
+    """
+    if adapter_class is None:
+        adapter_class = SimpleAdapter2
+
+    stream = async_iter_unformatted_plan(
+        canteens,
+        language,
+        cache=cache,
+        parse_cache=parse_cache,
+        parser=parser,
+        scheduler=scheduler,
+        session=session,
+        executor=executor,
+        closed_days=closed_days,
+    )
+    async for day in format_meal_stream(stream, adapter_class):
+        yield day
+
+
+async def async_iter_unformatted_plan(
+    canteens: Optional[Set[Canteen]] = None,
+    language: str = "de",
+    *,
+    cache: Optional[ResponseCache] = None,
+    parse_cache: Optional[ParseCache] = None,
+    parser: Optional[HtmlMensaParser] = None,
+    scheduler: Optional[FetchScheduler] = None,
+    session: Optional[aiohttp.ClientSession] = None,
+    executor: Optional[Executor] = None,
+    closed_days: Optional[ClosedDays] = None,
+) -> AsyncIterator[DayMeals]:
+    """
+    Yields (canteen, date, meals) for each day as soon as it is fetched.
+
+    Returns: Async iterator of unformatted days
+
+    """
     if canteens is None:
         canteens = {Canteen.UL_UNI_Sued, Canteen.UL_UNI_West}
 
-    return asyncio.run(get_meals_for_canteens(canteens, language))
+    async for day in iter_meals_for_canteens(
+        canteens,
+        language,
+        cache=cache,
+        parse_cache=parse_cache,
+        parser=parser,
+        scheduler=scheduler,
+        session=session,
+        executor=executor,
+        closed_days=closed_days,
+    ):
+        yield day
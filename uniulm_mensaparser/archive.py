@@ -0,0 +1,289 @@
+import sqlite3
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
+
+from .models import Canteen, Meal, MealNutrition, MealType, MultiCanteenPlan
+from .utils import date_format_iso
+
+"""
+Local archive of parsed canteen plans. Meals are stored in a sqlite database
+indexed by canteen, date, category, name and meal type, so past plans can be
+queried without sending requests to the Studierendenwerk.
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meals (
+    id INTEGER PRIMARY KEY,
+    canteen TEXT NOT NULL,
+    date TEXT NOT NULL,
+    language TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    category TEXT NOT NULL,
+    week_number INTEGER NOT NULL,
+    price_students TEXT NOT NULL,
+    price_employees TEXT NOT NULL,
+    price_others TEXT NOT NULL,
+    price_note TEXT NOT NULL,
+    allergy_ids TEXT NOT NULL,
+    co2 TEXT NOT NULL,
+    calories TEXT NOT NULL,
+    protein TEXT NOT NULL,
+    carbohydrates TEXT NOT NULL,
+    sugar TEXT NOT NULL,
+    fat TEXT NOT NULL,
+    saturated_fat TEXT NOT NULL,
+    salt TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS meals_day ON meals (language, canteen, date);
+CREATE INDEX IF NOT EXISTS meals_date ON meals (language, date);
+CREATE INDEX IF NOT EXISTS meals_category ON meals (language, category, date);
+CREATE INDEX IF NOT EXISTS meals_name ON meals (language, name, date);
+CREATE TABLE IF NOT EXISTS meal_types (
+    meal_id INTEGER NOT NULL REFERENCES meals (id) ON DELETE CASCADE,
+    type TEXT NOT NULL,
+    PRIMARY KEY (meal_id, type)
+);
+CREATE INDEX IF NOT EXISTS meal_types_type ON meal_types (type, meal_id);
+"""
+
+MEAL_COLUMNS = (
+    "name",
+    "category",
+    "week_number",
+    "price_students",
+    "price_employees",
+    "price_others",
+    "price_note",
+    "allergy_ids",
+    "co2",
+    "calories",
+    "protein",
+    "carbohydrates",
+    "sugar",
+    "fat",
+    "saturated_fat",
+    "salt",
+)
+
+
+class PlanArchive:
+    """
+    Stores parsed plans in a sqlite database.
+    Args:
+        path: Path of the database file, ":memory:" for an in-memory archive
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(path), check_same_thread=False)
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        with self._lock, self._connection:
+            self._connection.executescript(SCHEMA)
+
+    def store_plan(self, plan: MultiCanteenPlan, language: str = "de") -> int:
+        """
+        Stores all meals of the plan. Days that are already archived are
+        replaced, so storing the same plan again does not create duplicates.
+
+        Returns: Number of stored meals
+        """
+        stored = 0
+        with self._lock, self._connection:
+            for canteen, daily_meals in plan.items():
+                for plan_date, meals in daily_meals.items():
+                    stored += self._store_day(canteen, plan_date, meals, language)
+        return stored
+
+    def _store_day(
+        self, canteen: Canteen, plan_date: date, meals: List[Meal], language: str
+    ) -> int:
+        day = (canteen.name, date_format_iso(plan_date), language)
+        self._connection.execute(
+            "DELETE FROM meals WHERE canteen = ? AND date = ? AND language = ?", day
+        )
+        insert = (
+            "INSERT INTO meals (canteen, date, language, position, "
+            + ", ".join(MEAL_COLUMNS)
+            + ") VALUES ("
+            + ", ".join("?" * (len(MEAL_COLUMNS) + 4))
+            + ")"
+        )
+        for position, meal in enumerate(meals):
+            nutrition = meal.nutrition
+            cursor = self._connection.execute(
+                insert,
+                (
+                    *day,
+                    position,
+                    meal.name,
+                    meal.category,
+                    meal.week_number,
+                    meal.price_students,
+                    meal.price_employees,
+                    meal.price_others,
+                    meal.price_note,
+                    ",".join(sorted(meal.allergy_ids)),
+                    meal.co2,
+                    nutrition.calories,
+                    nutrition.protein,
+                    nutrition.carbohydrates,
+                    nutrition.sugar,
+                    nutrition.fat,
+                    nutrition.saturated_fat,
+                    nutrition.salt,
+                ),
+            )
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO meal_types (meal_id, type) VALUES (?, ?)",
+                [(cursor.lastrowid, t.value) for t in meal.types],
+            )
+        return len(meals)
+
+    def query(
+        self,
+        start: date,
+        end: date,
+        canteens: Optional[Iterable[Canteen]] = None,
+        category: Optional[str] = None,
+        name: Optional[str] = None,
+        meal_type: Optional[MealType] = None,
+        language: str = "de",
+    ) -> MultiCanteenPlan:
+        """
+        Returns the archived meals between start and end (both inclusive).
+        Args:
+            start: First date
+            end: Last date
+            canteens: Only return meals of these canteens
+            category: Only return meals of this category
+            name: Only return meals with this name
+            meal_type: Only return meals of this type
+            language: Language of the archived plan
+
+        Returns: Archived plan
+        """
+        conditions = ["m.language = ?", "m.date BETWEEN ? AND ?"]
+        params: list = [language, date_format_iso(start), date_format_iso(end)]
+        if canteens is not None:
+            canteen_names = [c.name for c in canteens]
+            conditions.append(
+                "m.canteen IN (" + ", ".join("?" * len(canteen_names)) + ")"
+            )
+            params += canteen_names
+        if category is not None:
+            conditions.append("m.category = ?")
+            params.append(category)
+        if name is not None:
+            conditions.append("m.name = ?")
+            params.append(name)
+        if meal_type is not None:
+            conditions.append("m.id IN (SELECT meal_id FROM meal_types WHERE type = ?)")
+            params.append(meal_type.value)
+
+        sql = (
+            "SELECT m.id, m.canteen, m.date, "
+            + ", ".join("m." + c for c in MEAL_COLUMNS)
+            + " FROM meals m WHERE "
+            + " AND ".join(conditions)
+            + " ORDER BY m.canteen, m.date, m.position"
+        )
+
+        with self._lock:
+            rows = self._connection.execute(sql, params).fetchall()
+            types = self._meal_types([row[0] for row in rows])
+
+        plan: MultiCanteenPlan = {}
+        for row in rows:
+            meal = self._meal_from_row(row, types.get(row[0], []))
+            plan.setdefault(meal.canteen, {}).setdefault(
+                date.fromisoformat(meal.date), []
+            ).append(meal)
+        return plan
+
+    def _meal_types(self, meal_ids: List[int]) -> dict:
+        types: dict = {}
+        # sqlite limits the number of parameters per statement
+        chunk_size = 500
+        for i in range(0, len(meal_ids), chunk_size):
+            chunk = meal_ids[i : i + chunk_size]
+            rows = self._connection.execute(
+                "SELECT meal_id, type FROM meal_types WHERE meal_id IN ("
+                + ", ".join("?" * len(chunk))
+                + ") ORDER BY rowid",
+                chunk,
+            )
+            for meal_id, meal_type in rows:
+                types.setdefault(meal_id, []).append(MealType(meal_type))
+        return types
+
+    @staticmethod
+    def _meal_from_row(row: tuple, types: List[MealType]) -> Meal:
+        values = dict(zip(MEAL_COLUMNS, row[3:]))
+        return Meal(
+            name=values["name"],
+            category=values["category"],
+            date=row[2],
+            week_number=values["week_number"],
+            price_students=values["price_students"],
+            price_employees=values["price_employees"],
+            price_others=values["price_others"],
+            price_note=values["price_note"],
+            canteen=Canteen[row[1]],
+            allergy_ids=set(values["allergy_ids"].split(",")),
+            types=types,
+            co2=values["co2"],
+            nutrition=MealNutrition(
+                calories=values["calories"],
+                protein=values["protein"],
+                carbohydrates=values["carbohydrates"],
+                sugar=values["sugar"],
+                fat=values["fat"],
+                saturated_fat=values["saturated_fat"],
+                salt=values["salt"],
+            ),
+        )
+
+    def count_served(
+        self,
+        name: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        canteen: Optional[Canteen] = None,
+        language: str = "de",
+    ) -> int:
+        """
+        Returns on how many days a meal with the given name was served.
+        """
+        sql = (
+            "SELECT COUNT(*) FROM (SELECT DISTINCT canteen, date FROM meals "
+            "WHERE language = ? AND name = ?"
+        )
+        params: list = [language, name]
+        if start is not None:
+            sql += " AND date >= ?"
+            params.append(date_format_iso(start))
+        if end is not None:
+            sql += " AND date <= ?"
+            params.append(date_format_iso(end))
+        if canteen is not None:
+            sql += " AND canteen = ?"
+            params.append(canteen.name)
+        sql += ")"
+
+        with self._lock:
+            return self._connection.execute(sql, params).fetchone()[0]
+
+    def archived_dates(self, canteen: Canteen, language: str = "de") -> List[date]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT DISTINCT date FROM meals WHERE canteen = ? AND language = ? "
+                "ORDER BY date",
+                (canteen.name, language),
+            ).fetchall()
+        return [date.fromisoformat(row[0]) for row in rows]
+
+    def close(self) -> None:
+        self._connection.close()
@@ -0,0 +1,430 @@
+import argparse
+import asyncio
+import copy
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, replace
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from aiohttp import web
+from bs4 import BeautifulSoup
+
+from . import studierendenwerk_scraper
+from .adapter import JsonAdapter, SimpleAdapter2
+from .cache import SerializedDayCache
+from .html_parser import HtmlMensaParser
+from .mensaparser import get_meals_for_canteens
+from .models import (
+    Canteen,
+    CompactMeal,
+    FrozenCompactMeal,
+    Meal,
+    MultiCanteenPlan,
+)
+from .text import build_meal_name, normalize_meal_name
+
+"""
+Benchmarks for parsing, formatting and fetching canteen plans.
+
+Run with: python -m uniulm_mensaparser.bench --fixtures DIR [--output results.json]
+
+The saved day pages (*.html) in the fixture directory are used as input, e.g.
+tests/new-html of the repository. The end-to-end benchmark serves them from a
+local HTTP server instead of MaxManager, so no requests are sent to the
+Studierendenwerk.
+"""
+
+MEAL_NAME_LINES = [
+    "Griechische Pfanne mit veganem Hack, Kritharaki, Hirtenkäse und",
+    "                    Joghurtdip ",
+    "(23,24,34W,34G)",
+    " Kartoffel- salat , mit Zwiebel- Lauch-Gemüse",
+]
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    iterations: int
+    mean_ms: float
+    median_ms: float
+    min_ms: float
+    max_ms: float
+    stdev_ms: float
+
+    @staticmethod
+    def from_timings(name: str, timings: List[float]) -> "BenchmarkResult":
+        millis = [t * 1000 for t in timings]
+        return BenchmarkResult(
+            name=name,
+            iterations=len(millis),
+            mean_ms=statistics.mean(millis),
+            median_ms=statistics.median(millis),
+            min_ms=min(millis),
+            max_ms=max(millis),
+            stdev_ms=statistics.stdev(millis) if len(millis) > 1 else 0.0,
+        )
+
+
+def measure(name: str, func: Callable[[], object], iterations: int) -> BenchmarkResult:
+    func()  # warm up
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return BenchmarkResult.from_timings(name, timings)
+
+
+async def measure_async(
+    name: str, func: Callable[[], Awaitable[object]], iterations: int
+) -> BenchmarkResult:
+    await func()  # warm up
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await func()
+        timings.append(time.perf_counter() - start)
+    return BenchmarkResult.from_timings(name, timings)
+
+
+def load_fixtures(fixture_dir: Path) -> Dict[str, str]:
+    return {f.name: f.read_text() for f in sorted(fixture_dir.glob("*.html"))}
+
+
+def bench_parse_plan(
+    fixtures: Dict[str, str], iterations: int, backend: str = "bs4"
+) -> List[BenchmarkResult]:
+    parser = HtmlMensaParser(backend=backend)
+    results = []
+    for name, source in fixtures.items():
+        results.append(
+            measure(
+                f"parse_plan[{parser.backend}:{name}]",
+                lambda s=source: parser.parse_plan(
+                    s, date(2024, 5, 21), Canteen.UL_UNI_Sued
+                ),
+                iterations,
+            )
+        )
+    return results
+
+
+def synthetic_day_page(fixtures: Dict[str, str], meals: int) -> str:
+    """
+    Builds a day page with at least the given number of meals by repeating the
+    categories of the fixtures, like the large pages of event days.
+    """
+    categories: List[List[str]] = []
+    for source in fixtures.values():
+        container = BeautifulSoup(source, "html.parser").div
+        if container is None or container.find("div", {"class": "nodata"}):
+            continue
+        for div in container.find_all("div", recursive=False):
+            if "gruppenkopf" in div.attrs.get("class", ()):
+                categories.append([])
+            categories[-1].append(str(div))
+
+    blocks: List[str] = []
+    count = 0
+    while count < meals:
+        category = categories[len(blocks) % len(categories)]
+        blocks += category
+        count += len(category) - 1
+    return "<div class='container-fluid'>" + "".join(blocks) + "</div>"
+
+
+def bench_parse_scaling(
+    fixtures: Dict[str, str],
+    iterations: int,
+    backend: str = "bs4",
+    sizes: Tuple[int, ...] = (25, 100, 400),
+) -> List[BenchmarkResult]:
+    """
+    Measures parsing synthetic day pages of increasing size. The time per meal
+    should stay roughly constant.
+    """
+    parser = HtmlMensaParser(backend=backend)
+    results = []
+    for size in sizes:
+        page = synthetic_day_page(fixtures, size)
+        results.append(
+            measure(
+                f"parse_plan[{parser.backend}:{size} meals]",
+                lambda p=page: parser.parse_plan(
+                    p, date(2024, 5, 21), Canteen.UL_UNI_Sued
+                ),
+                # fewer iterations for larger pages
+                max(1, iterations * sizes[0] // size),
+            )
+        )
+    return results
+
+
+def bench_build_meal_name(iterations: int) -> List[BenchmarkResult]:
+    """
+    Measures meal name normalization with and without memoization.
+    """
+    uncached = normalize_meal_name.__wrapped__
+    return [
+        measure(
+            "build_meal_name", lambda: build_meal_name(MEAL_NAME_LINES), iterations
+        ),
+        measure(
+            "build_meal_name[uncached]",
+            lambda: uncached(" ".join(MEAL_NAME_LINES)),
+            iterations,
+        ),
+    ]
+
+
+def synthetic_plan(meals: List[Meal], weeks: int) -> MultiCanteenPlan:
+    """
+    Builds a plan with the given meals on every weekday of the given number of
+    weeks for all canteens.
+    """
+    start = date(2024, 1, 1)
+    plan: MultiCanteenPlan = {}
+    for canteen in (Canteen.UL_UNI_Sued, Canteen.UL_UNI_West):
+        plan[canteen] = {}
+        for week in range(weeks):
+            for weekday in range(5):
+                plan_date = start + timedelta(weeks=week, days=weekday)
+                plan[canteen][plan_date] = [
+                    replace(m, canteen=canteen, date=plan_date.isoformat())
+                    for m in meals
+                ]
+    return plan
+
+
+def bench_convert_plans(
+    fixtures: Dict[str, str], iterations: int, weeks: int
+) -> BenchmarkResult:
+    parser = HtmlMensaParser()
+    meals = []
+    for source in fixtures.values():
+        meals += parser.parse_plan(source, date(2024, 1, 1), Canteen.UL_UNI_Sued)
+    plan = synthetic_plan(meals, weeks)
+    adapter = SimpleAdapter2()
+    return measure(
+        f"SimpleAdapter2.convert_plans[{weeks} weeks]",
+        lambda: adapter.convert_plans(plan),
+        iterations,
+    )
+
+
+def bench_serialize_plans(
+    fixtures: Dict[str, str], iterations: int, weeks: int
+) -> List[BenchmarkResult]:
+    """
+    Compares converting the plan with SimpleAdapter2 and json.dumps to
+    encoding it directly with JsonAdapter, with and without a day cache.
+    """
+    parser = HtmlMensaParser()
+    meals = []
+    for source in fixtures.values():
+        meals += parser.parse_plan(source, date(2024, 1, 1), Canteen.UL_UNI_Sued)
+    plan = synthetic_plan(meals, weeks)
+    simple_adapter = SimpleAdapter2()
+    json_adapter = JsonAdapter()
+    cached_adapter = JsonAdapter(SerializedDayCache())
+    return [
+        measure(
+            f"SimpleAdapter2+json.dumps[{weeks} weeks]",
+            lambda: json.dumps(simple_adapter.convert_plans(plan)).encode(),
+            iterations,
+        ),
+        measure(
+            f"JsonAdapter.convert_plans[{weeks} weeks]",
+            lambda: json_adapter.convert_plans(plan),
+            iterations,
+        ),
+        measure(
+            f"JsonAdapter.convert_plans[{weeks} weeks, cached]",
+            lambda: cached_adapter.convert_plans(plan),
+            iterations,
+        ),
+    ]
+
+
+def allocated_bytes(build: Callable[[], object]) -> int:
+    """
+    Returns the number of bytes that are still allocated by the object
+    returned from build.
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        gc.collect()  # parse trees are only freed by the garbage collector
+        allocated = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del result
+    return allocated
+
+
+def bench_meal_memory(fixtures: Dict[str, str], copies: int = 50) -> List[dict]:
+    """
+    Measures the memory per meal for Meal and the compact meal variants.
+    """
+    parser = HtmlMensaParser()
+    meals: List[Meal] = []
+    for source in fixtures.values():
+        meals += parser.parse_plan(source, date(2024, 1, 1), Canteen.UL_UNI_Sued)
+    meals = meals * copies
+
+    variants: Dict[str, Callable[[], object]] = {
+        "Meal": lambda: [copy.deepcopy(m) for m in meals],
+        "CompactMeal": lambda: [CompactMeal.from_meal(m) for m in meals],
+        "FrozenCompactMeal": lambda: [FrozenCompactMeal.from_meal(m) for m in meals],
+    }
+    return [
+        {"name": name, "bytes_per_meal": allocated_bytes(build) / len(meals)}
+        for name, build in variants.items()
+    ]
+
+
+def bench_parse_memory(fixtures: Dict[str, str], copies: int = 5) -> List[dict]:
+    """
+    Measures the memory per meal of parsing the fixtures separately and as one
+    batch with shared values.
+    """
+    parser = HtmlMensaParser()
+    start = date(2024, 1, 1)
+    pages = [
+        (source, start + timedelta(days=i), Canteen.UL_UNI_Sued)
+        for i, source in enumerate(list(fixtures.values()) * copies)
+    ]
+    meal_count = sum(len(parser.parse_plan(*page)) for page in pages)
+
+    variants: Dict[str, Callable[[], object]] = {
+        "parse_plan": lambda: [parser.parse_plan(*page) for page in pages],
+        "parse_many": lambda: parser.parse_many(pages),
+    }
+    return [
+        {"name": name, "bytes_per_meal": allocated_bytes(build) / meal_count}
+        for name, build in variants.items()
+    ]
+
+
+async def start_stand_in_server(
+    fixtures: Dict[str, str], latency: float
+) -> web.AppRunner:
+    """
+    Starts a local HTTP server that answers MaxManager requests with the
+    fixtures after the given latency in seconds.
+    """
+    pages = list(fixtures.values())
+
+    async def handle(request: web.Request) -> web.Response:
+        form = await request.post()
+        await asyncio.sleep(latency)
+        day = date.fromisoformat(str(form["date"])).toordinal()
+        page = pages[(day + int(str(form["locId"]))) % len(pages)]
+        return web.Response(text=page, content_type="text/html")
+
+    app = web.Application()
+    app.router.add_post("/", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    return runner
+
+
+def server_url(runner: web.AppRunner) -> str:
+    host, port = runner.addresses[0][:2]
+    return f"http://{host}:{port}/"
+
+
+async def bench_end_to_end(
+    fixtures: Dict[str, str], iterations: int, latency: float, backend: str = "bs4"
+) -> BenchmarkResult:
+    runner = await start_stand_in_server(fixtures, latency)
+    original_url = studierendenwerk_scraper.MAXMANAGER_URL
+    studierendenwerk_scraper.MAXMANAGER_URL = server_url(runner)
+    parser = HtmlMensaParser(backend=backend)
+    canteens = {Canteen.UL_UNI_Sued, Canteen.UL_UNI_West}
+    try:
+        return await measure_async(
+            f"get_meals_for_canteens[{parser.backend}, {latency * 1000:g} ms]",
+            lambda: get_meals_for_canteens(canteens, "de", parser=parser),
+            iterations,
+        )
+    finally:
+        studierendenwerk_scraper.MAXMANAGER_URL = original_url
+        await runner.cleanup()
+
+
+def run_benchmarks(
+    fixture_dir: Path,
+    iterations: int = 20,
+    weeks: int = 8,
+    latency: float = 0.05,
+    backend: str = "bs4",
+) -> dict:
+    fixtures = load_fixtures(fixture_dir)
+    if not fixtures:
+        raise FileNotFoundError(f"No HTML fixtures found in {fixture_dir}")
+
+    results = bench_parse_plan(fixtures, iterations, backend)
+    results += bench_parse_scaling(fixtures, iterations, backend)
+    results += bench_build_meal_name(iterations * 100)
+    results.append(bench_convert_plans(fixtures, iterations, weeks))
+    results += bench_serialize_plans(fixtures, iterations, weeks)
+    results.append(
+        asyncio.run(
+            bench_end_to_end(fixtures, max(1, iterations // 4), latency, backend)
+        )
+    )
+
+    return {
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": [asdict(r) for r in results],
+        "memory": bench_meal_memory(fixtures) + bench_parse_memory(fixtures),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    arg_parser = argparse.ArgumentParser(
+        prog="python -m uniulm_mensaparser.bench",
+        description="Benchmarks parsing, formatting and fetching canteen plans.",
+    )
+    arg_parser.add_argument(
+        "--fixtures",
+        type=Path,
+        required=True,
+        help="directory with saved day pages, e.g. tests/new-html",
+    )
+    arg_parser.add_argument("--iterations", type=int, default=20)
+    arg_parser.add_argument(
+        "--weeks", type=int, default=8, help="weeks in the synthetic plan"
+    )
+    arg_parser.add_argument(
+        "--latency", type=float, default=50, help="server latency in milliseconds"
+    )
+    arg_parser.add_argument("--backend", choices=["bs4", "lxml"], default="bs4")
+    arg_parser.add_argument("--output", type=Path, help="write JSON results to file")
+    args = arg_parser.parse_args(argv)
+
+    report = run_benchmarks(
+        args.fixtures, args.iterations, args.weeks, args.latency / 1000, args.backend
+    )
+    output = json.dumps(report, indent=2)
+    if args.output is not None:
+        args.output.write_text(output)
+    else:
+        sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,427 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from abc import abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, Union
+
+"""
+Caches for MaxManager responses and parsed plans.
+
+A ResponseCache consists of one or more backends (tiers) that are queried in
+order. Entries expire according to a TtlPolicy that depends on the requested
+plan date: past days do not change anymore, today's plan changes rarely and
+future plans are updated from time to time.
+
+A ParseCache stores the meals parsed from a page together with the hash of the
+page, so unchanged pages do not have to be parsed again. A SerializedDayCache
+does the same for the serialized output of adapters.
+
+ClosedDays remembers days without a plan, so they are not requested again.
+"""
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def requests(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        if self.requests == 0:
+            return 0.0
+        return self.hits / self.requests
+
+
+@dataclass
+class TtlPolicy:
+    """
+    Time to live in seconds for cached responses, depending on the plan date.
+    None means that the entry never expires.
+    """
+
+    past: Optional[float] = None
+    today: Optional[float] = 15 * 60
+    future: Optional[float] = 60 * 60
+
+    def ttl_for(self, plan_date: date, today: Optional[date] = None) -> Optional[float]:
+        if today is None:
+            today = date.today()
+        if isinstance(plan_date, datetime):
+            plan_date = plan_date.date()
+        if plan_date < today:
+            return self.past
+        if plan_date == today:
+            return self.today
+        return self.future
+
+
+class CacheBackend:
+    """
+    Interface for a cache tier. Values are stored together with an absolute
+    expiry timestamp (seconds since epoch, None for no expiry).
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Tuple[str, Optional[float]]]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: str, expires_at: Optional[float]) -> None:
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    In-memory LRU cache tier.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, Tuple[str, Optional[float]]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[Tuple[str, Optional[float]]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def set(self, key: str, value: str, expires_at: Optional[float]) -> None:
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SqliteCacheBackend(CacheBackend):
+    """
+    On-disk cache tier. Responses are stored zlib-compressed in a sqlite
+    database, so they survive restarts of the process. The database is
+    accessed synchronously, also when the cache is used by the async
+    functions, so a slow disk blocks the event loop while a response is read
+    or stored.
+    Args:
+        path: Database file
+        max_entries: Maximum number of stored responses. The oldest entries
+            are removed first, also entries that never expire. None for no
+            limit.
+    """
+
+    def __init__(self, path: Union[str, Path], max_entries: Optional[int] = 10000):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL)"
+            )
+
+    def get(self, key: str) -> Optional[Tuple[str, Optional[float]]]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return zlib.decompress(row[0]).decode("utf-8"), row[1]
+
+    def set(self, key: str, value: str, expires_at: Optional[float]) -> None:
+        compressed = zlib.compress(value.encode("utf-8"))
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires_at) "
+                "VALUES (?, ?, ?)",
+                (key, compressed, expires_at),
+            )
+            if self.max_entries is not None:
+                # a replaced row gets a new rowid, so rowids are in the order
+                # in which the entries were stored. They have gaps after
+                # deletes, so the newest entries are selected by order.
+                self._connection.execute(
+                    "DELETE FROM responses WHERE rowid NOT IN ("
+                    "SELECT rowid FROM responses ORDER BY rowid DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses")
+
+    def purge_expired(self, now: Optional[float] = None) -> None:
+        if now is None:
+            now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM responses "
+                "WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (now,),
+            )
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+# request fields that depend on the day the request is sent, not on the
+# requested plan, e.g. startThisWeek changes every Monday
+VOLATILE_REQUEST_FIELDS = ("startThisWeek", "startNextWeek")
+
+
+class ResponseCache:
+    """
+    Caches MaxManager responses keyed on the request payload.
+    Args:
+        backends: Cache tiers, queried in order. Defaults to a single
+            in-memory LRU tier. Hits in a later tier are copied into the
+            earlier tiers.
+        policy: TTL policy for the cached responses
+        clock: Returns the current time in seconds since epoch
+    """
+
+    def __init__(
+        self,
+        backends: Optional[List[CacheBackend]] = None,
+        policy: Optional[TtlPolicy] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        if backends is None:
+            backends = [MemoryCacheBackend()]
+        if policy is None:
+            policy = TtlPolicy()
+        self.backends = backends
+        self.policy = policy
+        self.clock = clock
+        self.stats = CacheStats()
+
+    @staticmethod
+    def key_for(request_dict: Dict[str, str]) -> str:
+        key_fields = {
+            k: v for k, v in request_dict.items() if k not in VOLATILE_REQUEST_FIELDS
+        }
+        return json.dumps(key_fields, sort_keys=True, separators=(",", ":"))
+
+    def get(self, request_dict: Dict[str, str]) -> Optional[str]:
+        key = self.key_for(request_dict)
+        now = self.clock()
+
+        for i, backend in enumerate(self.backends):
+            entry = backend.get(key)
+            if entry is None:
+                continue
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= now:
+                backend.delete(key)
+                continue
+            # promote to faster tiers
+            for faster in self.backends[:i]:
+                faster.set(key, value, expires_at)
+            self.stats.hits += 1
+            return value
+
+        self.stats.misses += 1
+        return None
+
+    def set(self, request_dict: Dict[str, str], plan_date: date, value: str) -> None:
+        ttl = self.policy.ttl_for(plan_date)
+        expires_at = None if ttl is None else self.clock() + ttl
+        key = self.key_for(request_dict)
+        for backend in self.backends:
+            backend.set(key, value, expires_at)
+
+    def clear(self) -> None:
+        for backend in self.backends:
+            backend.clear()
+
+
+class ParseCache:
+    """
+    Remembers the parsed meals of the last HTML source seen for each
+    (canteen, date, language, parser options). If the fetched source is
+    unchanged, the previously parsed meals can be reused without parsing the
+    HTML again. Every hit returns the same meal objects, so meals taken from
+    the cache must not be modified.
+    Args:
+        max_entries: Maximum number of (canteen, date, language) entries
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._entries: OrderedDict[Hashable, Tuple[str, List[Any]]] = OrderedDict()
+
+    @staticmethod
+    def content_hash(source: str) -> str:
+        return hashlib.blake2b(source.encode("utf-8"), digest_size=16).hexdigest()
+
+    def get(self, key: Hashable, digest: str) -> Optional[List[Any]]:
+        """
+        Returns the stored meals if digest matches the content hash of the
+        last source stored for key, otherwise None.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == digest:
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return list(entry[1])
+
+        self.stats.misses += 1
+        return None
+
+    def set(self, key: Hashable, digest: str, meals: List[Any]) -> None:
+        self._entries[key] = (digest, list(meals))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SerializedDayCache:
+    """
+    Remembers the serialized output of a day for each (canteen, date). The
+    entry is valid as long as the day consists of the same meal objects, which
+    is the case for days taken from a ParseCache or kept by an incremental
+    refresh. Meals must not be modified after they are serialized.
+    Args:
+        max_entries: Maximum number of (canteen, date) entries
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._entries: OrderedDict[Hashable, Tuple[Tuple[Any, ...], Any]] = (
+            OrderedDict()
+        )
+
+    def get(self, key: Hashable, meals: List[Any]) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_meals = entry[0]
+            if len(stored_meals) == len(meals) and all(
+                a is b for a, b in zip(stored_meals, meals)
+            ):
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return entry[1]
+
+        self.stats.misses += 1
+        return None
+
+    def set(self, key: Hashable, meals: List[Any], value: Any) -> None:
+        self._entries[key] = (tuple(meals), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ClosedDays:
+    """
+    Remembers the days on which a canteen has no plan (holidays, closed days
+    or plans that are not published yet), so that they are not requested
+    again until the entry expires.
+    Args:
+        ttl: Seconds after which a closed day is requested again, depending on
+            the plan date. By default past closed days are kept forever, while
+            today and future days are checked again because their plan may
+            still be published.
+        clock: Returns the current time in seconds since epoch
+        today: Returns the current date
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[TtlPolicy] = None,
+        clock: Callable[[], float] = time.time,
+        today: Callable[[], date] = date.today,
+    ):
+        if ttl is None:
+            ttl = TtlPolicy(past=None, today=60 * 60, future=6 * 60 * 60)
+        self.ttl = ttl
+        self.clock = clock
+        self.today = today
+        self.stats = CacheStats()
+        self._closed: Dict[Tuple[Hashable, date], float] = {}
+
+    @staticmethod
+    def _key(canteen: Hashable, plan_date: date) -> Tuple[Hashable, date]:
+        if isinstance(plan_date, datetime):
+            plan_date = plan_date.date()
+        return canteen, plan_date
+
+    def is_closed(self, canteen: Hashable, plan_date: date) -> bool:
+        """
+        Returns True if the day is known to be closed and the entry has not
+        expired yet.
+        """
+        key = self._key(canteen, plan_date)
+        marked_at = self._closed.get(key)
+        if marked_at is not None:
+            ttl = self.ttl.ttl_for(key[1], self.today())
+            if ttl is None or self.clock() - marked_at < ttl:
+                self.stats.hits += 1
+                return True
+            del self._closed[key]
+
+        self.stats.misses += 1
+        return False
+
+    def mark_closed(self, canteen: Hashable, plan_date: date) -> None:
+        self._closed[self._key(canteen, plan_date)] = self.clock()
+
+    def mark_open(self, canteen: Hashable, plan_date: date) -> None:
+        self._closed.pop(self._key(canteen, plan_date), None)
+
+    def closed_dates(self, canteen: Hashable) -> List[date]:
+        """
+        Returns the remembered closed days of the canteen, including expired
+        entries that were not requested again yet.
+        """
+        return sorted(d for c, d in self._closed if c == canteen)
+
+    def clear(self) -> None:
+        self._closed.clear()
+
+    def __len__(self) -> int:
+        return len(self._closed)
@@ -0,0 +1,210 @@
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .models import Canteen, Meal, MultiCanteenPlan
+
+"""
+Diffing of canteen plans. Meals of the same day are matched by a stable
+identity key, so comparing two plans takes time linear in the plan size.
+"""
+
+MealKey = Tuple[str, str, int]
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+
+# fields that are compared for meals with the same key
+DIFF_FIELDS = (
+    "price_students",
+    "price_employees",
+    "price_others",
+    "price_note",
+    "allergy_ids",
+    "types",
+    "co2",
+)
+NUTRITION_FIELDS = (
+    "calories",
+    "protein",
+    "carbohydrates",
+    "sugar",
+    "fat",
+    "saturated_fat",
+    "salt",
+)
+
+
+@dataclass
+class MealChange:
+    """
+    Args:
+        canteen: Canteen of the meal
+        meal_date: Date of the meal
+        key: Identity key of the meal, see meal_keys
+        kind: ADDED, REMOVED or CHANGED
+        old: Meal in the old plan, None if added
+        new: Meal in the new plan, None if removed
+        fields: Changed fields as (old value, new value), nutrition values are
+            prefixed with "nutrition."
+    """
+
+    canteen: Canteen
+    meal_date: date
+    key: MealKey
+    kind: str
+    old: Optional[Meal] = None
+    new: Optional[Meal] = None
+    fields: Dict[str, Tuple[Any, Any]] = field(default_factory=dict)
+
+
+@dataclass
+class PlanDiff:
+    changes: List[MealChange] = field(default_factory=list)
+    # days that are only in the old plan, e.g. days of last week
+    dropped_days: List[Tuple[Canteen, date]] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.changes)
+
+    def of_kind(self, kind: str) -> List[MealChange]:
+        return [c for c in self.changes if c.kind == kind]
+
+    @property
+    def added(self) -> List[MealChange]:
+        return self.of_kind(ADDED)
+
+    @property
+    def removed(self) -> List[MealChange]:
+        return self.of_kind(REMOVED)
+
+    @property
+    def changed(self) -> List[MealChange]:
+        return self.of_kind(CHANGED)
+
+
+def meal_keys(meals: List[Meal]) -> Dict[MealKey, Meal]:
+    """
+    Returns the meals of a day by identity key (category, name, n). n counts
+    meals with the same category and name, so duplicates keep distinct keys.
+    """
+    keyed: Dict[MealKey, Meal] = {}
+    seen: Dict[Tuple[str, str], int] = {}
+    for meal in meals:
+        base = (meal.category, meal.name)
+        n = seen.get(base, 0)
+        seen[base] = n + 1
+        keyed[(meal.category, meal.name, n)] = meal
+    return keyed
+
+
+def diff_meal(old: Meal, new: Meal) -> Dict[str, Tuple[Any, Any]]:
+    """
+    Returns the changed fields of two meals with the same key.
+    """
+    changes: Dict[str, Tuple[Any, Any]] = {}
+    if old is new:
+        return changes
+    for name in DIFF_FIELDS:
+        old_value = getattr(old, name)
+        new_value = getattr(new, name)
+        if old_value != new_value:
+            changes[name] = (old_value, new_value)
+    old_nutrition = old.nutrition
+    new_nutrition = new.nutrition
+    if old_nutrition is not new_nutrition:
+        for name in NUTRITION_FIELDS:
+            old_value = getattr(old_nutrition, name)
+            new_value = getattr(new_nutrition, name)
+            if old_value != new_value:
+                changes["nutrition." + name] = (old_value, new_value)
+    return changes
+
+
+def diff_day(
+    canteen: Canteen, meal_date: date, old: List[Meal], new: List[Meal]
+) -> List[MealChange]:
+    """
+    Returns the changes between the meals of one day.
+    """
+    if old is new:
+        return []
+    old_keyed = meal_keys(old)
+    new_keyed = meal_keys(new)
+    changes: List[MealChange] = []
+    for key, new_meal in new_keyed.items():
+        old_meal = old_keyed.get(key)
+        if old_meal is None:
+            changes.append(MealChange(canteen, meal_date, key, ADDED, new=new_meal))
+            continue
+        fields = diff_meal(old_meal, new_meal)
+        if fields:
+            changes.append(
+                MealChange(canteen, meal_date, key, CHANGED, old_meal, new_meal, fields)
+            )
+    for key, old_meal in old_keyed.items():
+        if key not in new_keyed:
+            changes.append(MealChange(canteen, meal_date, key, REMOVED, old=old_meal))
+    return changes
+
+
+def _as_date(d: date) -> date:
+    return d.date() if isinstance(d, datetime) else d
+
+
+def _by_date(days: Dict[date, List[Meal]]) -> Dict[date, List[Meal]]:
+    return {_as_date(d): meals for d, meals in days.items()}
+
+
+def diff_plans(old: MultiCanteenPlan, new: MultiCanteenPlan) -> PlanDiff:
+    """
+    Compares two plans. Meals of days that are only in the new plan are
+    reported as added, days that are only in the old plan are listed in
+    dropped_days instead of reporting all of their meals as removed.
+    Days are matched by date, plan keys that are datetimes (e.g. from
+    get_meals_for_canteens) are compared without their time.
+    """
+    diff = PlanDiff()
+    old_plan = {canteen: _by_date(days) for canteen, days in old.items()}
+    new_plan = {canteen: _by_date(days) for canteen, days in new.items()}
+    for canteen, new_days in new_plan.items():
+        old_days = old_plan.get(canteen, {})
+        for meal_date, new_meals in new_days.items():
+            diff.changes += diff_day(
+                canteen, meal_date, old_days.get(meal_date, []), new_meals
+            )
+    for canteen, old_days in old_plan.items():
+        new_days = new_plan.get(canteen, {})
+        for meal_date in old_days:
+            if meal_date not in new_days:
+                diff.dropped_days.append((canteen, meal_date))
+    return diff
+
+
+class PlanChangeNotifier:
+    """
+    Compares every new plan with the previous one and passes the diff to the
+    subscribers if meals were added, removed or changed.
+    Args:
+        plan: Previous plan to compare the first update with. If None, all
+            meals of the first update are reported as added.
+    """
+
+    def __init__(self, plan: Optional[MultiCanteenPlan] = None):
+        self.plan: MultiCanteenPlan = plan if plan is not None else {}
+        self._subscribers: List[Callable[[PlanDiff], None]] = []
+
+    def subscribe(self, callback: Callable[[PlanDiff], None]) -> None:
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[PlanDiff], None]) -> None:
+        self._subscribers.remove(callback)
+
+    def update(self, plan: MultiCanteenPlan) -> PlanDiff:
+        diff = diff_plans(self.plan, plan)
+        self.plan = plan
+        if diff:
+            for callback in list(self._subscribers):
+                callback(diff)
+        return diff
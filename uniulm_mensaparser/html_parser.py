@@ -1,12 +1,28 @@
 import re
+import time
 from dataclasses import dataclass
 from datetime import date
-from typing import List, Tuple
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
 
 from bs4 import BeautifulSoup, NavigableString, Tag
 
-from uniulm_mensaparser.models import Canteen, Meal, MealNutrition, MealType
+from uniulm_mensaparser.instrumentation import (
+    PARSE_CATEGORIES,
+    PARSE_DOCUMENT,
+    record,
+)
+from uniulm_mensaparser.models import (
+    Canteen,
+    Meal,
+    MealInterner,
+    MealNutrition,
+    MealType,
+)
+from uniulm_mensaparser.text import build_meal_name as build_meal_name
+from uniulm_mensaparser.text import extract_co2, pretty_print_category
+from uniulm_mensaparser.text import remove_allergens as remove_allergens
 from uniulm_mensaparser.utils import date_format_iso
+from uniulm_mensaparser.values import parse_meal_values
 
 
 @dataclass
@@ -15,72 +31,125 @@ class SoupMealCategory:
     mealDivs: List[Tag]
 
 
-def remove_allergens(line: str) -> str:
-    parentheses_re = r"\(.*?\)"  # ? == greedy match
-    return re.sub(parentheses_re, "", line)
+def _parse_nutrition_with_parentheses(div_text: str) -> Tuple[str, str]:
+    gram_index = div_text.find("g")
+    first_value = div_text[: gram_index + 1]
+    left_parentheses_index = div_text.find("(")
+    right_parentheses_index = div_text.find(")")
+    parentheses_value = div_text[left_parentheses_index + 1 : right_parentheses_index]
 
+    return first_value, parentheses_value
 
-def build_meal_name(meal_lines: List[str]) -> str:
-    meal_name = " ".join(meal_lines)
 
-    meal_name = remove_allergens(meal_name)
-    # remove duplicate whitespaces
-    meal_name = re.sub(r"\s+", r" ", meal_name)
-    # if the next word begins with an uppercase letter, the - is part of
-    # the word and should be kept
-    meal_name = re.sub(r"- ([A-Z])", r"-\g<1>", meal_name)
-    # if the next word begins with a lowercase letter, the - is used for
-    # hyphenation and thus should be removed
-    meal_name = re.sub(r"- ([a-z])", r"\g<1>", meal_name)
-    meal_name = re.sub(r" ,", r",", meal_name)  # remove space before comma
-    meal_name = re.sub(r"(?<=,)(?=\S)", " ", meal_name)  # add space after comma
-    meal_name = re.sub(
-        r" , ", r" ", meal_name
-    )  # remove commas without content before or after
-    meal_name = meal_name.strip()  # strip remaining whitespace before and after string
-    return meal_name
+# amount of "(davon Zucker 12,0 g)", also with a dot as decimal separator
+SUB_VALUE_RE = re.compile(r"(\d[\d.,]*\s*g)\s*\)")
 
 
-def _pretty_print_meal(meal_category: str) -> str:
-    words = meal_category.strip().split()
-    formatted = []
-    for word in words:
-        if word == "+":
-            formatted.append("und")
-            continue
+def _parse_nutrition_with_sub_value(cells: List[str]) -> Tuple[str, str]:
+    """
+    Returns the value and the "davon" value (saturated fat, sugar) of a fat or
+    carbohydrate row. The "davon" value is in the third cell, pages without it
+    have both values in the second cell.
+    """
+    if len(cells) < 3:
+        return _parse_nutrition_with_parentheses(cells[1])
+    match = SUB_VALUE_RE.search(cells[2])
+    return cells[1], match.group(1) if match else ""
 
-        if all(letter.lower() == "i" for letter in word):
-            formatted.append(word.upper())
-            continue
 
-        formatted.append(word.capitalize())
+PARSER_BACKENDS = ("bs4", "lxml")
 
-    return " ".join(formatted)
+# MaxManager answers days without a plan with <div class="nodata">
+NODATA_RE = re.compile(
+    r"""<div\b[^>]*\bclass\s*=\s*["']?[^"'>]*(?<![\w-])nodata(?![\w-])""",
+    re.IGNORECASE,
+)
+
+
+def is_closed_day(source: str) -> bool:
+    """
+    Returns True if the source is the page of a day without a plan, e.g. a
+    holiday or a day whose plan is not published yet.
+    """
+    return NODATA_RE.search(source) is not None
 
 
 class HtmlMensaParser:
-    def __init__(self):
-        pass
+    def __init__(
+        self,
+        backend: str = "bs4",
+        numeric_values: bool = False,
+        interner: Optional[MealInterner] = None,
+    ):
+        """
+        Args:
+            backend: HTML backend used for parsing, "bs4" | "lxml". If lxml is
+                not installed, the BeautifulSoup backend is used instead.
+            numeric_values: If True, the prices, CO2 and nutrition values of
+                each meal are also parsed into numbers (Meal.values)
+            interner: If set, equal values of all parsed meals are shared
+                (see MealInterner). The meals must not be modified then.
+        """
+        if backend not in PARSER_BACKENDS:
+            raise ValueError(f"Unknown parser backend: {backend}")
+
+        if backend == "lxml":
+            from .lxml_parser import LXML_AVAILABLE
+
+            if not LXML_AVAILABLE:
+                backend = "bs4"
+
+        self.backend = backend
+        self.numeric_values = numeric_values
+        self.interner = interner
+
+    def options_key(self) -> Tuple[Any, ...]:
+        """
+        Returns the options that change the parsed meals, so that cached meals
+        are only reused by parsers with the same options.
+        """
+        interner = None if self.interner is None else id(self.interner)
+        return self.backend, self.numeric_values, interner
 
     # Gets the source of a day and parses it into meals.
     def parse_plan(self, source: str, plan_date: date, canteen: Canteen) -> List[Meal]:
-        soup = BeautifulSoup(source, "html.parser")
-        meals: List[Meal] = []
+        return self._parse_plan(source, plan_date, canteen, self.interner)
 
-        no_meals = soup.find("div", {"class": "nodata"})
+    def parse_many(
+        self, pages: Iterable[Tuple[str, date, Canteen]]
+    ) -> List[List[Meal]]:
+        """
+        Parses the sources of several days. Equal values are shared between
+        all meals of the batch, using the interner of the parser or a new one
+        for this batch.
+        Args:
+            pages: (source, plan_date, canteen) of each day
 
-        if no_meals is not None:
+        Returns: Meals of each day, in the order of pages
+        """
+        interner = self.interner if self.interner is not None else MealInterner()
+        return [
+            self._parse_plan(source, plan_date, canteen, interner)
+            for source, plan_date, canteen in pages
+        ]
+
+    def _parse_plan(
+        self,
+        source: str,
+        plan_date: date,
+        canteen: Canteen,
+        interner: Optional[MealInterner],
+    ) -> List[Meal]:
+        if is_closed_day(source):
+            # no need to build the document
             return []
 
-        meal_container = soup.div
-        if meal_container is None:
-            return []
+        if self.backend == "lxml":
+            from .lxml_parser import parse_meals
 
-        categories: List[SoupMealCategory] = self._split_categories(
-            meal_container.find_all("div", recursive=False)
-        )
-        for cat in categories:
-            meals += self._parse_category(cat)
+            meals = parse_meals(source)
+        else:
+            meals = self._parse_meals_bs4(source)
 
         year, week_number, _ = plan_date.isocalendar()
         for m in meals:
@@ -91,47 +160,76 @@ class HtmlMensaParser:
             # prices for students, employees, others is already set
             m.canteen = canteen
             # allergy and type is already set
+            if self.numeric_values:
+                m.values = parse_meal_values(m)
+            if interner is not None:
+                interner.meal(m)
+
+        return meals
+
+    def _parse_meals_bs4(self, source: str) -> List[Meal]:
+        start = time.perf_counter()
+        soup = BeautifulSoup(source, "html.parser")
+        record(PARSE_DOCUMENT, start, backend="bs4")
+        meals: List[Meal] = []
+
+        no_meals = soup.find("div", {"class": "nodata"})
+
+        if no_meals is not None:
+            return []
+
+        meal_container = soup.div
+        if meal_container is None:
+            return []
+
+        start = time.perf_counter()
+        meal_divs = (
+            child
+            for child in meal_container.children
+            if isinstance(child, Tag) and child.name == "div"
+        )
+        for cat in self._split_categories(meal_divs):
+            meals.extend(self._parse_category(cat))
+        record(PARSE_CATEGORIES, start, backend="bs4", meals=len(meals))
 
         return meals
 
     @staticmethod
-    def _split_categories(meal_categories: List[Tag]) -> List[SoupMealCategory]:
-        result: List[SoupMealCategory] = []
+    def _split_categories(meal_categories: Iterable[Tag]) -> Iterator[SoupMealCategory]:
+        """
+        Groups the divs of a day into categories in a single pass. Each
+        category is yielded as soon as the header of the next one is reached.
+        Args:
+            meal_categories: Category header ("gruppenkopf") and meal divs in
+                document order
 
-        while len(meal_categories) > 0:
-            category_div = meal_categories.pop(0)
-            if "gruppenkopf" not in category_div.attrs["class"]:
+        Returns: Iterator over the categories
+        """
+        category: Optional[SoupMealCategory] = None
+        for div in meal_categories:
+            if "gruppenkopf" in div.attrs.get("class", ()):
+                if category is not None:
+                    yield category
+                category = SoupMealCategory(headerDiv=div, mealDivs=[])
+            elif category is None:
                 raise Exception("invalid input")
-            meal_divs = []
-
-            while (
-                len(meal_categories) > 0
-                and "gruppenkopf" not in meal_categories[0].attrs["class"]
-            ):
-                meal_divs.append(meal_categories.pop(0))
-
-            result.append(
-                SoupMealCategory(
-                    headerDiv=category_div,
-                    mealDivs=meal_divs,
-                )
-            )
+            else:
+                category.mealDivs.append(div)
 
-        return result
+        if category is not None:
+            yield category
 
-    def _parse_category(self, category: SoupMealCategory) -> List[Meal]:
+    def _parse_category(self, category: SoupMealCategory) -> Iterator[Meal]:
         """
-        Parses a single meal from the day.
+        Parses the meals of a category.
         Args:
-            category: The souped div from the HTML document.
-
-        Returns:
+            category: The souped divs of the category from the HTML document.
 
+        Returns: Iterator that parses one meal per step
         """
-        meal_category = str(
-            category.headerDiv.find("div", {"class": "gruppenname"}).contents[0]
+        meal_category = pretty_print_category(
+            str(category.headerDiv.find("div", {"class": "gruppenname"}).contents[0])
         )
-        meals = []
 
         for mealDiv in category.mealDivs:
             # Parse allergy information
@@ -180,45 +278,44 @@ class HtmlMensaParser:
                 price_text
             )
 
+            meal = Meal(
+                name=meal_name,
+                category=meal_category,
+                allergy_ids=allergy_ids,
+                types=meal_types,
+                price_note=price_note,
+                price_students=price_students,
+                price_employees=price_emp,
+                price_others=price_others,
+            )
+
             # Get co2 and nutrition information
             nutri_div = mealDiv.find("div", {"class": "azn"})
-
-            co2_str = ""
-            nutrition = MealNutrition()
             if nutri_div:
-                co2_list = list(
-                    filter(
-                        lambda elem: isinstance(elem, NavigableString),
-                        nutri_div.contents,
-                    )
-                )
-                co2_full_str = " ".join(co2_list).strip()
-                matches = re.findall(r"[\d\.\,]*\sg", co2_full_str)
-                if len(matches) == 1:
-                    co2_str = matches[0]
-                elif len(matches) > 1:
-                    co2_str = matches[-1]
-
-                nutri_rows = nutri_div.find_all("tr")
-                nutri_rows = nutri_rows[1:]  # remove header row
-                nutrition = self._parse_meal_nutrition(nutri_rows)
-
-            meals.append(
-                Meal(
-                    name=meal_name,
-                    category=_pretty_print_meal(meal_category),
-                    allergy_ids=allergy_ids,
-                    types=meal_types,
-                    price_note=price_note,
-                    price_students=price_students,
-                    price_employees=price_emp,
-                    price_others=price_others,
-                    co2=co2_str,
-                    nutrition=nutrition,
-                )
+                meal.co2, meal.nutrition = self._parse_details(nutri_div)
+
+            yield meal
+
+    @staticmethod
+    def _parse_details(nutri_div: Tag) -> Tuple[str, MealNutrition]:
+        """
+        Parses the CO2 footprint and the nutrition of a meal.
+        Args:
+            nutri_div: The "azn" div of the meal
+
+        Returns: [co2, nutrition]
+        """
+        co2_list = list(
+            filter(
+                lambda elem: isinstance(elem, NavigableString),
+                nutri_div.contents,
             )
+        )
+        co2_str = extract_co2(" ".join(co2_list).strip())
 
-        return meals
+        nutri_rows = nutri_div.find_all("tr")
+        nutri_rows = nutri_rows[1:]  # remove header row
+        return co2_str, HtmlMensaParser._parse_meal_nutrition(nutri_rows)
 
     @staticmethod
     def _parse_prices(price: str) -> Tuple[str, str, str, str]:
@@ -247,17 +344,6 @@ class HtmlMensaParser:
 
     @staticmethod
     def _parse_meal_nutrition(divs) -> MealNutrition:
-        def _parse_nutrition_with_parentheses(div_text: str) -> Tuple[str, str]:
-            gram_index = div_text.find("g")
-            first_value = div_text[: gram_index + 1]
-            left_parentheses_index = div_text.find("(")
-            right_parentheses_index = div_text.find(")")
-            parentheses_value = div_text[
-                left_parentheses_index + 1 : right_parentheses_index
-            ]
-
-            return first_value, parentheses_value
-
         try:
             # energy
             energy_cells = divs[0].find_all("td")
@@ -268,16 +354,12 @@ class HtmlMensaParser:
             protein_value = protein_cells[1].decode_contents().strip()
 
             # fat & saturated fat
-            fat_cells = divs[2].find_all("td")
-            fat_value, saturated_fat_value = _parse_nutrition_with_parentheses(
-                fat_cells[1].decode_contents().strip()
-            )
+            fat_cells = [c.decode_contents().strip() for c in divs[2].find_all("td")]
+            fat_value, saturated_fat_value = _parse_nutrition_with_sub_value(fat_cells)
 
             # carbohydrates & sugar
-            carb_cells = divs[3].find_all("td")
-            carb_value, sugar_value = _parse_nutrition_with_parentheses(
-                carb_cells[1].decode_contents().strip()
-            )
+            carb_cells = [c.decode_contents().strip() for c in divs[3].find_all("td")]
+            carb_value, sugar_value = _parse_nutrition_with_sub_value(carb_cells)
 
             # salt
             salt_cells = divs[4].find_all("td")
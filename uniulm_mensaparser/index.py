@@ -0,0 +1,291 @@
+from abc import abstractmethod
+from datetime import date, datetime
+from typing import Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+from .models import Canteen, Meal, MealType, MultiCanteenPlan
+
+"""
+Query engine over parsed plans. A PlanIndex keeps inverted indexes from meal
+types, allergens, categories, canteens and dates to meals, so filters are
+evaluated with set operations instead of iterating over the whole plan.
+
+Filters are composed with & (and), | (or) and ~ (not):
+
+    index.query(
+        meal_type(MealType.VEGAN) & canteen(Canteen.UL_UNI_Sued) & ~allergen("26")
+    )
+"""
+
+Day = Tuple[Canteen, date]
+
+TYPE = "type"
+ALLERGEN = "allergen"
+CATEGORY = "category"
+CANTEEN = "canteen"
+DATE = "date"
+
+
+def _as_date(d: date) -> date:
+    return d.date() if isinstance(d, datetime) else d
+
+
+class Filter:
+    """
+    Selects meal ids of a PlanIndex. Filters can be combined with &, | and ~.
+    """
+
+    @abstractmethod
+    def ids(self, index: "PlanIndex") -> Set[int]:
+        pass
+
+    def __and__(self, other: "Filter") -> "Filter":
+        return _And(self, other)
+
+    def __or__(self, other: "Filter") -> "Filter":
+        return _Or(self, other)
+
+    def __invert__(self) -> "Filter":
+        return _Not(self)
+
+
+class _And(Filter):
+    def __init__(self, left: Filter, right: Filter):
+        self.left = left
+        self.right = right
+
+    def ids(self, index: "PlanIndex") -> Set[int]:
+        left = self.left.ids(index)
+        if not left:
+            return left
+        return left & self.right.ids(index)
+
+
+class _Or(Filter):
+    def __init__(self, left: Filter, right: Filter):
+        self.left = left
+        self.right = right
+
+    def ids(self, index: "PlanIndex") -> Set[int]:
+        return self.left.ids(index) | self.right.ids(index)
+
+
+class _Not(Filter):
+    def __init__(self, inner: Filter):
+        self.inner = inner
+
+    def ids(self, index: "PlanIndex") -> Set[int]:
+        return index.all_ids() - self.inner.ids(index)
+
+
+class _Lookup(Filter):
+    """
+    Meals with any of the given keys in one of the indexes.
+    """
+
+    def __init__(self, index_name: str, keys: Iterable[Hashable]):
+        self.index_name = index_name
+        self.keys = list(keys)
+
+    def ids(self, index: "PlanIndex") -> Set[int]:
+        return index.lookup(self.index_name, self.keys)
+
+
+class _Between(Filter):
+    def __init__(self, start: date, end: date):
+        self.start = _as_date(start)
+        self.end = _as_date(end)
+
+    def ids(self, index: "PlanIndex") -> Set[int]:
+        dates = [d for d in index.dates() if self.start <= d <= self.end]
+        return index.lookup(DATE, dates)
+
+
+class _Where(Filter):
+    def __init__(self, predicate: Callable[[Meal], bool]):
+        self.predicate = predicate
+
+    def ids(self, index: "PlanIndex") -> Set[int]:
+        return {i for i, meal in index.meals_by_id() if self.predicate(meal)}
+
+
+def meal_type(*types: MealType) -> Filter:
+    """
+    Meals with any of the given meal types.
+    """
+    return _Lookup(TYPE, types)
+
+
+def allergen(*allergy_ids: str) -> Filter:
+    """
+    Meals with any of the given allergen ids, use ~allergen(...) to exclude.
+    """
+    return _Lookup(ALLERGEN, allergy_ids)
+
+
+def category(*categories: str) -> Filter:
+    return _Lookup(CATEGORY, categories)
+
+
+def canteen(*canteens: Canteen) -> Filter:
+    return _Lookup(CANTEEN, canteens)
+
+
+def on(*dates: date) -> Filter:
+    return _Lookup(DATE, [_as_date(d) for d in dates])
+
+
+def between(start: date, end: date) -> Filter:
+    """
+    Meals between start and end (both inclusive).
+    """
+    return _Between(start, end)
+
+
+def where(predicate: Callable[[Meal], bool]) -> Filter:
+    """
+    Meals for which predicate returns True, e.g. for numeric values. The
+    predicate is called for every meal, so combine it with indexed filters
+    where possible: indexed & where(...)
+    """
+    return _Where(predicate)
+
+
+class PlanIndex:
+    """
+    Inverted indexes over the meals of a plan.
+    Args:
+        plan: Plan to index
+    """
+
+    def __init__(self, plan: Optional[MultiCanteenPlan] = None):
+        self._meals: Dict[int, Meal] = {}
+        self._order: Dict[int, Tuple[int, date, int]] = {}
+        # index keys of each meal, so a day can be removed even if its meals
+        # were modified after indexing
+        self._meal_keys: Dict[int, List[Tuple[str, Hashable]]] = {}
+        self._day_ids: Dict[Day, List[int]] = {}
+        self._indexes: Dict[str, Dict[Hashable, Set[int]]] = {
+            TYPE: {},
+            ALLERGEN: {},
+            CATEGORY: {},
+            CANTEEN: {},
+            DATE: {},
+        }
+        self._next_id = 0
+        if plan is not None:
+            self.update(plan)
+
+    def update(self, plan: MultiCanteenPlan, remove_missing: bool = True) -> int:
+        """
+        Updates the index with the days of the plan. Days that consist of the
+        same meal objects as before are not indexed again, so updating with a
+        plan from an incremental refresh only touches the refreshed days.
+        Args:
+            plan: New plan
+            remove_missing: Remove indexed days that are not in the plan
+
+        Returns: Number of updated days
+        """
+        updated = 0
+        seen: Set[Day] = set()
+        for c, daily_meals in plan.items():
+            for plan_date, meals in daily_meals.items():
+                day = (c, _as_date(plan_date))
+                seen.add(day)
+                if self._is_unchanged(day, meals):
+                    continue
+                self.update_day(day[0], day[1], meals)
+                updated += 1
+
+        if remove_missing:
+            for day in [d for d in self._day_ids if d not in seen]:
+                self.remove_day(*day)
+                updated += 1
+        return updated
+
+    def _is_unchanged(self, day: Day, meals: List[Meal]) -> bool:
+        ids = self._day_ids.get(day)
+        if ids is None or len(ids) != len(meals):
+            return False
+        return all(self._meals[i] is meal for i, meal in zip(ids, meals))
+
+    def update_day(self, c: Canteen, plan_date: date, meals: List[Meal]) -> None:
+        plan_date = _as_date(plan_date)
+        self.remove_day(c, plan_date)
+        ids = []
+        for position, meal in enumerate(meals):
+            meal_id = self._next_id
+            self._next_id += 1
+            ids.append(meal_id)
+            self._meals[meal_id] = meal
+            self._order[meal_id] = (c.value, plan_date, position)
+            keys = self._keys(c, plan_date, meal)
+            self._meal_keys[meal_id] = keys
+            for index_name, key in keys:
+                self._indexes[index_name].setdefault(key, set()).add(meal_id)
+        self._day_ids[(c, plan_date)] = ids
+
+    def remove_day(self, c: Canteen, plan_date: date) -> None:
+        plan_date = _as_date(plan_date)
+        ids = self._day_ids.pop((c, plan_date), [])
+        for meal_id in ids:
+            del self._meals[meal_id]
+            del self._order[meal_id]
+            for index_name, key in self._meal_keys.pop(meal_id):
+                index = self._indexes[index_name]
+                meal_ids = index[key]
+                meal_ids.discard(meal_id)
+                if not meal_ids:
+                    del index[key]
+
+    @staticmethod
+    def _keys(c: Canteen, plan_date: date, meal: Meal) -> List[Tuple[str, Hashable]]:
+        keys: List[Tuple[str, Hashable]] = [
+            (CANTEEN, c),
+            (DATE, plan_date),
+            (CATEGORY, meal.category),
+        ]
+        # types and allergens may contain duplicates, the index keeps sets
+        keys += [(TYPE, t) for t in meal.types]
+        keys += [(ALLERGEN, a) for a in meal.allergy_ids if a]
+        return keys
+
+    def lookup(self, index_name: str, keys: Iterable[Hashable]) -> Set[int]:
+        index = self._indexes[index_name]
+        result: Set[int] = set()
+        for key in keys:
+            result |= index.get(key, set())
+        return result
+
+    def all_ids(self) -> Set[int]:
+        return set(self._meals)
+
+    def meals_by_id(self) -> Iterable[Tuple[int, Meal]]:
+        return self._meals.items()
+
+    def dates(self) -> List[date]:
+        return sorted(self._indexes[DATE])
+
+    def query(self, meal_filter: Optional[Filter] = None) -> List[Meal]:
+        """
+        Returns the meals matching the filter, ordered by canteen, date and
+        position in the plan.
+        """
+        ids = self.all_ids() if meal_filter is None else meal_filter.ids(self)
+        return [self._meals[i] for i in sorted(ids, key=self._order.__getitem__)]
+
+    def query_plan(self, meal_filter: Optional[Filter] = None) -> MultiCanteenPlan:
+        """
+        Returns the meals matching the filter as plan.
+        """
+        ids = self.all_ids() if meal_filter is None else meal_filter.ids(self)
+        plan: MultiCanteenPlan = {}
+        for meal_id in sorted(ids, key=self._order.__getitem__):
+            canteen_value, plan_date, _ = self._order[meal_id]
+            plan.setdefault(Canteen(canteen_value), {}).setdefault(
+                plan_date, []
+            ).append(self._meals[meal_id])
+        return plan
+
+    def __len__(self) -> int:
+        return len(self._meals)
@@ -0,0 +1,162 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List
+
+"""
+Instrumentation of fetching, parsing and formatting. The library reports the
+duration of each stage together with attributes such as the canteen, date,
+downloaded bytes, parsed meals and cache hits to the tracer of the current
+context. The default tracer ignores all events, so instrumentation is cheap
+unless a tracer is installed with use_tracer:
+
+    tracer = RecordingTracer()
+    with use_tracer(tracer):
+        plan = get_plan()
+    print(tracer.summary())
+
+The tracer is stored in a context variable, so it is also used by the tasks
+of an async call and can differ between concurrent calls.
+"""
+
+FETCH = "fetch"  # MaxManager request or response cache lookup
+PARSE = "parse"  # parsing a page into meals, including the parse cache
+PARSE_DOCUMENT = "parse.document"  # building the soup or lxml tree
+PARSE_CATEGORIES = "parse.categories"  # walking the categories and meals
+FORMAT = "format"  # converting a plan with an adapter
+
+# attributes that are added up in a StageSummary
+SUMMED_ATTRIBUTES = ("bytes", "meals", "cache_hit")
+
+
+@dataclass
+class StageEvent:
+    stage: str
+    duration: float  # seconds
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+class Tracer:
+    """
+    Interface for tracers. Stage events are only created if enabled is True.
+    """
+
+    enabled = True
+
+    def record(self, event: StageEvent) -> None:
+        pass
+
+
+class NoopTracer(Tracer):
+    enabled = False
+
+
+class CallbackTracer(Tracer):
+    """
+    Passes every stage event to callback, e.g. to export it to a metrics
+    system.
+    """
+
+    def __init__(self, callback: Callable[[StageEvent], None]):
+        self.callback = callback
+
+    def record(self, event: StageEvent) -> None:
+        self.callback(event)
+
+
+@dataclass
+class StageSummary:
+    count: int = 0
+    total_duration: float = 0.0
+    max_duration: float = 0.0
+    totals: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def mean_duration(self) -> float:
+        if self.count == 0:
+            return 0.0
+        return self.total_duration / self.count
+
+
+class RecordingTracer(Tracer):
+    """
+    Keeps all stage events in memory.
+    """
+
+    def __init__(self):
+        self.events: List[StageEvent] = []
+
+    def record(self, event: StageEvent) -> None:
+        self.events.append(event)
+
+    def summary(self) -> Dict[str, StageSummary]:
+        """
+        Returns the number of events, durations and the sums of bytes, meals
+        and cache hits per stage.
+        """
+        summaries: Dict[str, StageSummary] = {}
+        for event in self.events:
+            summary = summaries.setdefault(event.stage, StageSummary())
+            summary.count += 1
+            summary.total_duration += event.duration
+            summary.max_duration = max(summary.max_duration, event.duration)
+            for name in SUMMED_ATTRIBUTES:
+                value = event.attributes.get(name)
+                if value is not None:
+                    summary.totals[name] = summary.totals.get(name, 0) + value
+        return summaries
+
+    def clear(self) -> None:
+        self.events.clear()
+
+
+NOOP_TRACER = NoopTracer()
+
+_tracer: ContextVar[Tracer] = ContextVar("uniulm_mensaparser_tracer")
+_attributes: ContextVar[Dict[str, Any]] = ContextVar("uniulm_mensaparser_attributes")
+
+
+def get_tracer() -> Tracer:
+    return _tracer.get(NOOP_TRACER)
+
+
+@contextmanager
+def use_tracer(tracer: Tracer) -> Iterator[Tracer]:
+    """
+    Installs tracer for the current context.
+    """
+    token = _tracer.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _tracer.reset(token)
+
+
+@contextmanager
+def trace_attributes(**attributes: Any) -> Iterator[None]:
+    """
+    Adds attributes (e.g. canteen and date) to all events recorded in this
+    block.
+    """
+    if not get_tracer().enabled:
+        yield
+        return
+
+    token = _attributes.set({**_attributes.get({}), **attributes})
+    try:
+        yield
+    finally:
+        _attributes.reset(token)
+
+
+def record(stage: str, start: float, **attributes: Any) -> None:
+    """
+    Records a stage that started at start (time.perf_counter()) and ends now.
+    """
+    tracer = get_tracer()
+    if tracer.enabled:
+        duration = time.perf_counter() - start
+        tracer.record(
+            StageEvent(stage, duration, {**_attributes.get({}), **attributes})
+        )
@@ -0,0 +1,193 @@
+import time
+from typing import Iterator, List, Optional, Tuple
+
+from uniulm_mensaparser.html_parser import (
+    HtmlMensaParser,
+    _parse_nutrition_with_sub_value,
+)
+from uniulm_mensaparser.instrumentation import (
+    PARSE_CATEGORIES,
+    PARSE_DOCUMENT,
+    record,
+)
+from uniulm_mensaparser.models import Meal, MealNutrition, MealType
+from uniulm_mensaparser.text import (
+    build_meal_name,
+    extract_co2,
+    pretty_print_category,
+)
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:  # pragma: no cover - depends on installed packages
+    etree = None
+    lxml_html = None
+
+"""
+lxml based backend for HtmlMensaParser. It walks the same elements as the
+BeautifulSoup implementation and produces identical meals, but is
+considerably faster. lxml is an optional dependency.
+"""
+
+LXML_AVAILABLE = lxml_html is not None
+
+
+def _has_class(element, class_name: str) -> bool:
+    return class_name in element.get("class", "").split()
+
+
+def _find_all(element, tag: str, class_name: Optional[str] = None) -> Iterator:
+    for child in element.iterdescendants(tag):
+        if class_name is None or _has_class(child, class_name):
+            yield child
+
+
+def _find(element, tag: str, class_name: Optional[str] = None):
+    return next(_find_all(element, tag, class_name), None)
+
+
+def _direct_strings(element) -> List[str]:
+    """
+    Returns the text nodes that are direct children of element, like the
+    NavigableStrings in BeautifulSoup's element.contents.
+    """
+    strings = []
+    if element.text is not None:
+        strings.append(element.text)
+    for child in element:
+        if child.tag is etree.Comment and child.text is not None:
+            strings.append(child.text)
+        if child.tail is not None:
+            strings.append(child.tail)
+    return strings
+
+
+def _decode_contents(element) -> str:
+    """
+    Returns the inner HTML of element.
+    """
+    parts = []
+    if element.text is not None:
+        parts.append(
+            element.text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+        )
+    for child in element:
+        parts.append(etree.tostring(child, encoding="unicode", with_tail=True))
+    return "".join(parts)
+
+
+def parse_meals(source: str) -> List[Meal]:
+    """
+    Parses the meals of a single day. Date, week number and canteen are not
+    set.
+    """
+    if not source.strip():
+        return []
+    start = time.perf_counter()
+    try:
+        document = lxml_html.document_fromstring(source)
+    except etree.ParserError:
+        return []
+    record(PARSE_DOCUMENT, start, backend="lxml")
+
+    if _find(document, "div", "nodata") is not None:
+        return []
+
+    meal_container = _find(document, "div")
+    if meal_container is None:
+        return []
+
+    start = time.perf_counter()
+    meals: List[Meal] = []
+    category_name = None
+    for div in meal_container.iterchildren("div"):
+        if _has_class(div, "gruppenkopf"):
+            header = _find(div, "div", "gruppenname")
+            category_name = pretty_print_category(header.text or "")
+            continue
+        if category_name is None:
+            raise Exception("invalid input")
+        meals.append(_parse_meal(div, category_name))
+    record(PARSE_CATEGORIES, start, backend="lxml", meals=len(meals))
+
+    return meals
+
+
+def _parse_meal(meal_div, category: str) -> Meal:
+    allergy = meal_div.get("lang")
+    if allergy is None:
+        allergy = ""
+    allergy_ids = set(allergy.split(","))
+
+    meal_block = _find(meal_div, "div", "visible-xs-block")
+    fltl_divs = list(_find_all(meal_block, "div", "fltl"))
+    meal_name = build_meal_name(_direct_strings(fltl_divs[1]))
+
+    meal_types = []
+    for icon in _find_all(meal_div, "img", "icon"):
+        src = icon.get("src")
+        if src:
+            meal_types.append(
+                MealType.from_filename_str(
+                    src.removeprefix("assets/icons/").removesuffix(".png")
+                )
+            )
+
+    price_text = _find(meal_block, "span", "preisgramm").getparent().text_content()
+    price_students, price_emp, price_others, price_note = HtmlMensaParser._parse_prices(
+        price_text
+    )
+
+    meal = Meal(
+        name=meal_name,
+        category=category,
+        allergy_ids=allergy_ids,
+        types=meal_types,
+        price_note=price_note,
+        price_students=price_students,
+        price_employees=price_emp,
+        price_others=price_others,
+    )
+
+    nutri_div = _find(meal_div, "div", "azn")
+    if nutri_div is not None:
+        meal.co2, meal.nutrition = _parse_details(nutri_div)
+
+    return meal
+
+
+def _parse_details(nutri_div) -> Tuple[str, MealNutrition]:
+    co2_str = extract_co2(" ".join(_direct_strings(nutri_div)).strip())
+    nutri_rows = list(_find_all(nutri_div, "tr"))[1:]  # remove header row
+    return co2_str, _parse_meal_nutrition(nutri_rows)
+
+
+def _parse_meal_nutrition(rows) -> MealNutrition:
+    def _cells(row) -> List[str]:
+        return [_decode_contents(c).strip() for c in _find_all(row, "td")]
+
+    def _value(row) -> str:
+        return _cells(row)[1]
+
+    try:
+        energy_value = _value(rows[0])
+        protein_value = _value(rows[1])
+        fat_value, saturated_fat_value = _parse_nutrition_with_sub_value(
+            _cells(rows[2])
+        )
+        carb_value, sugar_value = _parse_nutrition_with_sub_value(_cells(rows[3]))
+        salt_value = _value(rows[4])
+    except IndexError:
+        # old html format does not have nutrition list
+        return MealNutrition()
+
+    return MealNutrition(
+        calories=energy_value,
+        protein=protein_value,
+        fat=fat_value,
+        saturated_fat=saturated_fat_value,
+        carbohydrates=carb_value,
+        sugar=sugar_value,
+        salt=salt_value,
+    )
@@ -1,29 +1,73 @@
 import asyncio
+import sys
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import AsyncExitStack
 from datetime import date, datetime
-from typing import List, Set, Tuple, Type
+from typing import Any, AsyncIterator, Iterable, List, Optional, Set, Tuple, Type
 
 import aiohttp
 
 from .adapter import PlanAdapter
-from .html_parser import HtmlMensaParser
-from .models import Canteen, DailyCanteenMeals, Meal, MultiCanteenPlan
+from .cache import ClosedDays, ParseCache, ResponseCache
+from .html_parser import HtmlMensaParser, is_closed_day
+from .instrumentation import FORMAT, PARSE, record, trace_attributes
+from .models import (
+    Canteen,
+    DailyCanteenMeals,
+    DayMeals,
+    Meal,
+    MultiCanteenPlan,
+    MultiLanguagePlan,
+)
+from .scheduler import FetchScheduler, create_session
 from .studierendenwerk_scraper import get_maxmanager_website
-from .utils import get_weekdates_this_and_next_week
+from .utils import (
+    date_format_iso,
+    get_dates_in_range,
+    get_weekdates_this_and_next_week,
+)
 
 
 async def get_meals_for_canteens(
-    canteens: Set[Canteen], language: str
+    canteens: Set[Canteen],
+    language: str,
+    *,
+    cache: Optional[ResponseCache] = None,
+    parse_cache: Optional[ParseCache] = None,
+    parser: Optional[HtmlMensaParser] = None,
+    scheduler: Optional[FetchScheduler] = None,
+    session: Optional[aiohttp.ClientSession] = None,
+    executor: Optional[Executor] = None,
+    closed_days: Optional[ClosedDays] = None,
 ) -> MultiCanteenPlan:
     """
 
     Args:
         language: Language of canteen plan. Values: "de" | "en"
         canteens: Canteens to fetch meals from.
+        cache: Optional cache for MaxManager responses.
+        parse_cache: Optional cache for parsed meals of unchanged pages.
+        parser: Parser for the fetched pages. Defaults to HtmlMensaParser().
+        scheduler: Limits concurrent requests and retries failed requests.
+            Defaults to FetchScheduler().
+        session: Externally owned session that is reused and not closed.
+            If None, a new session is created for this call.
+        executor: Optional executor for parsing, see create_parse_executor.
+            If None, pages are parsed on the event loop thread.
+        closed_days: Remembers days without a plan. Known closed days are not
+            requested again and have no meals in the returned plan.
 
     Returns: Tuple of List of meals and List of fetched & parsed dates.
 
     """
-    async with aiohttp.ClientSession() as session:
+    if scheduler is None:
+        scheduler = FetchScheduler()
+
+    async with AsyncExitStack() as stack:
+        if session is None:
+            session = await stack.enter_async_context(create_session())
+
         # TODO: Plan object should be refactored
 
         # get today's date
@@ -34,7 +78,18 @@ async def get_meals_for_canteens(
         tasks: List[asyncio.Task] = []
 
         async def get_meals_by_canteen(c: Canteen):
-            return c, await get_meals_per_canteen(session, dates, c, language)
+            return c, await get_meals_per_canteen(
+                session,
+                dates,
+                c,
+                language,
+                cache=cache,
+                parse_cache=parse_cache,
+                parser=parser,
+                scheduler=scheduler,
+                executor=executor,
+                closed_days=closed_days,
+            )
 
         for canteen in canteens:
             tasks.append(asyncio.create_task(get_meals_by_canteen(canteen)))
@@ -44,13 +99,237 @@ async def get_meals_for_canteens(
     return dict(results)
 
 
+async def get_meals_for_date_range(
+    canteens: Set[Canteen],
+    start: date,
+    end: date,
+    language: str = "de",
+    *,
+    cache: Optional[ResponseCache] = None,
+    parse_cache: Optional[ParseCache] = None,
+    parser: Optional[HtmlMensaParser] = None,
+    scheduler: Optional[FetchScheduler] = None,
+    session: Optional[aiohttp.ClientSession] = None,
+    executor: Optional[Executor] = None,
+    closed_days: Optional[ClosedDays] = None,
+    weekdays_only: bool = True,
+    failed_days: Optional[List[Tuple[Canteen, date]]] = None,
+) -> MultiCanteenPlan:
+    """
+    Fetches the meals of all days from start to end (inclusive), e.g. to
+    backfill a semester. Days that fail to load because of an error response,
+    a timeout or a connection error are left out of the plan, the other days
+    are still fetched. Other errors are raised.
+    Args:
+        canteens: Canteens to fetch meals from.
+        start: First day
+        end: Last day
+        language: Language of canteen plan. Values: "de" | "en"
+        closed_days: Remembers days without a plan. Known closed days are not
+            requested again and have no meals in the returned plan.
+        weekdays_only: If True, Saturdays and Sundays are skipped.
+        failed_days: If set, the days that failed to load are appended to
+            this list, e.g. to fetch them again later.
+
+    Returns: Meals of each day for each canteen
+
+    """
+    if start > end:
+        raise ValueError("start has to be before end")
+    dates = get_dates_in_range(start, end, weekdays_only)
+    if scheduler is None:
+        scheduler = FetchScheduler()
+
+    async with AsyncExitStack() as stack:
+        if session is None:
+            session = await stack.enter_async_context(create_session())
+
+        days = [(canteen, plan_date) for canteen in canteens for plan_date in dates]
+        tasks = [
+            asyncio.create_task(
+                get_meals_for_date(
+                    session,
+                    plan_date,
+                    canteen,
+                    language,
+                    cache=cache,
+                    parse_cache=parse_cache,
+                    parser=parser,
+                    scheduler=scheduler,
+                    executor=executor,
+                    closed_days=closed_days,
+                )
+            )
+            for canteen, plan_date in days
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    plan: MultiCanteenPlan = {canteen: {} for canteen in canteens}
+    for (canteen, plan_date), result in zip(days, results):
+        if isinstance(result, (aiohttp.ClientError, asyncio.TimeoutError)):
+            if failed_days is not None:
+                failed_days.append((canteen, plan_date))
+            continue
+        if isinstance(result, BaseException):
+            raise result
+        plan[canteen][plan_date] = result
+    return plan
+
+
+async def get_meals_for_languages(
+    canteens: Set[Canteen],
+    languages: Iterable[str],
+    *,
+    cache: Optional[ResponseCache] = None,
+    parse_cache: Optional[ParseCache] = None,
+    parser: Optional[HtmlMensaParser] = None,
+    scheduler: Optional[FetchScheduler] = None,
+    session: Optional[aiohttp.ClientSession] = None,
+    executor: Optional[Executor] = None,
+    closed_days: Optional[ClosedDays] = None,
+) -> MultiLanguagePlan:
+    """
+    Fetches the plans of all canteens in all given languages concurrently
+    through one session and one scheduler.
+    Args:
+        canteens: Canteens to fetch meals from.
+        languages: Languages of canteen plan. Values: "de" | "en"
+
+    Returns: Canteen plan for each language
+
+    """
+    languages = list(languages)
+    if scheduler is None:
+        scheduler = FetchScheduler()
+
+    async with AsyncExitStack() as stack:
+        if session is None:
+            session = await stack.enter_async_context(create_session())
+
+        plans: List[MultiCanteenPlan] = await asyncio.gather(
+            *[
+                get_meals_for_canteens(
+                    canteens,
+                    lang,
+                    cache=cache,
+                    parse_cache=parse_cache,
+                    parser=parser,
+                    scheduler=scheduler,
+                    session=session,
+                    executor=executor,
+                    closed_days=closed_days,
+                )
+                for lang in languages
+            ]
+        )
+
+    return dict(zip(languages, plans))
+
+
+async def iter_meals_for_canteens(
+    canteens: Set[Canteen],
+    language: str,
+    *,
+    cache: Optional[ResponseCache] = None,
+    parse_cache: Optional[ParseCache] = None,
+    parser: Optional[HtmlMensaParser] = None,
+    scheduler: Optional[FetchScheduler] = None,
+    session: Optional[aiohttp.ClientSession] = None,
+    executor: Optional[Executor] = None,
+    closed_days: Optional[ClosedDays] = None,
+) -> AsyncIterator[DayMeals]:
+    """
+    Fetches the same days as get_meals_for_canteens, but yields the meals of
+    each day as soon as they are fetched and parsed instead of waiting for the
+    whole plan. Days are yielded in order of completion.
+    Args:
+        language: Language of canteen plan. Values: "de" | "en"
+        canteens: Canteens to fetch meals from.
+
+    Returns: Async iterator of (canteen, date, meals)
+
+    """
+    if scheduler is None:
+        scheduler = FetchScheduler()
+
+    async with AsyncExitStack() as stack:
+        if session is None:
+            session = await stack.enter_async_context(create_session())
+
+        dates = get_weekdates_this_and_next_week(datetime.now())
+
+        async def get_day(c: Canteen, d: date) -> DayMeals:
+            meals = await get_meals_for_date(
+                session,
+                d,
+                c,
+                language,
+                cache=cache,
+                parse_cache=parse_cache,
+                parser=parser,
+                scheduler=scheduler,
+                executor=executor,
+                closed_days=closed_days,
+            )
+            return c, d, meals
+
+        tasks = [
+            asyncio.create_task(get_day(canteen, plan_date))
+            for canteen in canteens
+            for plan_date in dates
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # the consumer may stop early, remaining requests are not needed
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def format_meal_stream(
+    stream: AsyncIterator[DayMeals], adapter_class: Type[PlanAdapter]
+) -> AsyncIterator[Any]:
+    """
+    Converts each day of a meal stream with PlanAdapter.convert_day.
+    """
+    adapter = adapter_class()
+    async for canteen, meals_date, meals in stream:
+        start = time.perf_counter()
+        converted = adapter.convert_day(canteen, meals_date, meals)
+        record(FORMAT, start, adapter=adapter_class.__name__, meals=len(meals))
+        yield converted
+
+
 async def get_meals_per_canteen(
-    session, dates: List[datetime], canteen: Canteen, language: str
+    session,
+    dates: List[date],
+    canteen: Canteen,
+    language: str,
+    *,
+    cache: Optional[ResponseCache] = None,
+    parse_cache: Optional[ParseCache] = None,
+    parser: Optional[HtmlMensaParser] = None,
+    scheduler: Optional[FetchScheduler] = None,
+    executor: Optional[Executor] = None,
+    closed_days: Optional[ClosedDays] = None,
 ) -> DailyCanteenMeals:
     tasks: List[asyncio.Task] = []
 
     async def get_meal_by_date(d: date):
-        return d, await get_meals_for_date(session, d, canteen, language)
+        return d, await get_meals_for_date(
+            session,
+            d,
+            canteen,
+            language,
+            cache=cache,
+            parse_cache=parse_cache,
+            parser=parser,
+            scheduler=scheduler,
+            executor=executor,
+            closed_days=closed_days,
+        )
 
     for plan_date in dates:
         tasks.append(asyncio.create_task(get_meal_by_date(plan_date)))
@@ -59,14 +338,33 @@ async def get_meals_per_canteen(
     return dict(results)
 
 
-def format_meals(canteen_plans: MultiCanteenPlan, adapter_class: Type[PlanAdapter]):
+def format_meals(
+    canteen_plans: MultiCanteenPlan, adapter_class: Type[PlanAdapter]
+) -> Any:
+    start = time.perf_counter()
     adapter = adapter_class()
     converted = adapter.convert_plans(canteen_plans)
+    record(
+        FORMAT,
+        start,
+        adapter=adapter_class.__name__,
+        meals=sum(len(m) for days in canteen_plans.values() for m in days.values()),
+    )
     return converted
 
 
 async def get_meals_for_date(
-    session: aiohttp.ClientSession, plan_date: date, canteen: Canteen, language: str
+    session: aiohttp.ClientSession,
+    plan_date: date,
+    canteen: Canteen,
+    language: str,
+    *,
+    cache: Optional[ResponseCache] = None,
+    parse_cache: Optional[ParseCache] = None,
+    parser: Optional[HtmlMensaParser] = None,
+    scheduler: Optional[FetchScheduler] = None,
+    executor: Optional[Executor] = None,
+    closed_days: Optional[ClosedDays] = None,
 ) -> List[Meal]:
     """
     This function is used to fetch and parse a single day from the specified canteen.
@@ -74,12 +372,87 @@ async def get_meals_for_date(
         session:
         plan_date:
         canteen:
+        language:
+        cache:
+        parse_cache: If the fetched source is unchanged since the last call
+            with the same parser options, the meals are taken from this cache
+            instead of parsing the source. The cached meal objects are shared
+            between calls and must not be modified.
+        parser: Parser for the fetched page. Defaults to HtmlMensaParser().
+        scheduler:
+        executor: If set, the page is parsed in this executor so the event
+            loop is not blocked. The parser has to be picklable for process
+            pools.
+        closed_days: If set, days that are known to be closed are not
+            requested, and days without a plan are remembered as closed.
 
     Returns:
 
     """
-    p = HtmlMensaParser()
-    source = await get_maxmanager_website(
-        session, canteen.get_maxmanager_id(), plan_date, language
+    with trace_attributes(
+        canteen=canteen.name, date=date_format_iso(plan_date), language=language
+    ):
+        if closed_days is not None and closed_days.is_closed(canteen, plan_date):
+            return []
+
+        source = await get_maxmanager_website(
+            session,
+            canteen.get_maxmanager_id(),
+            plan_date,
+            language,
+            cache=cache,
+            scheduler=scheduler,
+        )
+        if closed_days is not None:
+            if is_closed_day(source):
+                closed_days.mark_closed(canteen, plan_date)
+            else:
+                closed_days.mark_open(canteen, plan_date)
+
+        if parser is None:
+            parser = HtmlMensaParser()
+
+        start = time.perf_counter()
+        if parse_cache is None:
+            meals = await _parse(parser, source, plan_date, canteen, executor)
+            record(PARSE, start, meals=len(meals))
+            return meals
+
+        key = (canteen, date_format_iso(plan_date), language, parser.options_key())
+        digest = ParseCache.content_hash(source)
+        cached = parse_cache.get(key, digest)
+        if cached is None:
+            meals = await _parse(parser, source, plan_date, canteen, executor)
+            parse_cache.set(key, digest, meals)
+        else:
+            meals = cached
+        record(PARSE, start, meals=len(meals), cache_hit=cached is not None)
+        return meals
+
+
+async def _parse(
+    parser: HtmlMensaParser,
+    source: str,
+    plan_date: date,
+    canteen: Canteen,
+    executor: Optional[Executor],
+) -> List[Meal]:
+    if executor is None:
+        return parser.parse_plan(source, plan_date, canteen)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor, parser.parse_plan, source, plan_date, canteen
     )
-    return p.parse_plan(source, plan_date, canteen)
+
+
+def create_parse_executor(max_workers: Optional[int] = None) -> Executor:
+    """
+    Creates an executor for parsing pages on multiple cores. On free-threaded
+    Python builds a thread pool is sufficient, otherwise a process pool is
+    used.
+    """
+    gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    if gil_enabled:
+        return ProcessPoolExecutor(max_workers)
+    return ThreadPoolExecutor(max_workers)
@@ -2,7 +2,7 @@ import datetime
 from dataclasses import dataclass, field
 from datetime import date
 from enum import Enum
-from typing import Dict, List
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
 
 from .utils import date_format_iso, get_monday
 
@@ -109,6 +109,26 @@ class MealNutrition:
     salt: str = ""
 
 
+class MealValues(NamedTuple):
+    """
+    Numeric values of the price, CO2 and nutrition strings of a meal, for
+    sorting and filtering. A value is None if it is missing or could not be
+    parsed.
+    """
+
+    price_students_cents: Optional[int] = None
+    price_employees_cents: Optional[int] = None
+    price_others_cents: Optional[int] = None
+    co2_grams: Optional[float] = None
+    calories_kcal: Optional[float] = None
+    protein_grams: Optional[float] = None
+    carbohydrates_grams: Optional[float] = None
+    sugar_grams: Optional[float] = None
+    fat_grams: Optional[float] = None
+    saturated_fat_grams: Optional[float] = None
+    salt_grams: Optional[float] = None
+
+
 @dataclass
 class Meal:
     name: str = ""
@@ -128,6 +148,294 @@ class Meal:
     )  # vegetarian / vegan / etc. -> parsed from used icon
     co2: str = ""
     nutrition: MealNutrition = field(default_factory=MealNutrition)
+    # only set if the parser was created with numeric_values=True
+    values: Optional[MealValues] = None
+
+
+MEAL_TYPE_ORDER: Tuple[MealType, ...] = tuple(MealType)
+
+
+def meal_types_to_flags(types: Iterable[MealType]) -> int:
+    flags = 0
+    for t in types:
+        flags |= 1 << MEAL_TYPE_ORDER.index(t)
+    return flags
+
+
+def meal_types_from_flags(flags: int) -> List[MealType]:
+    return [t for i, t in enumerate(MEAL_TYPE_ORDER) if flags & (1 << i)]
+
+
+class CompactMealNutrition(NamedTuple):
+    """
+    Immutable, memory efficient variant of MealNutrition.
+    """
+
+    calories: str = ""
+    protein: str = ""
+    carbohydrates: str = ""
+    sugar: str = ""
+    fat: str = ""
+    saturated_fat: str = ""
+    salt: str = ""
+
+    @staticmethod
+    def from_nutrition(nutrition: MealNutrition) -> "CompactMealNutrition":
+        return CompactMealNutrition(
+            calories=nutrition.calories,
+            protein=nutrition.protein,
+            carbohydrates=nutrition.carbohydrates,
+            sugar=nutrition.sugar,
+            fat=nutrition.fat,
+            saturated_fat=nutrition.saturated_fat,
+            salt=nutrition.salt,
+        )
+
+
+EMPTY_NUTRITION = CompactMealNutrition()
+
+_interned_allergy_ids: Dict[FrozenSet[str], FrozenSet[str]] = {}
+
+
+def intern_allergy_ids(allergy_ids: Iterable[str]) -> FrozenSet[str]:
+    """
+    Returns a shared frozenset for equal sets of allergy ids.
+    """
+    frozen = frozenset(allergy_ids)
+    return _interned_allergy_ids.setdefault(frozen, frozen)
+
+
+class MealInterner:
+    """
+    Shares equal strings, allergy id sets, meal type lists, nutrition and
+    numeric values between meals, so that many days of meals in memory do
+    not hold their own copies of recurring values. Interned meals share
+    mutable objects and must not be modified afterwards.
+    """
+
+    def __init__(self):
+        self._strings: Dict[str, str] = {}
+        self._allergy_ids: Dict[FrozenSet[str], set] = {}
+        self._types: Dict[Tuple[MealType, ...], List[MealType]] = {}
+        self._nutrition: Dict[Tuple[str, ...], MealNutrition] = {}
+        self._values: Dict[MealValues, MealValues] = {}
+
+    def string(self, value: str) -> str:
+        return self._strings.setdefault(value, value)
+
+    def allergy_ids(self, allergy_ids: Iterable[str]) -> set:
+        frozen = frozenset(self.string(a) for a in allergy_ids)
+        shared = self._allergy_ids.get(frozen)
+        if shared is None:
+            shared = self._allergy_ids[frozen] = set(frozen)
+        return shared
+
+    def types(self, types: List[MealType]) -> List[MealType]:
+        return self._types.setdefault(tuple(types), types)
+
+    def nutrition(self, nutrition: MealNutrition) -> MealNutrition:
+        key = (
+            nutrition.calories,
+            nutrition.protein,
+            nutrition.carbohydrates,
+            nutrition.sugar,
+            nutrition.fat,
+            nutrition.saturated_fat,
+            nutrition.salt,
+        )
+        shared = self._nutrition.get(key)
+        if shared is None:
+            shared = MealNutrition(*(self.string(v) for v in key))
+            self._nutrition[key] = shared
+        return shared
+
+    def meal(self, meal: Meal) -> Meal:
+        """
+        Replaces the values of meal with shared ones and returns it.
+        """
+        string = self.string
+        meal.name = string(meal.name)
+        meal.category = string(meal.category)
+        meal.date = string(meal.date)
+        meal.price_students = string(meal.price_students)
+        meal.price_employees = string(meal.price_employees)
+        meal.price_others = string(meal.price_others)
+        meal.price_note = string(meal.price_note)
+        meal.allergy_ids = self.allergy_ids(meal.allergy_ids)
+        meal.types = self.types(meal.types)
+        meal.co2 = string(meal.co2)
+        meal.nutrition = self.nutrition(meal.nutrition)
+        if meal.values is not None:
+            meal.values = self._values.setdefault(meal.values, meal.values)
+        return meal
+
+    def clear(self) -> None:
+        self._strings.clear()
+        self._allergy_ids.clear()
+        self._types.clear()
+        self._nutrition.clear()
+        self._values.clear()
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+
+class CompactMeal:
+    """
+    Memory efficient variant of Meal with the same attributes, for keeping
+    many meals in memory. It uses __slots__ instead of a per-instance
+    __dict__, stores allergy_ids as shared frozensets and the meal types as
+    bit flags. types returns the meal types in the order of MealType.
+
+    Instances of FrozenCompactMeal cannot be modified and are hashable.
+    """
+
+    __slots__ = (
+        "name",
+        "category",
+        "date",
+        "week_number",
+        "price_students",
+        "price_employees",
+        "price_others",
+        "price_note",
+        "canteen",
+        "allergy_ids",
+        "type_flags",
+        "co2",
+        "nutrition",
+        "values",
+    )
+    _frozen = False
+
+    def __init__(
+        self,
+        name: str = "",
+        category: str = "",
+        date: str = "",
+        week_number: int = -1,
+        price_students: str = "",
+        price_employees: str = "",
+        price_others: str = "",
+        price_note: str = "",
+        canteen: Canteen = Canteen.NONE,
+        allergy_ids: Iterable[str] = (),
+        types: Iterable[MealType] = (),
+        co2: str = "",
+        nutrition: CompactMealNutrition = EMPTY_NUTRITION,
+        values: Optional[MealValues] = None,
+    ):
+        values = {
+            "name": name,
+            "category": category,
+            "date": date,
+            "week_number": week_number,
+            "price_students": price_students,
+            "price_employees": price_employees,
+            "price_others": price_others,
+            "price_note": price_note,
+            "canteen": canteen,
+            "allergy_ids": intern_allergy_ids(allergy_ids),
+            "type_flags": meal_types_to_flags(types),
+            "co2": co2,
+            "nutrition": nutrition,
+            "values": values,
+        }
+        for key, value in values.items():
+            object.__setattr__(self, key, value)
+
+    @property
+    def types(self) -> List[MealType]:
+        return meal_types_from_flags(self.type_flags)
+
+    @classmethod
+    def from_meal(cls, meal: Meal) -> "CompactMeal":
+        return cls(
+            name=meal.name,
+            category=meal.category,
+            date=meal.date,
+            week_number=meal.week_number,
+            price_students=meal.price_students,
+            price_employees=meal.price_employees,
+            price_others=meal.price_others,
+            price_note=meal.price_note,
+            canteen=meal.canteen,
+            allergy_ids=meal.allergy_ids,
+            types=meal.types,
+            co2=meal.co2,
+            nutrition=CompactMealNutrition.from_nutrition(meal.nutrition),
+            values=meal.values,
+        )
+
+    def to_meal(self) -> Meal:
+        return Meal(
+            name=self.name,
+            category=self.category,
+            date=self.date,
+            week_number=self.week_number,
+            price_students=self.price_students,
+            price_employees=self.price_employees,
+            price_others=self.price_others,
+            price_note=self.price_note,
+            canteen=self.canteen,
+            allergy_ids=set(self.allergy_ids),
+            types=self.types,
+            co2=self.co2,
+            nutrition=MealNutrition(*self.nutrition),
+            values=self.values,
+        )
+
+    def _values(self) -> tuple:
+        return tuple(getattr(self, key) for key in self.__slots__)
+
+    def __setattr__(self, key, value):
+        if self._frozen:
+            raise AttributeError(f"cannot assign to field '{key}'")
+        if key == "types":
+            key, value = "type_flags", meal_types_to_flags(value)
+        elif key == "allergy_ids":
+            value = intern_allergy_ids(value)
+        object.__setattr__(self, key, value)
+
+    def __eq__(self, other):
+        if not isinstance(other, CompactMeal):
+            return NotImplemented
+        return self._values() == other._values()
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{key}={getattr(self, key)!r}" for key in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def __getstate__(self):
+        return self._values()
+
+    def __setstate__(self, state):
+        for key, value in zip(self.__slots__, state):
+            object.__setattr__(self, key, value)
+
+
+class FrozenCompactMeal(CompactMeal):
+    __slots__ = ()
+    _frozen = True
+
+    def __hash__(self) -> int:
+        return hash(self._values())
+
+
+def compact_plan(plan: "MultiCanteenPlan", frozen: bool = False) -> "MultiCanteenPlan":
+    """
+    Converts all meals of a plan to CompactMeal (or FrozenCompactMeal).
+    """
+    meal_class = FrozenCompactMeal if frozen else CompactMeal
+    return {
+        canteen: {
+            plan_date: [meal_class.from_meal(m) for m in meals]
+            for plan_date, meals in daily.items()
+        }
+        for canteen, daily in plan.items()
+    }
 
 
 @dataclass
@@ -152,4 +460,8 @@ class MaxmanagerRequest:
 
 DailyCanteenMeals = Dict[date, List[Meal]]
 
+DayMeals = Tuple[Canteen, date, List[Meal]]
+
 MultiCanteenPlan = Dict[Canteen, DailyCanteenMeals]
+
+MultiLanguagePlan = Dict[str, MultiCanteenPlan]
@@ -0,0 +1,210 @@
+import asyncio
+import time
+from concurrent.futures import Executor
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+
+from .cache import ClosedDays, ParseCache, ResponseCache
+from .html_parser import HtmlMensaParser
+from .mensaparser import get_meals_for_date
+from .models import Canteen, Meal, MultiCanteenPlan
+from .scheduler import FetchScheduler, create_session
+from .utils import get_weekdates_this_and_next_week
+
+"""
+Incremental refresh of a canteen plan. Instead of fetching all days on every
+refresh, only days that are likely to have changed are fetched again and
+merged into the previous plan.
+"""
+
+
+@dataclass
+class RefreshPolicy:
+    """
+    Args:
+        near_days: Number of upcoming plan days (starting today) that are
+            refreshed with near_interval
+        near_interval: Seconds after which near days are fetched again
+        far_interval: Seconds after which later days are fetched again
+        refetch_past: If False, past days are only fetched if they are not in
+            the plan yet
+    """
+
+    near_days: int = 2
+    near_interval: float = 15 * 60
+    far_interval: float = 6 * 60 * 60
+    refetch_past: bool = False
+
+
+def _as_date(d: date) -> date:
+    return d.date() if isinstance(d, datetime) else d
+
+
+class RefreshPlanner:
+    """
+    Keeps the latest plan and refreshes it incrementally.
+    Args:
+        canteens: Canteens of the plan
+        language: Language of canteen plan. Values: "de" | "en"
+        policy: Decides which days are fetched on a refresh
+        plan: Previous plan to start from
+        clock: Returns the current time in seconds since epoch
+        today: Returns the current date
+    """
+
+    def __init__(
+        self,
+        canteens: Iterable[Canteen],
+        language: str = "de",
+        policy: Optional[RefreshPolicy] = None,
+        plan: Optional[MultiCanteenPlan] = None,
+        clock: Callable[[], float] = time.time,
+        today: Callable[[], date] = date.today,
+    ):
+        if policy is None:
+            policy = RefreshPolicy()
+        self.canteens = list(canteens)
+        self.language = language
+        self.policy = policy
+        self.clock = clock
+        self.today = today
+        self.plan: MultiCanteenPlan = {}
+        self.failed_days: List[Tuple[Canteen, date]] = []
+        self._fetched_at: Dict[Tuple[Canteen, date], float] = {}
+
+        if plan is not None:
+            for canteen, daily_meals in plan.items():
+                self.plan[canteen] = {
+                    _as_date(d): meals for d, meals in daily_meals.items()
+                }
+
+    def due_days(self) -> List[Tuple[Canteen, date]]:
+        """
+        Returns the days that should be fetched now, ordered by priority:
+        upcoming days first, starting with today.
+        """
+        today = self.today()
+        now = self.clock()
+        dates = get_weekdates_this_and_next_week(today)
+        upcoming = [d for d in dates if d >= today]
+        near = set(upcoming[: self.policy.near_days])
+
+        due: List[Tuple[int, date, Canteen]] = []
+        for plan_date in dates:
+            if plan_date in near:
+                interval: Optional[float] = self.policy.near_interval
+                priority = 0
+            elif plan_date > today:
+                interval = self.policy.far_interval
+                priority = 1
+            else:
+                interval = (
+                    self.policy.far_interval if self.policy.refetch_past else None
+                )
+                priority = 2
+
+            for canteen in self.canteens:
+                known = plan_date in self.plan.get(canteen, {})
+                fetched_at = self._fetched_at.get((canteen, plan_date))
+                if not known:
+                    is_due = True
+                elif interval is None:
+                    is_due = False
+                else:
+                    is_due = fetched_at is None or now - fetched_at >= interval
+                if is_due:
+                    due.append((priority, plan_date, canteen))
+
+        due.sort(key=lambda d: (d[0], d[1]))
+        return [(canteen, plan_date) for _, plan_date, canteen in due]
+
+    async def refresh(
+        self,
+        *,
+        cache: Optional[ResponseCache] = None,
+        parse_cache: Optional[ParseCache] = None,
+        parser: Optional[HtmlMensaParser] = None,
+        scheduler: Optional[FetchScheduler] = None,
+        session: Optional[aiohttp.ClientSession] = None,
+        executor: Optional[Executor] = None,
+        closed_days: Optional[ClosedDays] = None,
+    ) -> MultiCanteenPlan:
+        """
+        Fetches the due days and merges them into the plan. Days that fail to
+        load (error responses, timeouts or connection errors after all
+        retries) keep their previous meals, are listed in failed_days and are
+        fetched again on the next refresh. Days outside of this and next
+        week are dropped. Days that closed_days knows to be closed are not
+        requested.
+
+        Returns: Updated plan
+        """
+        due = self.due_days()
+        if not due:
+            self.plan = self._merge({})
+            return self.plan
+
+        if scheduler is None:
+            scheduler = FetchScheduler()
+
+        async with AsyncExitStack() as stack:
+            if session is None:
+                session = await stack.enter_async_context(create_session())
+
+            # tasks are created in order of priority, so the scheduler sends
+            # the requests for today and tomorrow first
+            tasks = [
+                asyncio.create_task(
+                    get_meals_for_date(
+                        session,
+                        plan_date,
+                        canteen,
+                        self.language,
+                        cache=cache,
+                        parse_cache=parse_cache,
+                        parser=parser,
+                        scheduler=scheduler,
+                        executor=executor,
+                        closed_days=closed_days,
+                    )
+                )
+                for canteen, plan_date in due
+            ]
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        fetched_at = self.clock()
+        updates: Dict[Tuple[Canteen, date], List[Meal]] = {}
+        self.failed_days = []
+        for day, result in zip(due, results):
+            if isinstance(result, BaseException):
+                self.failed_days.append(day)
+                continue
+            updates[day] = result
+            self._fetched_at[day] = fetched_at
+
+        self.plan = self._merge(updates)
+        return self.plan
+
+    def _merge(
+        self, updates: Dict[Tuple[Canteen, date], List[Meal]]
+    ) -> MultiCanteenPlan:
+        dates = get_weekdates_this_and_next_week(self.today())
+        merged: MultiCanteenPlan = {}
+        for canteen in self.canteens:
+            previous = self.plan.get(canteen, {})
+            merged[canteen] = {}
+            for plan_date in dates:
+                if (canteen, plan_date) in updates:
+                    merged[canteen][plan_date] = updates[(canteen, plan_date)]
+                elif plan_date in previous:
+                    merged[canteen][plan_date] = previous[plan_date]
+
+        window = set(dates)
+        self._fetched_at = {
+            day: t for day, t in self._fetched_at.items() if day[1] in window
+        }
+        return merged
@@ -0,0 +1,186 @@
+import asyncio
+import weakref
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+from .transport import HttpTransport, Transport
+
+"""
+Scheduling of requests to MaxManager: limits the number of requests in flight,
+applies timeouts and retries failed requests with exponential backoff.
+Concurrent identical requests are coalesced into one request (single flight).
+"""
+
+T = TypeVar("T")
+
+RETRY_STATUS_MIN = 500
+
+# HttpTransport has no state, so all schedulers can share one
+DEFAULT_TRANSPORT = HttpTransport()
+
+
+def response_error(url: str, status: int) -> aiohttp.ClientResponseError:
+    """
+    Returns the error for an unsuccessful response to a POST request to url,
+    the same error that aiohttp's raise_for_status raises.
+    """
+    request_info = aiohttp.RequestInfo(
+        URL(url), "POST", CIMultiDictProxy(CIMultiDict()), URL(url)
+    )
+    return aiohttp.ClientResponseError(request_info, (), status=status)
+
+
+def create_session(
+    limit: int = 16,
+    limit_per_host: int = 8,
+    dns_cache_ttl: int = 300,
+    keepalive_timeout: float = 30,
+) -> aiohttp.ClientSession:
+    """
+    Creates a client session with a connection pool suited for MaxManager
+    requests. Connections are kept alive between requests and DNS lookups are
+    cached.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        ttl_dns_cache=dns_cache_ttl,
+        keepalive_timeout=keepalive_timeout,
+    )
+    return aiohttp.ClientSession(connector=connector)
+
+
+class FetchScheduler:
+    """
+    Sends POST requests with a bounded number of requests in flight.
+    Args:
+        max_in_flight: Maximum number of concurrent requests
+        timeout: Timeout per request attempt in seconds
+        retries: Number of retries after a timeout, connection error or 5xx
+            response
+        backoff: Delay before the first retry in seconds, doubled for every
+            further retry
+        max_backoff: Upper bound for the delay between retries in seconds
+        transport: Sends the requests, defaults to HTTP. A ReplayTransport
+            answers them from a recording instead.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 8,
+        timeout: float = 10,
+        retries: int = 3,
+        backoff: float = 0.5,
+        max_backoff: float = 8,
+        transport: Optional[Transport] = None,
+    ):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight has to be at least 1")
+        self.max_in_flight = max_in_flight
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.transport = transport if transport is not None else DEFAULT_TRANSPORT
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # the semaphore is bound to the event loop it is used in, so a new one
+        # is needed when the scheduler is reused in another loop
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._loop = loop
+        return self._semaphore
+
+    def retry_delay(self, attempt: int) -> float:
+        return min(self.max_backoff, self.backoff * 2**attempt)
+
+    async def post(
+        self, session: aiohttp.ClientSession, url: str, data: Dict[str, str]
+    ) -> Tuple[int, str]:
+        """
+        Sends a POST request and returns the status and the body of the
+        response. If all retries fail, the last exception is raised, or an
+        aiohttp.ClientResponseError for the last 5xx response.
+        """
+        semaphore = self._get_semaphore()
+        attempt = 0
+        while True:
+            try:
+                async with semaphore:
+                    status, text = await self.transport.post(
+                        session, url, data, self.timeout
+                    )
+                if status < RETRY_STATUS_MIN:
+                    return status, text
+                if attempt >= self.retries:
+                    raise response_error(url, status)
+            except (asyncio.TimeoutError, aiohttp.ClientConnectionError):
+                if attempt >= self.retries:
+                    raise
+
+            await asyncio.sleep(self.retry_delay(attempt))
+            attempt += 1
+
+
+class SingleFlight:
+    """
+    Shares one in-flight call between concurrent callers with the same key.
+    The first caller starts the call, later callers wait for its result. The
+    call runs in its own task, so cancelling one caller does not cancel the
+    call for the others. The call is cancelled once all of its callers are
+    cancelled.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self._waiters: Dict[Hashable, int] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters.get(key) == 1 and self._calls.get(key) is task:
+                task.cancel()
+            raise
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+
+# one SingleFlight per event loop, futures cannot be shared between loops
+_single_flights: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, SingleFlight]"
+_single_flights = weakref.WeakKeyDictionary()
+
+
+def get_single_flight() -> SingleFlight:
+    """
+    Returns the SingleFlight of the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    single_flight = _single_flights.get(loop)
+    if single_flight is None:
+        single_flight = _single_flights[loop] = SingleFlight()
+    return single_flight
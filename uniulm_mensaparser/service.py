@@ -0,0 +1,288 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
+
+import aiohttp
+from aiohttp import web
+
+from .adapter import JsonAdapter
+from .cache import ClosedDays, ParseCache, ResponseCache, SerializedDayCache
+from .html_parser import HtmlMensaParser
+from .models import Canteen, MultiCanteenPlan
+from .refresh import RefreshPlanner, RefreshPolicy
+from .scheduler import FetchScheduler, create_session
+
+"""
+Long-running service that keeps the latest plan in memory and refreshes it in
+the background. Reads always return the last complete plan, also while a
+refresh is in progress (stale-while-revalidate), so they do not depend on the
+latency of MaxManager.
+
+Run it with: python -m uniulm_mensaparser serve
+"""
+
+logger = logging.getLogger(__name__)
+
+ALL_CANTEENS = "all"
+
+
+@dataclass
+class PlanSnapshot:
+    """
+    Plan of one language with its encoded JSON bodies.
+    Args:
+        plan: Unformatted plan
+        bodies: JSON in the format of SimpleAdapter2, for all canteens
+            (ALL_CANTEENS) and for each canteen by lowercase canteen name
+        etags: ETag of each body
+        updated_at: Time of the refresh in seconds since epoch
+        failed_days: Days that could not be fetched in the last refresh
+    """
+
+    plan: MultiCanteenPlan
+    bodies: Dict[str, bytes]
+    etags: Dict[str, str]
+    updated_at: float
+    failed_days: List[str] = field(default_factory=list)
+
+
+class PlanService:
+    """
+    Refreshes the plan of all languages every interval seconds. Each refresh
+    only fetches the days that are due according to the RefreshPolicy.
+    Args:
+        canteens: Canteens of the plan
+        languages: Languages of the plan
+        interval: Seconds between two refreshes
+        policy: Decides which days are fetched on a refresh
+        closed_days: If set, days without a plan are not requested again
+            until their entry expires
+    """
+
+    def __init__(
+        self,
+        canteens: Optional[Set[Canteen]] = None,
+        languages: Iterable[str] = ("de", "en"),
+        interval: float = 60,
+        policy: Optional[RefreshPolicy] = None,
+        *,
+        cache: Optional[ResponseCache] = None,
+        parse_cache: Optional[ParseCache] = None,
+        parser: Optional[HtmlMensaParser] = None,
+        scheduler: Optional[FetchScheduler] = None,
+        executor: Optional[Executor] = None,
+        closed_days: Optional[ClosedDays] = None,
+    ):
+        if canteens is None:
+            canteens = {Canteen.UL_UNI_Sued, Canteen.UL_UNI_West}
+        if parse_cache is None:
+            parse_cache = ParseCache()
+        if scheduler is None:
+            scheduler = FetchScheduler()
+
+        self.canteens = sorted(canteens, key=lambda c: c.value)
+        self.languages = list(languages)
+        self.interval = interval
+        self.cache = cache
+        self.parse_cache = parse_cache
+        self.parser = parser
+        self.scheduler = scheduler
+        self.executor = executor
+        self.closed_days = closed_days
+        self.last_error: Optional[str] = None
+
+        self._planners = {
+            lang: RefreshPlanner(self.canteens, lang, policy) for lang in self.languages
+        }
+        # the cache is keyed by canteen and date, so each language needs its
+        # own one, otherwise the languages evict each other's days
+        self._adapters = {
+            lang: JsonAdapter(SerializedDayCache()) for lang in self.languages
+        }
+        self._snapshots: Dict[str, PlanSnapshot] = {}
+        # created on first use, so the service can be created outside of an
+        # event loop
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._owns_session = False
+        self._task: Optional[asyncio.Task] = None
+
+    def snapshot(self, language: str) -> Optional[PlanSnapshot]:
+        """
+        Returns the last complete plan of the language, None before the first
+        refresh finished.
+        """
+        return self._snapshots.get(language)
+
+    @property
+    def refreshing(self) -> bool:
+        return self._refresh_lock is not None and self._refresh_lock.locked()
+
+    async def start(self, session: Optional[aiohttp.ClientSession] = None) -> None:
+        """
+        Starts refreshing in the background.
+        Args:
+            session: Externally owned session. If None, the service creates
+                and closes its own session.
+        """
+        self._owns_session = session is None
+        self._session = create_session() if session is None else session
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._session is not None and self._owns_session:
+            await self._session.close()
+        self._session = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # keep serving the last plan, the next refresh may succeed
+                self.last_error = repr(e)
+                logger.exception("Refreshing the plan failed")
+            await asyncio.sleep(self.interval)
+
+    async def refresh(self) -> None:
+        """
+        Refreshes the plans of all languages. If a refresh is already running,
+        waits for it instead of starting another one.
+        """
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        if self._refresh_lock.locked():
+            async with self._refresh_lock:
+                return
+
+        async with self._refresh_lock:
+            await asyncio.gather(
+                *[self._refresh_language(lang) for lang in self.languages]
+            )
+            self.last_error = None
+
+    async def _refresh_language(self, language: str) -> None:
+        planner = self._planners[language]
+        plan = await planner.refresh(
+            cache=self.cache,
+            parse_cache=self.parse_cache,
+            parser=self.parser,
+            scheduler=self.scheduler,
+            session=self._session,
+            executor=self.executor,
+            closed_days=self.closed_days,
+        )
+        self._snapshots[language] = self._encode(plan, planner, language)
+
+    def _encode(
+        self, plan: MultiCanteenPlan, planner: RefreshPlanner, language: str
+    ) -> PlanSnapshot:
+        adapter = self._adapters[language]
+        bodies = {ALL_CANTEENS: adapter.convert_plans(plan)}
+        for c in self.canteens:
+            bodies[c.name.lower()] = adapter.convert_plans({c: plan.get(c, {})})
+        etags = {
+            key: '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+            for key, body in bodies.items()
+        }
+        return PlanSnapshot(
+            plan=plan,
+            bodies=bodies,
+            etags=etags,
+            updated_at=time.time(),
+            failed_days=[f"{c.name.lower()}/{d}" for c, d in planner.failed_days],
+        )
+
+    def status(self) -> dict:
+        now = time.time()
+        return {
+            "refreshing": self.refreshing,
+            "last_error": self.last_error,
+            "languages": {
+                lang: {
+                    "updated_at": snapshot.updated_at,
+                    "age": now - snapshot.updated_at,
+                    "failed_days": snapshot.failed_days,
+                    "encoded_days": {
+                        "hits": self._adapters[lang].cache.stats.hits,
+                        "misses": self._adapters[lang].cache.stats.misses,
+                    },
+                }
+                for lang, snapshot in self._snapshots.items()
+            },
+        }
+
+
+SERVICE_KEY = web.AppKey("service", PlanService)
+
+
+async def _handle_plan(request: web.Request) -> web.Response:
+    service = request.app[SERVICE_KEY]
+    language = request.query.get("language", service.languages[0])
+    canteen = request.match_info.get("canteen", ALL_CANTEENS).lower()
+    if language not in service.languages:
+        raise web.HTTPNotFound(text=f"Unknown language: {language}")
+
+    snapshot = service.snapshot(language)
+    if snapshot is None:
+        # the first refresh has not finished yet
+        raise web.HTTPServiceUnavailable(headers={"Retry-After": "5"})
+    if canteen not in snapshot.bodies:
+        raise web.HTTPNotFound(text=f"Unknown canteen: {canteen}")
+
+    etag = snapshot.etags[canteen]
+    headers = {"ETag": etag}
+    if request.headers.get("If-None-Match") == etag:
+        return web.Response(status=304, headers=headers)
+    return web.Response(
+        body=snapshot.bodies[canteen], content_type="application/json", headers=headers
+    )
+
+
+async def _handle_status(request: web.Request) -> web.Response:
+    service = request.app[SERVICE_KEY]
+    return web.Response(
+        text=json.dumps(service.status()), content_type="application/json"
+    )
+
+
+def create_app(service: PlanService) -> web.Application:
+    """
+    Creates the HTTP application of the service. The service is started and
+    stopped together with the application.
+
+    Routes:
+        GET /plan?language=de: plan of all canteens
+        GET /plan/{canteen}?language=de: plan of one canteen, e.g. ul_uni_sued
+        GET /status: time of the last refresh per language
+    """
+    app = web.Application()
+    app[SERVICE_KEY] = service
+    app.router.add_get("/plan", _handle_plan)
+    app.router.add_get("/plan/{canteen}", _handle_plan)
+    app.router.add_get("/status", _handle_status)
+
+    async def start_service(_app: web.Application) -> None:
+        await service.start()
+
+    async def stop_service(_app: web.Application) -> None:
+        await service.stop()
+
+    app.on_startup.append(start_service)
+    app.on_cleanup.append(stop_service)
+    return app
+
+
+def serve(service: PlanService, host: str = "127.0.0.1", port: int = 8080) -> None:
+    web.run_app(create_app(service), host=host, port=port)
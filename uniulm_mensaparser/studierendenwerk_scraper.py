@@ -1,9 +1,13 @@
+import time
 from datetime import date
-from typing import Optional
+from typing import Dict, Optional
 
 import aiohttp
 
+from .cache import ResponseCache
+from .instrumentation import FETCH, get_tracer, record
 from .models import MaxmanagerRequest
+from .scheduler import FetchScheduler, get_single_flight, response_error
 
 """
 This module is used to get the links to the PDF files.
@@ -18,6 +22,10 @@ async def get_maxmanager_website(
     loc_id: int = 1,
     plan_date: Optional[date] = None,
     lang: str = "de",
+    *,
+    cache: Optional[ResponseCache] = None,
+    scheduler: Optional[FetchScheduler] = None,
+    coalesce: bool = True,
 ) -> str:
     """
     Returns the HTML canteen plan for the selected canteen and date.
@@ -28,8 +36,15 @@ async def get_maxmanager_website(
             1: Universität Süd
             2: Universität West
         plan_date: Date for plan. Defaults to today.
+        cache: Optional response cache. Cached responses are returned without
+            sending a request to MaxManager.
+        scheduler: Optional scheduler that limits concurrent requests and
+            retries failed requests.
+        coalesce: If True, concurrent calls for the same page with the same
+            session, cache and transport share one request.
 
-    Returns: HTML source code of date
+    Returns: HTML source code of date. If MaxManager does not answer with
+        200, an aiohttp.ClientResponseError is raised instead.
     """
 
     if plan_date is None:
@@ -40,6 +55,69 @@ async def get_maxmanager_website(
     form_data.date = plan_date
     form_data.lang = lang
     request_dict = form_data.generate_request_dictionary()
-    async with session.post(MAXMANAGER_URL, data=request_dict) as resp:
-        data = await resp.text()
-        return data
+
+    start = time.perf_counter()
+    if cache is not None:
+        cached = cache.get(request_dict)
+        if cached is not None:
+            record(FETCH, start, cache_hit=True, bytes=0)
+            return cached
+
+    async def fetch() -> str:
+        return await _post_request(
+            session, request_dict, plan_date, cache, scheduler, start
+        )
+
+    if not coalesce:
+        return await fetch()
+
+    # concurrent requests for the same page share one request. The request
+    # uses the session, cache and transport of the first caller, so only
+    # callers that use the same ones can share it. The identities cannot be
+    # reused while the request is in flight, as it references the objects.
+    transport = scheduler.transport if scheduler is not None else None
+    key = (
+        MAXMANAGER_URL,
+        id(session),
+        id(cache),
+        id(transport),
+        tuple(sorted(request_dict.items())),
+    )
+    single_flight = get_single_flight()
+    if not single_flight.in_flight(key):
+        return await single_flight.do(key, fetch)
+
+    data = await single_flight.do(key, fetch)
+    record(FETCH, start, cache_hit=False, coalesced=True, bytes=0)
+    return data
+
+
+async def _post_request(
+    session: aiohttp.ClientSession,
+    request_dict: Dict[str, str],
+    plan_date: date,
+    cache: Optional[ResponseCache],
+    scheduler: Optional[FetchScheduler],
+    start: float,
+) -> str:
+    try:
+        if scheduler is None:
+            async with session.post(MAXMANAGER_URL, data=request_dict) as resp:
+                status, data = resp.status, await resp.text()
+        else:
+            status, data = await scheduler.post(session, MAXMANAGER_URL, request_dict)
+    except Exception as e:
+        record(FETCH, start, cache_hit=False, error=type(e).__name__)
+        raise
+
+    if get_tracer().enabled:
+        size = len(data.encode("utf-8"))
+        record(FETCH, start, cache_hit=False, bytes=size, status=status)
+
+    # error pages must not be parsed as a plan without meals
+    if status != 200:
+        raise response_error(MAXMANAGER_URL, status)
+
+    if cache is not None:
+        cache.set(request_dict, plan_date, data)
+    return data
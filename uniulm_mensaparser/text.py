@@ -0,0 +1,110 @@
+import re
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+"""
+Text normalization for meal names, categories and CO2 values. Patterns are
+compiled once and results are memoized, because the same meal names and
+categories appear on many days of a plan.
+"""
+
+ALLERGENS_RE = re.compile(r"\(.*?\)")  # ? == non-greedy match
+WHITESPACE_RE = re.compile(r"\s+")
+# if the next word begins with an uppercase letter, the - is part of the word
+# and should be kept. If it begins with a lowercase letter, the - is used for
+# hyphenation and thus should be removed
+HYPHEN_RE = re.compile(r"- ([A-Za-z])")
+# a run of commas and the single spaces around them
+COMMA_RUN_RE = re.compile(r" ?,(?: ?,)* ?")
+SPACE_BEFORE_COMMA_RE = re.compile(r" ,")
+NO_SPACE_AFTER_COMMA_RE = re.compile(r"(?<=,)(?=\S)")
+EMPTY_COMMA_RE = re.compile(r" , ")
+CO2_RE = re.compile(r"[\d\.\,]*\sg")
+
+MEAL_NAME_CACHE_SIZE = 4096
+CATEGORY_CACHE_SIZE = 256
+
+
+def remove_allergens(line: str) -> str:
+    return ALLERGENS_RE.sub("", line)
+
+
+def _join_hyphen(match: "re.Match[str]") -> str:
+    letter = match.group(1)
+    if "A" <= letter <= "Z":
+        return "-" + letter
+    return letter
+
+
+# normalized comma runs by (run, followed by text)
+_comma_runs: Dict[Tuple[str, bool], str] = {}
+
+
+def _normalize_comma_run(run: str, followed_by_text: bool) -> str:
+    key = (run, followed_by_text)
+    normalized = _comma_runs.get(key)
+    if normalized is None:
+        # a run only contains spaces and commas, so it can be normalized on
+        # its own. The text after the run is represented by a placeholder.
+        normalized = run + "x" if followed_by_text else run
+        # remove space before comma
+        normalized = SPACE_BEFORE_COMMA_RE.sub(",", normalized)
+        # add space after comma
+        normalized = NO_SPACE_AFTER_COMMA_RE.sub(" ", normalized)
+        # remove commas without content before or after
+        normalized = EMPTY_COMMA_RE.sub(" ", normalized)
+        if followed_by_text:
+            normalized = normalized[:-1]
+        _comma_runs[key] = normalized
+    return normalized
+
+
+@lru_cache(maxsize=MEAL_NAME_CACHE_SIZE)
+def normalize_meal_name(meal_name: str) -> str:
+    """
+    Removes allergens, duplicate whitespace, hyphenation and empty commas
+    from a meal name.
+    """
+    meal_name = remove_allergens(meal_name)
+    meal_name = WHITESPACE_RE.sub(" ", meal_name)
+    if "- " in meal_name:
+        meal_name = HYPHEN_RE.sub(_join_hyphen, meal_name)
+    if "," in meal_name:
+        length = len(meal_name)
+        meal_name = COMMA_RUN_RE.sub(
+            lambda m: _normalize_comma_run(m.group(0), m.end() < length), meal_name
+        )
+    return meal_name.strip()
+
+
+def build_meal_name(meal_lines: List[str]) -> str:
+    return normalize_meal_name(" ".join(meal_lines))
+
+
+@lru_cache(maxsize=CATEGORY_CACHE_SIZE)
+def pretty_print_category(meal_category: str) -> str:
+    words = meal_category.strip().split()
+    formatted = []
+    for word in words:
+        if word == "+":
+            formatted.append("und")
+            continue
+
+        if all(letter.lower() == "i" for letter in word):
+            formatted.append(word.upper())
+            continue
+
+        formatted.append(word.capitalize())
+
+    return " ".join(formatted)
+
+
+def extract_co2(text: str) -> str:
+    """
+    Returns the last CO2 value (e.g. "123 g") of the text, or "" if there is
+    none.
+    """
+    matches = CO2_RE.findall(text)
+    if matches:
+        return matches[-1]
+    return ""
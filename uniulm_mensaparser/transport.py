@@ -0,0 +1,206 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from abc import abstractmethod
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import aiohttp
+
+"""
+Transports send the POST requests of a FetchScheduler. Besides plain HTTP,
+requests can be recorded to a file and replayed from it without network
+access, e.g. for load tests in CI:
+
+    # record once against MaxManager
+    scheduler = FetchScheduler(transport=RecordingTransport("plans.jsonl"))
+    get_plan(scheduler=scheduler)
+
+    # replay with simulated latency and errors
+    transport = ReplayTransport("plans.jsonl", jitter=0.05, error_rate=0.01)
+    get_plan(scheduler=FetchScheduler(transport=transport))
+
+Recordings are JSON lines with the request form, the response status and
+body and the latency of the request.
+"""
+
+MISSING_ERROR = "error"
+MISSING_CYCLE = "cycle"
+
+
+class Transport:
+    """
+    Interface for transports.
+    """
+
+    @abstractmethod
+    async def post(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        data: Dict[str, str],
+        timeout: aiohttp.ClientTimeout,
+    ) -> Tuple[int, str]:
+        """
+        Returns the status and the body of the response. Raises
+        asyncio.TimeoutError or aiohttp.ClientConnectionError for failed
+        requests, so they are retried by the scheduler.
+        """
+        pass
+
+
+class HttpTransport(Transport):
+    async def post(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        data: Dict[str, str],
+        timeout: aiohttp.ClientTimeout,
+    ) -> Tuple[int, str]:
+        async with session.post(url, data=data, timeout=timeout) as resp:
+            return resp.status, await resp.text()
+
+
+class RecordingTransport(Transport):
+    """
+    Sends requests with another transport and appends each response to a
+    recording.
+    Args:
+        path: JSON lines file, created if it does not exist
+        inner: Transport that sends the requests, defaults to HttpTransport
+    """
+
+    def __init__(self, path: Union[str, Path], inner: Optional[Transport] = None):
+        self.path = Path(path)
+        self.inner = inner if inner is not None else HttpTransport()
+        self._lock = threading.Lock()
+
+    async def post(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        data: Dict[str, str],
+        timeout: aiohttp.ClientTimeout,
+    ) -> Tuple[int, str]:
+        start = time.perf_counter()
+        status, text = await self.inner.post(session, url, data, timeout)
+        latency = time.perf_counter() - start
+        line = json.dumps(
+            {"request": data, "status": status, "body": text, "latency": latency},
+            ensure_ascii=False,
+        )
+        with self._lock, self.path.open("a", encoding="utf-8") as f:
+            f.write(line + "\n")
+        return status, text
+
+
+def load_recording(path: Union[str, Path]) -> List[dict]:
+    records = []
+    with Path(path).open(encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                records.append(json.loads(line))
+    return records
+
+
+class ReplayTransport(Transport):
+    """
+    Answers requests with the responses of a recording.
+    Args:
+        path: Recording of a RecordingTransport
+        match_fields: Request fields that identify a response
+        on_missing: MISSING_ERROR raises a KeyError for requests that are not
+            recorded. MISSING_CYCLE answers them with a recorded response of
+            the same canteen and language, chosen by the requested date.
+        latency: Fixed latency in seconds. If None, the recorded latency is
+            used, multiplied by latency_scale.
+        latency_scale: Factor for recorded latencies
+        jitter: Maximum random delay in seconds added to every response
+        error_rate: Fraction of requests answered with error_status
+        error_status: Status of injected error responses
+        timeout_rate: Fraction of requests that time out. They fail after the
+            timeout of the scheduler, or immediately if it has none.
+        seed: Seed for jitter and injected errors, for reproducible runs
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        match_fields: Sequence[str] = ("locId", "lang", "date"),
+        on_missing: str = MISSING_ERROR,
+        latency: Optional[float] = None,
+        latency_scale: float = 1.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        timeout_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        if on_missing not in (MISSING_ERROR, MISSING_CYCLE):
+            raise ValueError(f"Unknown on_missing: {on_missing}")
+        self.match_fields = tuple(match_fields)
+        self.on_missing = on_missing
+        self.latency = latency
+        self.latency_scale = latency_scale
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.timeout_rate = timeout_rate
+        self.requests = 0
+        self._random = random.Random(seed)
+
+        self._records: Dict[tuple, dict] = {}
+        self._by_location: Dict[tuple, List[dict]] = {}
+        for record in load_recording(path):
+            request = record["request"]
+            self._records[self._key(request)] = record
+            location = (request.get("locId"), request.get("lang"))
+            self._by_location.setdefault(location, []).append(record)
+
+    def _key(self, data: Dict[str, str]) -> tuple:
+        return tuple(data.get(f) for f in self.match_fields)
+
+    def find(self, data: Dict[str, str]) -> dict:
+        """
+        Returns the recorded response for the request.
+        """
+        record = self._records.get(self._key(data))
+        if record is not None:
+            return record
+
+        candidates = self._by_location.get((data.get("locId"), data.get("lang")))
+        if self.on_missing == MISSING_ERROR or not candidates:
+            raise KeyError(f"No recorded response for {data}")
+        day = date.fromisoformat(data["date"]).toordinal()
+        return candidates[day % len(candidates)]
+
+    async def post(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        data: Dict[str, str],
+        timeout: aiohttp.ClientTimeout,
+    ) -> Tuple[int, str]:
+        self.requests += 1
+        record = self.find(data)
+
+        delay = self.latency
+        if delay is None:
+            delay = record.get("latency", 0.0) * self.latency_scale
+        if self.jitter:
+            delay += self._random.uniform(0, self.jitter)
+
+        timed_out = self._random.random() < self.timeout_rate
+        if timed_out or (timeout.total is not None and delay > timeout.total):
+            # without a timeout, a request that times out would never finish
+            if timeout.total is not None:
+                await asyncio.sleep(timeout.total)
+            raise asyncio.TimeoutError()
+        await asyncio.sleep(delay)
+
+        if self._random.random() < self.error_rate:
+            return self.error_status, ""
+        return record["status"], record["body"]
@@ -32,3 +32,20 @@ def get_weekdates_from_weekday(weekday: datetime) -> List[datetime]:
 def get_weekdates_this_and_next_week(weekday: datetime) -> List[datetime]:
     next_week = weekday + timedelta(weeks=1)
     return get_weekdates_from_weekday(weekday) + get_weekdates_from_weekday(next_week)
+
+
+def get_dates_in_range(
+    start: date, end: date, weekdays_only: bool = True
+) -> List[date]:
+    """
+    Returns all dates from start to end (inclusive), by default only Monday
+    to Friday.
+    """
+    if isinstance(start, datetime):
+        start = start.date()
+    if isinstance(end, datetime):
+        end = end.date()
+    dates = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    if weekdays_only:
+        dates = [d for d in dates if d.weekday() < 5]
+    return dates
@@ -0,0 +1,74 @@
+import re
+from decimal import Decimal
+from functools import lru_cache
+from typing import Optional
+
+from .models import Meal, MealValues
+
+"""
+Parsing of the price, CO2 and nutrition strings of a meal (e.g. "3,50 €",
+"1.429 g" or "565,0 kcal") into numbers. The strings use German number
+formatting: "," is the decimal separator and "." separates thousands.
+"""
+
+NUMBER_RE = re.compile(r"\d[\d.,]*")
+THOUSANDS_RE = re.compile(r"\d{1,3}(?:\.\d{3})+")
+
+VALUE_CACHE_SIZE = 1024
+
+
+def _number_text(text: str) -> Optional[str]:
+    match = NUMBER_RE.search(text)
+    if match is None:
+        return None
+    number = match.group(0).rstrip(".,")
+    if "," in number:
+        return number.replace(".", "").replace(",", ".")
+    if THOUSANDS_RE.fullmatch(number):
+        return number.replace(".", "")
+    return number
+
+
+@lru_cache(maxsize=VALUE_CACHE_SIZE)
+def parse_number(text: str) -> Optional[float]:
+    """
+    Returns the first number in text, e.g. 1429.0 for "1.429 g", or None.
+    """
+    number = _number_text(text)
+    if number is None:
+        return None
+    try:
+        return float(number)
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=VALUE_CACHE_SIZE)
+def parse_price_cents(text: str) -> Optional[int]:
+    """
+    Returns the price in cents, e.g. 350 for "3,50 €", or None.
+    """
+    number = _number_text(text)
+    if number is None:
+        return None
+    try:
+        return int(Decimal(number) * 100)
+    except ArithmeticError:
+        return None
+
+
+def parse_meal_values(meal: Meal) -> MealValues:
+    nutrition = meal.nutrition
+    return MealValues(
+        price_students_cents=parse_price_cents(meal.price_students),
+        price_employees_cents=parse_price_cents(meal.price_employees),
+        price_others_cents=parse_price_cents(meal.price_others),
+        co2_grams=parse_number(meal.co2),
+        calories_kcal=parse_number(nutrition.calories),
+        protein_grams=parse_number(nutrition.protein),
+        carbohydrates_grams=parse_number(nutrition.carbohydrates),
+        sugar_grams=parse_number(nutrition.sugar),
+        fat_grams=parse_number(nutrition.fat),
+        saturated_fat_grams=parse_number(nutrition.saturated_fat),
+        salt_grams=parse_number(nutrition.salt),
+    )